@@ -1,11 +1,17 @@
-import tkinter as tk
-import customtkinter as ctk
-from src.pipeline import Pipeline
-from src.gui.main_window import MainWindow
+import sys
 
 def main():
+    if "--headless" in sys.argv[1:]:
+        # Same as python -m src.service --headless ...
+        from src import service
+        sys.exit(service.main())
+
+    from src.pipeline import Pipeline
+    from src.gui.main_window import MainWindow
+
     pipeline = Pipeline()
-    pipeline.start()
+    # Model load and camera open run in the background while the window is built
+    pipeline.start(wait=False)
 
     app = MainWindow()
     app.mainloop()
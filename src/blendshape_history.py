@@ -0,0 +1,135 @@
+import numpy as np
+
+# MediaPipe FaceLandmarker blendshape categories, in output order.
+BLENDSHAPE_NAMES = [
+    "_neutral",
+    "browDownLeft", "browDownRight", "browInnerUp", "browOuterUpLeft", "browOuterUpRight",
+    "cheekPuff", "cheekSquintLeft", "cheekSquintRight",
+    "eyeBlinkLeft", "eyeBlinkRight",
+    "eyeLookDownLeft", "eyeLookDownRight", "eyeLookInLeft", "eyeLookInRight",
+    "eyeLookOutLeft", "eyeLookOutRight", "eyeLookUpLeft", "eyeLookUpRight",
+    "eyeSquintLeft", "eyeSquintRight", "eyeWideLeft", "eyeWideRight",
+    "jawForward", "jawLeft", "jawOpen", "jawRight",
+    "mouthClose", "mouthDimpleLeft", "mouthDimpleRight", "mouthFrownLeft", "mouthFrownRight",
+    "mouthFunnel", "mouthLeft", "mouthLowerDownLeft", "mouthLowerDownRight",
+    "mouthPressLeft", "mouthPressRight", "mouthPucker", "mouthRight",
+    "mouthRollLower", "mouthRollUpper", "mouthShrugLower", "mouthShrugUpper",
+    "mouthSmileLeft", "mouthSmileRight", "mouthStretchLeft", "mouthStretchRight",
+    "mouthUpperUpLeft", "mouthUpperUpRight", "noseSneerLeft", "noseSneerRight",
+]
+BLENDSHAPE_INDEX = {name: i for i, name in enumerate(BLENDSHAPE_NAMES)}
+NUM_BLENDSHAPES = len(BLENDSHAPE_NAMES)
+
+
+class BlendshapeHistory:
+    """Fixed-size ring buffer of the last N blendshape vectors and their timestamps.
+
+    All feature queries are vectorized over the channels and return arrays of
+    shape (channels,), so gesture logic can look at every blendshape at once.
+    """
+
+    def __init__(self, capacity=64, channels=NUM_BLENDSHAPES):
+        if capacity < 2:
+            raise ValueError("capacity should be >=2")
+        self.capacity = capacity
+        self.channels = channels
+        self.values = np.zeros((capacity, channels), dtype=np.float32)
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.head = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.head = 0
+        self.count = 0
+
+    def push(self, values, timestamp):
+        row = self.values[self.head]
+        n = min(len(values), self.channels)
+        row[:n] = values[:n]
+        row[n:] = 0.0
+        self.timestamps[self.head] = timestamp
+        self.head = (self.head + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+
+    def push_categories(self, blendshapes, timestamp):
+        """Push a MediaPipe ``face_blendshapes[0]`` category list."""
+        scores = np.fromiter((b.score for b in blendshapes), dtype=np.float32, count=len(blendshapes))
+        self.push(scores, timestamp)
+        return scores
+
+    def _indices(self, n):
+        n = min(n, self.count)
+        return (self.head - n + np.arange(n)) % self.capacity
+
+    def window(self, n):
+        """Return (timestamps, values) of the last n samples, oldest first."""
+        idx = self._indices(n)
+        return self.timestamps[idx], self.values[idx]
+
+    def latest(self):
+        if self.count == 0:
+            return np.zeros(self.channels, dtype=np.float32)
+        return self.values[(self.head - 1) % self.capacity]
+
+    def previous(self):
+        if self.count < 2:
+            return np.zeros(self.channels, dtype=np.float32)
+        return self.values[(self.head - 2) % self.capacity]
+
+    def latest_time(self):
+        if self.count == 0:
+            return None
+        return self.timestamps[(self.head - 1) % self.capacity]
+
+    def smoothed(self, n=4):
+        """Moving average over the last n samples."""
+        if self.count == 0:
+            return np.zeros(self.channels, dtype=np.float32)
+        _, values = self.window(n)
+        return values.mean(axis=0)
+
+    def derivative(self, n=3):
+        """First derivative in units per second, least-squares slope over the last n samples."""
+        if self.count < 2:
+            return np.zeros(self.channels, dtype=np.float32)
+        ts, values = self.window(max(n, 2))
+        dt = ts - ts.mean()
+        denom = float(np.dot(dt, dt))
+        if denom <= 0.0:
+            return np.zeros(self.channels, dtype=np.float32)
+        return (dt @ (values - values.mean(axis=0))) / denom
+
+    def window_max(self, n):
+        if self.count == 0:
+            return np.zeros(self.channels, dtype=np.float32)
+        _, values = self.window(n)
+        return values.max(axis=0)
+
+    def crossed_up(self, threshold):
+        """Channels whose latest sample crossed threshold (scalar or per-channel) from below."""
+        if self.count < 2:
+            return self.latest() >= threshold
+        return (self.previous() < threshold) & (self.latest() >= threshold)
+
+    def rising_edge(self, min_slope, n=3):
+        """Channels that are currently rising faster than min_slope per second."""
+        return self.derivative(n) >= min_slope
+
+    def poly_features(self, n=4):
+        """Quadratic least-squares fit over the last n samples, evaluated at the latest one.
+
+        Returns (value, slope, curvature) arrays, slope per second and curvature
+        per second squared.
+        """
+        zeros = np.zeros(self.channels, dtype=np.float32)
+        if self.count < 3:
+            return self.latest(), self.derivative(n), zeros
+        ts, values = self.window(max(n, 3))
+        t = ts - ts[-1]
+        design = np.stack([np.ones_like(t), t, t * t], axis=1)
+        coeffs, *_ = np.linalg.lstsq(design, values, rcond=None)
+        return coeffs[0], coeffs[1], 2.0 * coeffs[2]
@@ -1,19 +1,38 @@
 import time
-import pyautogui
-from collections import deque
+from src.blendshape_history import BlendshapeHistory, BLENDSHAPE_INDEX, NUM_BLENDSHAPES
+from src.gesture_onset import OnsetDetector
+from src.gesture_matcher import GestureMatcher, gesture_label
+from src.replay import TraceRecorder
+from src.snapshot import SnapshotSlot
+from src.config import ProfileConfig, BlendshapeBindingsConfig
+from src.event_log import emit, GESTURE, GESTURE_PRESS, KEY_DOWN, KEY_UP
+from src.metrics import registry
+from src.lazy_import import lazy_import
+import numpy as np
+
+pyautogui = lazy_import("pyautogui")
+
+GESTURE_TRIGGERS = registry.counter("gesture_triggers_total", "Gesture presses and holds by gesture and action")
 
 class BlendshapeProcessor:    
     def __init__(self, profile_manager=None):
         self.profile_manager = profile_manager
         
+        self.config = ProfileConfig()
         self.default_threshold = 0.5
         self.bindings = []
+        self.binding_index = {}
+        # Bindings section last compiled, and the compiled bindings waiting for the gestures stage
+        self._bindings_config = None
+        self._pending_bindings = None
         
         self.active_key = None 
         self.active_action = None
 
         self.pressed_keys = set()
         self.last_press_time = {}
+        # Called with the frame time while a gesture is pressed or held (InferenceGovernor)
+        self.activity_callback = None
         self.press_cooldown = 1
 
         self.is_enabled = False
@@ -68,7 +87,18 @@ class BlendshapeProcessor:
             ]
         }
 
-        self.jaw_open_counter = 0
+        self.history = BlendshapeHistory(capacity=64)
+        self.onset_detectors = {}
+        self.gesture_matcher = None
+        self.onset_window = 4
+        # Wake the governor when a bound channel rises this fast (per second)
+        # or crosses this fraction of its threshold
+        self.wake_slope = 1.5
+        self.wake_fraction = 0.5
+        self.wake_levels = np.full(NUM_BLENDSHAPES, np.inf, dtype=np.float32)
+        self.bound_mask = np.zeros(NUM_BLENDSHAPES, dtype=bool)
+        self.recorder = None
+        self.snapshot = SnapshotSlot(np.zeros(NUM_BLENDSHAPES, dtype=np.float32))
         self.jaw_open_threshold = 0.1
         self.jaw_open_frame_count = 50
 
@@ -88,8 +118,82 @@ class BlendshapeProcessor:
             }
             self.update_profile(self.profile_manager)
         
-        self.bindings = bs_settings.get("bindings", [])
-        self.default_threshold = bs_settings.get("threshold", 0.5)
+        try:
+            self.apply_config(self.profile_manager.get_config())
+        except ValueError as e:
+            print(f"Invalid blendshape settings: {e}")
+
+    def apply_config(self, config):
+        """Swap in a new ProfileConfig; the bindings are recompiled only when they changed.
+
+        Runs on the GUI or profile watcher thread, so the compiled bindings are
+        posted for the gestures stage, which swaps them in before its next frame.
+        """
+        self.config = config
+        bs_config = config.blendshape_bindings
+        if bs_config == self._bindings_config:
+            return
+        self._bindings_config = bs_config
+        self.default_threshold = bs_config.threshold
+        self._post_bindings([dict(binding) for binding in bs_config.bindings])
+
+    def _post_bindings(self, bindings):
+        """Publish a new bindings list (never mutated afterwards) and compile it for the gestures stage."""
+        self.bindings = bindings
+        self._pending_bindings = self._compile_bindings(bindings, self.default_threshold)
+
+    def _compile_bindings(self, bindings, default_threshold):
+        binding_index = {}
+        for binding in bindings:
+            if "blendshape" in binding:
+                binding_index.setdefault(binding["blendshape"], binding)
+
+        detectors = {}
+        for binding in bindings:
+            if GestureMatcher.is_composite(binding):
+                continue
+            detector = OnsetDetector.from_binding(binding)
+            if detector:
+                detectors[binding["blendshape"]] = detector
+
+        levels = np.full(NUM_BLENDSHAPES, np.inf, dtype=np.float32)
+        for binding in bindings:
+            threshold = binding.get("threshold", default_threshold)
+            for element in binding.get("chord") or binding.get("sequence") or [binding.get("blendshape")]:
+                name, level = element, threshold
+                if isinstance(element, dict):
+                    name, level = element.get("blendshape"), element.get("threshold", threshold)
+                i = BLENDSHAPE_INDEX.get(name)
+                if i is not None:
+                    levels[i] = min(levels[i], self.wake_fraction * level)
+
+        try:
+            matcher = GestureMatcher.compile(bindings, default_threshold)
+        except ValueError as e:
+            print(f"Gesture compile error: {e}")
+            matcher = None
+        return binding_index, detectors, matcher, levels, np.isfinite(levels)
+
+    def _install_pending_bindings(self):
+        """Gestures stage: swap in the newest compiled bindings between frames."""
+        compiled, self._pending_bindings = self._pending_bindings, None
+        if compiled is None:
+            return
+        # Release held keys while the old bindings still name their actions
+        for category in getattr(self, "active_categories", {}):
+            self._release_category(category)
+        if self.active_key:
+            self._release_key()
+        (self.binding_index, self.onset_detectors, self.gesture_matcher,
+         self.wake_levels, self.bound_mask) = compiled
+
+    def start_recording(self):
+        self.recorder = TraceRecorder(("timestamps", "blendshapes"))
+
+    def stop_recording(self, path):
+        recorder, self.recorder = self.recorder, None
+        if recorder and len(recorder) > 0:
+            recorder.save(path)
 
     def enable(self):
         self.is_enabled = True
@@ -135,8 +239,16 @@ class BlendshapeProcessor:
         except Exception as e:
             print(f"Error saving blendshape settings: {e}")
     
-    def update_blendshape(self, blendshapes):
-        self.current_blendshapes = blendshapes
+    def update_blendshape(self, blendshapes, capture_time=None):
+        if self._pending_bindings is not None:
+            self._install_pending_bindings()
+        if blendshapes:
+            current_time = capture_time if capture_time is not None else time.perf_counter()
+            scores = self.history.push_categories(blendshapes, current_time)
+            scores.flags.writeable = False
+            self.snapshot.publish(scores, current_time)
+            if self.recorder is not None:
+                self.recorder.append(current_time, scores)
 
         if not self.is_enabled:
             if self.active_key:
@@ -150,8 +262,17 @@ class BlendshapeProcessor:
         
         action, value = self.process_blendshapes(blendshapes)
 
+        if self.activity_callback and (action or self.active_key or any(getattr(self, "active_categories", {}).values())
+                                       or self._bound_channel_rising()):
+            self.activity_callback(current_time)
+
         return action, value
 
+    def _bound_channel_rising(self):
+        """A bound channel rising fast or crossing part of its threshold: a gesture may be starting."""
+        rising = (self.history.derivative() >= self.wake_slope) & self.bound_mask
+        return bool(np.any(rising | self.history.crossed_up(self.wake_levels)))
+
     def process_blendshapes(self, blendshapes):
         if not blendshapes:
             if hasattr(self, 'active_categories'):
@@ -161,23 +282,16 @@ class BlendshapeProcessor:
                 self._release_key()
             return None, 0
         
-        current_time = time.time()
+        current_time = float(self.history.latest_time())
+        scores = self.history.latest()
         blendshape_values = {}
 
-        jaw_open_value = 0.0
-        
         for blendshape in blendshapes:
-            name = blendshape.category_name
-            value = blendshape.score
-            blendshape_values[name] = value
-
-            if name == "jawOpen":
-                jaw_open_value = value
+            blendshape_values[blendshape.category_name] = blendshape.score
 
-        if jaw_open_value > self.jaw_open_threshold:
-            self.jaw_open_counter = 0
-        else:
-            self.jaw_open_counter += 1
+        if self.gesture_matcher:
+            for binding in self.gesture_matcher.step(scores, current_time):
+                self._execute_press_action(gesture_label(binding), binding["action"])
             
         self._process_hold_mode(blendshape_values)
 
@@ -249,7 +363,8 @@ class BlendshapeProcessor:
                 key = action[4:]  
                 pyautogui.keyDown(key)
                 
-            print(f"[{category}] Key Down: {blendshape_name} -> {action}")
+            emit(GESTURE, KEY_DOWN, category, blendshape_name, action)
+            GESTURE_TRIGGERS.labels(gesture=blendshape_name, action=action).inc()
         except Exception as e:
             print(f"Error in {category}: {e}")
             self.active_categories[category] = None
@@ -279,7 +394,7 @@ class BlendshapeProcessor:
                 key = action[4:] 
                 pyautogui.keyUp(key)
                 
-            print(f"[{category}] Key Up: {blendshape_name} -> {action}")
+            emit(GESTURE, KEY_UP, category, blendshape_name, action)
         except Exception as e:
             print(f"Error releasing {category}: {e}")
         finally:
@@ -289,14 +404,25 @@ class BlendshapeProcessor:
         mouth_candidates = []
         eye_candidates = []
         brow_candidates = []
+
+        if self.onset_detectors:
+            _, slopes, curvatures = self.history.poly_features(self.onset_window)
         
         for name, value in blendshape_values.items():
             binding = self._find_binding(name)
-            if (binding and binding.get("mode", "hold") == "press" and 
-                value >= binding.get("threshold", self.default_threshold)):
-                
-                last_press = self.last_press_time.get(name, 0)
-                if current_time - last_press < self.press_cooldown:
+            if binding and binding.get("mode", "hold") == "press":
+                threshold = binding.get("threshold", self.default_threshold)
+                last_press = self.last_press_time.get(name, float("-inf"))
+                ready = current_time - last_press >= self.press_cooldown
+
+                triggered = value >= threshold
+                detector = self.onset_detectors.get(name)
+                if detector and name in BLENDSHAPE_INDEX:
+                    i = BLENDSHAPE_INDEX[name]
+                    if detector.update(value, slopes[i], curvatures[i], threshold, current_time, ready):
+                        triggered = True
+
+                if not triggered or not ready:
                     continue
                 
                 candidate = {
@@ -359,20 +485,17 @@ class BlendshapeProcessor:
                 key = action[4:]  
                 pyautogui.press(key)
                 
-            print(f"Press Action: {blendshape_name} -> {action}")
+            emit(GESTURE, GESTURE_PRESS, blendshape_name, action)
+            GESTURE_TRIGGERS.labels(gesture=blendshape_name, action=action).inc()
         except Exception as e:
             print(f"Error executing press action: {e}")
 
     def is_mouth_recently_open(self):
-        if self.jaw_open_counter > 50:
-            return False
-        return True
+        recent_max = self.history.window_max(self.jaw_open_frame_count)
+        return recent_max[BLENDSHAPE_INDEX["jawOpen"]] > self.jaw_open_threshold
     
     def _find_binding(self, blendshape_name):
-        for binding in self.bindings:
-            if binding["blendshape"] == blendshape_name:
-                return binding
-        return None
+        return self.binding_index.get(blendshape_name)
 
     def _get_threshold(self, blendshape_name):
         binding = self._find_binding(blendshape_name)
@@ -380,12 +503,14 @@ class BlendshapeProcessor:
             return binding.get("threshold", self.default_threshold)
         return self.default_threshold
     
+    def get_snapshot(self):
+        return self.snapshot.latest
+
     def get_blendshape_value(self, blendshape_name):
-        if hasattr(self, 'current_blendshapes') and self.current_blendshapes:
-            for blendshape in self.current_blendshapes:
-                if blendshape.category_name == blendshape_name:
-                    return blendshape.score
-        return 0.0
+        index = BLENDSHAPE_INDEX.get(blendshape_name)
+        if index is None:
+            return 0.0
+        return float(self.snapshot.latest.data[index])
 
     def _hold_key(self, blendshape_name, action):
         self.active_key = blendshape_name
@@ -406,7 +531,8 @@ class BlendshapeProcessor:
                 key = action[4:]  
                 pyautogui.keyDown(key)
                 
-            print(f"Key Down: {blendshape_name} -> {action}")
+            emit(GESTURE, KEY_DOWN, None, blendshape_name, action)
+            GESTURE_TRIGGERS.labels(gesture=blendshape_name, action=action).inc()
         except Exception as e:
             print(f"Error pressing key: {e}")
             self.active_key = None
@@ -433,7 +559,7 @@ class BlendshapeProcessor:
                 key = action[4:] 
                 pyautogui.keyUp(key)
                 
-            print(f"Key Up: {self.active_key} -> {action}")
+            emit(GESTURE, KEY_UP, None, self.active_key, action)
         except Exception as e:
             print(f"Error releasing key: {e}")
         finally:
@@ -463,49 +589,53 @@ class BlendshapeProcessor:
     def add_binding(self, blendshape, action, threshold=None, mode="hold"):
         if threshold is None:
             threshold = self.default_threshold
-            
-        for binding in self.bindings:
-            if binding["blendshape"] == blendshape:
+
+        # Copy on write: the gestures stage may be reading the current bindings
+        bindings = [dict(binding) for binding in self.bindings]
+        for binding in bindings:
+            if binding.get("blendshape") == blendshape:
                 binding["action"] = action
                 binding["threshold"] = threshold
                 binding["mode"] = mode
-                self.save_to_profile()
-                return True
-        
-        self.bindings.append({
-            "blendshape": blendshape,
-            "action": action,
-            "threshold": threshold,
-            "mode": mode
-        })
-        
-        self.save_to_profile()
+                break
+        else:
+            bindings.append({
+                "blendshape": blendshape,
+                "action": action,
+                "threshold": threshold,
+                "mode": mode
+            })
+
+        self.set_bindings(bindings)
         return True
     
     def update_binding_mode(self, blendshape, mode):
-        for binding in self.bindings:
-            if binding["blendshape"] == blendshape:
+        bindings = [dict(binding) for binding in self.bindings]
+        for binding in bindings:
+            if binding.get("blendshape") == blendshape:
                 binding["mode"] = mode
-                self.save_to_profile()
+                self.set_bindings(bindings)
                 return True
         return False
     
     def get_binding_mode(self, blendshape):
-        binding = self._find_binding(blendshape)
-        return binding.get("mode", "hold") if binding else "hold"
+        for binding in self.bindings:
+            if binding.get("blendshape") == blendshape:
+                return binding.get("mode", "hold")
+        return "hold"
     
     def remove_binding(self, blendshape):
         for i, binding in enumerate(self.bindings):
-            if binding["blendshape"] == blendshape:
-                self.bindings.pop(i)
-                    
-                self.save_to_profile()
+            if binding.get("blendshape") == blendshape:
+                self.set_bindings(self.bindings[:i] + self.bindings[i + 1:])
                 return True
         
         return False
 
     def set_bindings(self, bindings):
-        self.bindings = bindings
+        self._post_bindings(bindings)
+        # The profile watcher sees this as already applied
+        self._bindings_config = BlendshapeBindingsConfig(tuple(bindings), self.default_threshold)
         self.save_to_profile()
     
     def cleanup(self):
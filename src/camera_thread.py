@@ -1,21 +1,38 @@
-import cv2, numpy as np
-import threading
 import time
 from threading import Thread, Event
+from src.lazy_import import lazy_import
+from src.event_log import emit, CAMERA, CAMERA_READ_FAILED, CAMERA_RESTART, CAMERA_LOOP_ERROR, ERROR, WARNING
+from src.metrics import registry
+
+cv2 = lazy_import("cv2")
+
+FRAMES_CAPTURED = registry.counter("camera_frames_total", "Frames read from the camera")
+READ_FAILURES = registry.counter("camera_read_failures_total", "Failed camera reads")
 
 class CameraThread:
-    
+
     def __init__(self, frame_callback=None):
-        self.lock = threading.Lock()
         self.frame_callback = frame_callback
         self.cap = None
         self.is_running = False
         self.stop_flag = Event()
         self.camera_thread = None
         self.current_frame = None
+        # RGB frames are converted into a small ring of reused buffers and passed
+        # downstream by reference. A slot is rewritten ring_size reads later, which
+        # is more than the frames in flight (camera mailbox, face stage, preview;
+        # mp.Image copies the pixels it is given).
+        self.ring_size = 4
+        self.ring = [None] * self.ring_size
+        # Capture time of the frame in each slot; None while the slot is being rewritten
+        self.ring_times = [None] * self.ring_size
+        self.ring_index = 0
+        self.frame_seq = 0
+        self._bgr = None
         self.frame_width = 640
         self.frame_height = 480
-    
+        self.failure_count = 0
+
     def start(self):
         if not self.is_running:
             self.is_running = True
@@ -23,74 +40,114 @@ class CameraThread:
             self.camera_thread = Thread(target=self.camera_loop, daemon=True)
             self.camera_thread.start()
             print("Camera thread started.")
-    
-    def camera_loop(self):
+
+    def open(self):
         try:
             self.cap = cv2.VideoCapture(0, cv2.CAP_DSHOW)
             self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.frame_width)
             self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.frame_height)
-            
+
             if not self.cap.isOpened():
                 print("Can't open camera!")
-                self.is_running = False
-                return
+                return False
         except Exception as e:
             print(f"Error camera init: {e}")
+            return False
+        self.failure_count = 0
+        return True
+
+    def ensure_open(self):
+        """Open the camera unless a warm-up already did."""
+        if self.cap is not None and self.cap.isOpened():
+            return True
+        return self.open()
+
+    def release(self):
+        if self.cap:
+            self.cap.release()
+            self.cap = None
+        self._bgr = None
+
+    def read(self):
+        """Grab one frame; return (frame_rgb, capture_time) or None if the read failed."""
+        try:
+            ret, frame = self.cap.read(self._bgr) if self._bgr is not None else self.cap.read()
+            capture_time = time.perf_counter()
+            if not ret:
+                self.failure_count += 1
+                READ_FAILURES.inc()
+                emit(CAMERA, CAMERA_READ_FAILED, self.failure_count, level=WARNING)
+
+                if self.failure_count > 5:
+                    emit(CAMERA, CAMERA_RESTART, level=WARNING)
+                    self.cap.release()
+                    time.sleep(1)
+                    self.cap = cv2.VideoCapture(0, cv2.CAP_DSHOW)
+                    self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.frame_width)
+                    self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.frame_height)
+                    self.failure_count = 0
+
+                time.sleep(0.1)
+                return None
+            self.failure_count = 0
+            FRAMES_CAPTURED.inc()
+            self._bgr = frame
+
+            slot = self.ring[self.ring_index]
+            if slot is None or slot.shape != frame.shape:
+                slot = None
+            self.ring_times[self.ring_index] = None
+            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=slot)
+            self.ring[self.ring_index] = frame_rgb
+            self.ring_times[self.ring_index] = capture_time
+            self.ring_index = (self.ring_index + 1) % self.ring_size
+            self.frame_seq += 1
+            self.current_frame = frame_rgb
+            return frame_rgb, capture_time
+        except Exception as e:
+            emit(CAMERA, CAMERA_LOOP_ERROR, repr(e), level=ERROR)
+            time.sleep(0.1)
+            return None
+
+    def camera_loop(self):
+        if not self.open():
             self.is_running = False
             return
-        
-        failure_count = 0 
-        
+
         while not self.stop_flag.is_set():
-            try:
-                start_time = time.time()
-                ret, frame = self.cap.read()
-                # print(f"frame time: {time.time() - start_time:.4f} giây")
-                if not ret:
-                    failure_count += 1
-                    print(f"Lỗi đọc frame từ camera (lần {failure_count})")
-                    
-                    if failure_count > 5:
-                        print("Thử khởi động lại camera...")
-                        self.cap.release()
-                        time.sleep(1)
-                        self.cap = cv2.VideoCapture(0, cv2.CAP_DSHOW)
-                        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.frame_width)
-                        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.frame_height)
-                        failure_count = 0
-                    
-                    time.sleep(0.1)
-                    continue
-                failure_count = 0
-                
-                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-
-                with self.lock:
-                    self.current_frame = frame_rgb.copy()
-                
-                if self.frame_callback:
-                    self.frame_callback(frame_rgb)
-                
-            except Exception as e:
-                print(f"Camera_loop bug: {e}")
-                time.sleep(0.1)
-            
+            item = self.read()
+            if item is not None and self.frame_callback:
+                try:
+                    self.frame_callback(*item)
+                except Exception as e:
+                    emit(CAMERA, CAMERA_LOOP_ERROR, repr(e), level=ERROR)
+
             try:
                 cv2.waitKey(1)
             except:
                 pass
-    
+        self.release()
+
+    def is_intact(self, frame, capture_time):
+        """True if ``frame`` (a ring buffer) still holds the image captured at ``capture_time``.
+
+        Readers that keep a frame past the face stage (the preview) check this
+        after reading it; a slot is marked before it is rewritten.
+        """
+        for buffer, stamp in zip(self.ring, self.ring_times):
+            if buffer is frame:
+                return stamp == capture_time
+        return True
+
     def set_frame_callback(self, callback):
         self.frame_callback = callback
 
     def get_frame(self):
-        with self.lock:
-            if self.current_frame is not None:
-                return self.current_frame.copy()
-            return None
-    
+        """Latest RGB frame by reference; copy it to keep it past the next few reads."""
+        return self.current_frame
+
     def __del__(self):
         if hasattr(self, "is_running") and self.is_running:
-            self.stop_flag.set()  
+            self.stop_flag.set()
         if hasattr(self, "cap") and self.cap:
-            self.cap.release()
\ No newline at end of file
+            self.cap.release()
@@ -0,0 +1,162 @@
+from dataclasses import dataclass, fields, replace
+from typing import Any, Dict, Tuple
+
+from src.blendshape_history import NUM_BLENDSHAPES
+from src.model_registry import MODEL_VARIANTS, DEFAULT_VARIANT
+
+PROCESSING_MODES = ("LIVE_STREAM", "IMAGE")
+_TRUE = ("true", "1", "yes", "on")
+_FALSE = ("false", "0", "no", "off")
+
+
+def _coerce(value, kind, name):
+    try:
+        if kind is bool:
+            # bool("false") is True, so strings are parsed explicitly
+            if isinstance(value, str) and value.strip().lower() in _TRUE + _FALSE:
+                return value.strip().lower() in _TRUE
+            if isinstance(value, (bool, int)) and value in (0, 1):
+                return bool(value)
+            raise ValueError
+        if kind is int:
+            return int(value)
+        if kind is float:
+            return float(value)
+        if kind is str:
+            return str(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid value for '{name}': {value!r}")
+    return value
+
+
+def _from_section(cls, section):
+    """Build a config dataclass from a profile section, using defaults for missing keys."""
+    section = section or {}
+    if not isinstance(section, dict):
+        raise ValueError(f"Profile section for {cls.__name__} should be an object")
+    kwargs = {}
+    for f in fields(cls):
+        value = section.get(f.name)
+        if value is not None:
+            kwargs[f.name] = _coerce(value, f.type, f.name)
+    return cls(**kwargs)
+
+
+@dataclass(frozen=True, slots=True)
+class MouseConfig:
+    velocity_scale: float = 15.0
+    mincutoff: float = 1.5
+    beta: float = 0.1
+    fast_init: bool = False
+    toggle: bool = True
+    accel_on: bool = True
+    predict: bool = False
+    predict_max_ms: float = 100.0
+
+    def __post_init__(self):
+        if self.predict_max_ms < 0:
+            raise ValueError("predict_max_ms should be >=0")
+        if self.velocity_scale <= 0:
+            raise ValueError("velocity_scale should be >0")
+        if self.mincutoff <= 0:
+            raise ValueError("mincutoff should be >0")
+        if self.beta < 0:
+            raise ValueError("beta should be >=0")
+
+
+@dataclass(frozen=True, slots=True)
+class StateMachineConfig:
+    name: str = "browInnerUp"
+    index: int = 3
+    display: str = "Brow Raise"
+    threshold: float = 0.5
+
+    def __post_init__(self):
+        if not 0 <= self.index < NUM_BLENDSHAPES:
+            raise ValueError(f"state machine blendshape index should be in [0, {NUM_BLENDSHAPES})")
+        if not 0.0 < self.threshold <= 1.0:
+            raise ValueError("state machine threshold should be in (0.0, 1.0]")
+
+
+@dataclass(frozen=True, slots=True)
+class FaceProcessingConfig:
+    mode: str = "LIVE_STREAM"
+    model: str = DEFAULT_VARIANT
+    yaw_correct: float = 0.0
+    pitch_correct: float = 0.0
+    frame_gate: bool = False
+    frame_gate_threshold: float = 2.0
+
+    def __post_init__(self):
+        if self.mode not in PROCESSING_MODES:
+            raise ValueError(f"face processing mode should be one of {PROCESSING_MODES}")
+        if self.model not in MODEL_VARIANTS:
+            raise ValueError(f"Unknown model variant '{self.model}', expected one of {sorted(MODEL_VARIANTS)}")
+        if self.frame_gate_threshold < 0:
+            raise ValueError("frame_gate_threshold should be >=0")
+
+
+@dataclass(frozen=True, slots=True)
+class BlendshapeBindingsConfig:
+    bindings: Tuple[Dict[str, Any], ...] = ()
+    threshold: float = 0.5
+
+    @classmethod
+    def from_section(cls, section):
+        section = section or {}
+        bindings = section.get("bindings", [])
+        if not isinstance(bindings, list) or not all(isinstance(b, dict) for b in bindings):
+            raise ValueError("blendshape bindings should be a list of objects")
+        for binding in bindings:
+            if "action" not in binding:
+                raise ValueError(f"Binding without action: {binding}")
+        return cls(tuple(bindings), float(section.get("threshold", 0.5)))
+
+
+@dataclass(frozen=True, slots=True)
+class ProfileConfig:
+    """Immutable, validated view of one profile.
+
+    Pipeline stages hold a single reference to the current ProfileConfig and
+    swap it in one assignment when the profile changes, so hot paths read
+    plain attributes instead of nested dict keys.
+    """
+    name: str = "default"
+    mouse_controller: MouseConfig = MouseConfig()
+    state_machine_blendshape: StateMachineConfig = StateMachineConfig()
+    face_processing: FaceProcessingConfig = FaceProcessingConfig()
+    blendshape_bindings: BlendshapeBindingsConfig = BlendshapeBindingsConfig()
+
+    @classmethod
+    def from_dict(cls, name, data):
+        if not isinstance(data, dict):
+            raise ValueError(f"Profile '{name}' should be a JSON object")
+        return cls(
+            name=name,
+            mouse_controller=_from_section(MouseConfig, data.get("mouse_controller")),
+            state_machine_blendshape=_from_section(StateMachineConfig, data.get("state_machine_blendshape")),
+            face_processing=_from_section(FaceProcessingConfig, data.get("face_processing")),
+            blendshape_bindings=BlendshapeBindingsConfig.from_section(data.get("blendshape_bindings")),
+        )
+
+    def with_mouse(self, **changes):
+        return replace(self, mouse_controller=replace(self.mouse_controller, **changes))
+
+    def with_state_machine(self, **changes):
+        return replace(self, state_machine_blendshape=replace(self.state_machine_blendshape, **changes))
+
+
+def diff_configs(old, new):
+    """Return the set of ``"section.field"`` paths that differ between two ProfileConfigs."""
+    changed = set()
+    for section in fields(ProfileConfig):
+        if section.name == "name":
+            continue
+        old_section = getattr(old, section.name) if old is not None else None
+        new_section = getattr(new, section.name)
+        if old_section == new_section:
+            continue
+        for f in fields(new_section):
+            if old_section is None or getattr(old_section, f.name) != getattr(new_section, f.name):
+                changed.add(f"{section.name}.{f.name}")
+    return changed
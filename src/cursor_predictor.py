@@ -0,0 +1,66 @@
+import numpy as np
+
+
+class CursorPredictor:
+    """Alpha-beta-gamma tracker that extrapolates the head position ahead in time.
+
+    ``step`` updates the position/velocity/acceleration estimate with a new
+    sample and returns the position ``horizon`` seconds ahead. The prediction
+    is blended with the raw sample by a confidence weight that ramps from 0 at
+    ``still_speed`` to 1 at ``full_speed`` (pixels per second), so a still head
+    passes through unchanged and its jitter is not amplified.
+    """
+
+    def __init__(self, alpha=0.7, beta=0.4, gamma=0.02, max_horizon=0.1,
+                 still_speed=20.0, full_speed=150.0):
+        if not 0 < alpha <= 1 or beta < 0 or gamma < 0:
+            raise ValueError("alpha should be in (0, 1], beta and gamma >=0")
+        if full_speed <= still_speed:
+            raise ValueError("full_speed should be > still_speed")
+        self.alpha = alpha
+        self.beta = beta
+        self.gamma = gamma
+        self.max_horizon = max_horizon
+        self.still_speed = still_speed
+        self.full_speed = full_speed
+        self.reset()
+
+    def reset(self):
+        self.x = None
+        self.pos = None
+        self.v = np.zeros(2)
+        self.a = np.zeros(2)
+        self.last_time = None
+        self.confidence = 0.0
+
+    def update(self, pos, timestamp):
+        pos = np.asarray(pos, dtype=np.float64)
+        self.pos = pos
+        if self.x is None:
+            self.x = pos.copy()
+            self.last_time = timestamp
+            return
+        if timestamp <= self.last_time:
+            return
+        dt = timestamp - self.last_time
+        self.last_time = timestamp
+
+        x_pred = self.x + self.v * dt + 0.5 * self.a * dt * dt
+        v_pred = self.v + self.a * dt
+        r = pos - x_pred
+        self.x = x_pred + self.alpha * r
+        self.v = v_pred + (self.beta / dt) * r
+        self.a = self.a + (2.0 * self.gamma / (dt * dt)) * r
+
+        speed = float(np.hypot(self.v[0], self.v[1]))
+        self.confidence = min(1.0, max(0.0, (speed - self.still_speed) / (self.full_speed - self.still_speed)))
+
+    def predict(self, horizon):
+        h = min(max(horizon, 0.0), self.max_horizon)
+        lead = self.x + self.v * h + 0.5 * self.a * h * h
+        return self.pos + self.confidence * (lead - self.pos)
+
+    def step(self, pos, timestamp, horizon):
+        """Feed one sample and return the position predicted ``horizon`` seconds ahead."""
+        self.update(pos, timestamp)
+        return self.predict(horizon)
@@ -0,0 +1,410 @@
+"""End-to-end benchmark: recorded clip -> stage graph -> recorded input events.
+
+Replays a clip through the same camera -> face -> {mouse, gestures} stages
+as the Pipeline, with the real face model and the profile's bindings, but
+with pyautogui/keyboard replaced by a sink that records each injected event
+instead of sending it. Frames are paced at the clip's frame rate, so every
+run sees the same input. For each processing mode it reports:
+
+- capture-to-inject latency (frame read -> first cursor move for that frame)
+- sustained FPS (model results per second of wall time)
+- process CPU time per frame
+- gesture trigger latency (frame read -> gesture key/click injected)
+
+A separate synchronous IMAGE pass under tracemalloc measures Python-side
+allocations per frame (the model's native buffers are not traced)::
+
+    python -m src.e2e_bench run clip.mp4 --out bench/before.json
+    python -m src.e2e_bench run clip.mp4 --modes IMAGE --profile gaming --out bench/after.json
+    python -m src.e2e_bench compare bench/before.json bench/after.json --tolerance 0.1
+
+``compare`` exits with status 1 if any metric got worse by more than the
+tolerance.
+"""
+import argparse
+import dataclasses
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+
+import numpy as np
+
+from src import blendshape_processor, mouse_controller
+from src.blendshape_processor import BlendshapeProcessor
+from src.config import PROCESSING_MODES
+from src.face_processor import FaceProcessor
+from src.gate_bench import load_clip
+from src.mouse_controller import MouseController
+from src.profile_manager import ProfileManager
+from src.stage_runtime import Stage, StageGraph, DROP_OLDEST
+
+GESTURE_EVENTS = ("click", "doubleClick", "scroll", "press", "keyDown", "mouseDown")
+
+# metric path -> True if a larger value is worse
+COMPARED_METRICS = {
+    "latency_ms.p50": True,
+    "latency_ms.p95": True,
+    "latency_ms.p99": True,
+    "fps": False,
+    "cpu_ms_per_frame": True,
+    "gesture_latency_ms.p50": True,
+    "gesture_latency_ms.p95": True,
+}
+COMPARED_ALLOC_METRICS = {
+    "peak_kb_per_frame.p50": True,
+    "peak_kb_per_frame.p95": True,
+    "net_blocks_per_frame": True,
+}
+
+
+class RecordingSink:
+    """Stands in for both pyautogui and keyboard: records injected events, sends nothing.
+
+    Stage handlers put the capture time of the frame they work on in
+    ``context`` (per thread), so each event can be traced back to its frame.
+    """
+
+    def __init__(self, max_events=None):
+        # Bounded for long runs (the soak test) so the sink itself does not grow
+        self.events = deque(maxlen=max_events)
+        self.context = threading.local()
+
+    def _record(self, name, *args):
+        capture_time = getattr(self.context, "capture_time", None)
+        self.events.append((time.perf_counter(), capture_time, threading.current_thread().name, name, args))
+
+    # pyautogui
+    def moveRel(self, x, y, duration=0):
+        self._record("moveRel", x, y)
+
+    def click(self, button="left"):
+        self._record("click", button)
+
+    def doubleClick(self):
+        self._record("doubleClick")
+
+    def scroll(self, clicks):
+        self._record("scroll", clicks)
+
+    def mouseDown(self, button="left"):
+        self._record("mouseDown", button)
+
+    def mouseUp(self, button="left"):
+        self._record("mouseUp", button)
+
+    def keyDown(self, key):
+        self._record("keyDown", key)
+
+    def keyUp(self, key):
+        self._record("keyUp", key)
+
+    def press(self, key):
+        self._record("press", key)
+
+    # keyboard (listeners are never called during a replay)
+    def release(self, key):
+        self._record("release", key)
+
+    def hook(self, callback):
+        pass
+
+    def hook_key(self, key, callback, suppress=False):
+        pass
+
+    def is_pressed(self, key):
+        return False
+
+
+class ReplaySource:
+    """Camera stand-in that hands out a clip's frames at the clip's frame rate."""
+
+    def __init__(self, frames, fps, pace=True):
+        self.frames = frames
+        self.fps = fps
+        self.pace = pace
+        self.index = 0
+        self.start_time = None
+        self.capture_times = []
+        self.done = threading.Event()
+
+    def read(self):
+        if self.index >= len(self.frames):
+            self.done.set()
+            time.sleep(0.01)
+            return None
+        if self.start_time is None:
+            self.start_time = time.perf_counter()
+        if self.pace:
+            delay = self.start_time + self.index / self.fps - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        frame = self.frames[self.index]
+        self.index += 1
+        capture_time = time.perf_counter()
+        self.capture_times.append(capture_time)
+        return frame, capture_time
+
+
+def _percentiles(values, scale=1000.0):
+    if not values:
+        return {"p50": None, "p95": None, "p99": None, "mean": None, "count": 0}
+    values = np.asarray(values) * scale
+    return {"p50": float(np.percentile(values, 50)), "p95": float(np.percentile(values, 95)),
+            "p99": float(np.percentile(values, 99)), "mean": float(values.mean()), "count": len(values)}
+
+
+def _install_sink(max_events=None):
+    sink = RecordingSink(max_events)
+    mouse_controller.pyautogui = sink
+    mouse_controller.keyboard = sink
+    blendshape_processor.pyautogui = sink
+    return sink
+
+
+def _build(config, mode):
+    config = dataclasses.replace(config, face_processing=dataclasses.replace(config.face_processing, mode=mode))
+    mc = MouseController()
+    bp = BlendshapeProcessor()
+    fp = FaceProcessor()
+    for stage in (mc, bp, fp):
+        stage.apply_config(config)
+    bp.enable()
+    mc.start_tracking()
+    if not fp.initialize():
+        raise SystemExit("Could not load the face model")
+    return mc, bp, fp
+
+
+def run_mode(frames, fps, config, mode, warmup=30, pace=True):
+    sink = _install_sink()
+    mc, bp, fp = _build(config, mode)
+    source = ReplaySource(frames, fps, pace)
+    result_times = []
+
+    def on_mouse(item):
+        sink.context.capture_time = item[-1]
+        result_times.append(time.perf_counter())
+        mc.update_loop(*item)
+
+    def on_gestures(item):
+        sink.context.capture_time = item[-1]
+        bp.update_blendshape(*item)
+
+    # Same shape and edge policies as Pipeline.start
+    graph = StageGraph()
+    graph.add(Stage("camera", source=source.read))
+    graph.add(Stage("face", handler=lambda item: fp.process_frame(*item)))
+    graph.add(Stage("mouse", handler=on_mouse))
+    graph.add(Stage("gestures", handler=on_gestures))
+    graph.connect("camera", "face", capacity=1, policy=DROP_OLDEST)
+    mouse_edge = graph.connect(None, "mouse", capacity=4, policy=DROP_OLDEST)
+    gesture_edge = graph.connect(None, "gestures", capacity=16, policy=DROP_OLDEST)
+    fp.landmark_call_back = lambda *result: mouse_edge.put(result)
+    fp.blendshape_call_back = lambda *result: gesture_edge.put(result)
+
+    cpu_start = time.process_time()
+    graph.start()
+    source.done.wait()
+    # Let the last results drain through the model callback and the mouse stage
+    time.sleep(0.5)
+    graph.stop()
+    cpu = time.process_time() - cpu_start
+    fp.close()
+
+    # Measure after the warm-up frames only
+    first_capture = source.capture_times[min(warmup, len(source.capture_times) - 1)]
+    results = [t for t in result_times if t >= first_capture]
+    latencies = {}
+    gesture_latencies = []
+    for inject_time, capture_time, thread, name, _ in sink.events:
+        if capture_time is None or capture_time < first_capture:
+            continue
+        if name == "moveRel":
+            # The cursor move is split in two halves; the first one is when the user sees it
+            latencies.setdefault(capture_time, inject_time - capture_time)
+        elif name in GESTURE_EVENTS:
+            gesture_latencies.append(inject_time - capture_time)
+    span = (results[-1] - results[0]) if len(results) > 1 else 0.0
+
+    return {
+        "mode": mode,
+        "frames": source.index,
+        "results": len(result_times),
+        "latency_ms": _percentiles(list(latencies.values())),
+        "fps": (len(results) - 1) / span if span > 0 else 0.0,
+        "cpu_ms_per_frame": cpu / max(source.index, 1) * 1000,
+        "gesture_latency_ms": _percentiles(gesture_latencies),
+        "gesture_events": len(gesture_latencies),
+        "edges": {name: edge.stats() for name, edge in graph.edges.items()},
+    }
+
+
+def run_allocations(frames, config, limit=200, warmup=10):
+    """Synchronous IMAGE pass: traced Python allocations per frame, face -> mouse -> gestures."""
+    sink = _install_sink()
+    mc, bp, fp = _build(config, "IMAGE")
+    fp.landmark_call_back = mc.update_loop
+    fp.blendshape_call_back = bp.update_blendshape
+    frames = frames[:limit + warmup]
+    for frame in frames[:warmup]:
+        fp.process_frame(frame, time.perf_counter())
+
+    peaks = []
+    tracemalloc.start()
+    blocks_start = sys.getallocatedblocks()
+    for frame in frames[warmup:]:
+        tracemalloc.reset_peak()
+        current, _ = tracemalloc.get_traced_memory()
+        fp.process_frame(frame, time.perf_counter())
+        peaks.append(tracemalloc.get_traced_memory()[1] - current)
+    blocks_end = sys.getallocatedblocks()
+    tracemalloc.stop()
+    fp.close()
+
+    measured = max(len(frames) - warmup, 1)
+    return {
+        "frames": measured,
+        "peak_kb_per_frame": _percentiles(peaks, scale=1 / 1024),
+        "net_blocks_per_frame": (blocks_end - blocks_start) / measured,
+    }
+
+
+def machine_metadata(clip, frames, fps):
+    def version(module):
+        try:
+            return __import__(module).__version__
+        except Exception:
+            return None
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": commit,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "numpy": version("numpy"),
+        "opencv": version("cv2"),
+        "mediapipe": version("mediapipe"),
+        "clip": os.path.basename(clip),
+        "clip_frames": len(frames),
+        "clip_fps": fps,
+    }
+
+
+def _lookup(data, path):
+    for key in path.split("."):
+        if not isinstance(data, dict) or key not in data:
+            return None
+        data = data[key]
+    return data
+
+
+def compare(old, new, tolerance=0.1):
+    """Return ``[(name, old, new, change, regressed)]`` for every metric present in both runs."""
+    rows = []
+
+    def check(prefix, old_section, new_section, metrics):
+        for path, higher_is_worse in metrics.items():
+            a, b = _lookup(old_section, path), _lookup(new_section, path)
+            if a is None or b is None:
+                continue
+            change = (b - a) / abs(a) if a else 0.0
+            worse = change if higher_is_worse else -change
+            rows.append((f"{prefix}{path}", a, b, change, worse > tolerance))
+
+    for mode in PROCESSING_MODES:
+        if mode in old.get("modes", {}) and mode in new.get("modes", {}):
+            check(f"{mode}.", old["modes"][mode], new["modes"][mode], COMPARED_METRICS)
+    if old.get("allocations") and new.get("allocations"):
+        check("alloc.", old["allocations"], new["allocations"], COMPARED_ALLOC_METRICS)
+    return rows
+
+
+def print_run(result):
+    for mode, r in result["modes"].items():
+        lat, gl = r["latency_ms"], r["gesture_latency_ms"]
+        print(f"{mode:<12} latency p50 {lat['p50'] or 0:6.1f}ms p95 {lat['p95'] or 0:6.1f}ms "
+              f"p99 {lat['p99'] or 0:6.1f}ms | {r['fps']:5.1f} fps | cpu {r['cpu_ms_per_frame']:6.2f}ms/frame | "
+              f"gestures {r['gesture_events']} p50 {gl['p50'] or 0:6.1f}ms")
+    alloc = result.get("allocations")
+    if alloc:
+        print(f"{'allocations':<12} peak p50 {alloc['peak_kb_per_frame']['p50'] or 0:.1f}KB/frame "
+              f"p95 {alloc['peak_kb_per_frame']['p95'] or 0:.1f}KB/frame | "
+              f"net {alloc['net_blocks_per_frame']:.2f} blocks/frame")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="benchmark a recorded clip")
+    run_parser.add_argument("clip", help="video file recorded from the webcam")
+    run_parser.add_argument("--modes", nargs="+", choices=PROCESSING_MODES, default=list(PROCESSING_MODES))
+    run_parser.add_argument("--profile", help="profile whose settings and bindings to use (default: current)")
+    run_parser.add_argument("--limit", type=int, default=None, help="only use the first N frames")
+    run_parser.add_argument("--warmup", type=int, default=30, help="frames left out of the statistics")
+    run_parser.add_argument("--no-pace", action="store_true", help="feed frames as fast as the graph takes them")
+    run_parser.add_argument("--alloc-frames", type=int, default=200, help="frames in the allocation pass (0 skips it)")
+    run_parser.add_argument("--out", help="write the results to this JSON file")
+
+    compare_parser = commands.add_parser("compare", help="flag regressions between two result files")
+    compare_parser.add_argument("old")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument("--tolerance", type=float, default=0.1, help="allowed relative change (0.1 = 10%%)")
+    args = parser.parse_args()
+
+    if args.command == "compare":
+        with open(args.old, encoding="utf-8") as f:
+            old = json.load(f)
+        with open(args.new, encoding="utf-8") as f:
+            new = json.load(f)
+        for key in ("machine", "processor", "cpu_count", "clip"):
+            if old["metadata"].get(key) != new["metadata"].get(key):
+                print(f"warning: {key} differs ({old['metadata'].get(key)} vs {new['metadata'].get(key)})")
+        rows = compare(old, new, args.tolerance)
+        print(f"{'metric':<36} {'old':>10} {'new':>10} {'change':>8}")
+        for name, a, b, change, regressed in rows:
+            print(f"{name:<36} {a:10.2f} {b:10.2f} {change * 100:7.1f}%{'  REGRESSION' if regressed else ''}")
+        return 1 if any(row[4] for row in rows) else 0
+
+    frames, fps = load_clip(args.clip, args.limit)
+    if not frames:
+        raise SystemExit(f"No frames read from {args.clip}")
+    print(f"{len(frames)} frames at {fps:.1f} fps")
+    profile_manager = ProfileManager()
+    config = profile_manager.get_config(args.profile)
+    profile_manager.close()
+
+    result = {"metadata": machine_metadata(args.clip, frames, fps), "modes": {}}
+    result["metadata"]["profile"] = config.name
+    for mode in args.modes:
+        result["modes"][mode] = run_mode(frames, fps, config, mode, args.warmup, pace=not args.no_pace)
+    if args.alloc_frames > 0:
+        result["allocations"] = run_allocations(frames, config, args.alloc_frames)
+    print_run(result)
+
+    if args.out:
+        directory = os.path.dirname(args.out)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=4)
+        print(f"Results saved to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
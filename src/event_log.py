@@ -0,0 +1,186 @@
+import itertools
+import json
+import os
+import threading
+import time
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+LEVEL_NAMES = {"debug": DEBUG, "info": INFO, "warning": WARNING, "error": ERROR}
+
+# Subsystems
+CAMERA = "camera"
+FACE = "face"
+GESTURE = "gesture"
+MOUSE = "mouse"
+MODE = "mode"
+PIPELINE = "pipeline"
+
+# Event codes
+CAMERA_READ_FAILED = "camera_read_failed"
+CAMERA_RESTART = "camera_restart"
+CAMERA_LOOP_ERROR = "camera_loop_error"
+PROCESS_FRAME_ERROR = "process_frame_error"
+GESTURE_PRESS = "gesture_press"
+KEY_DOWN = "key_down"
+KEY_UP = "key_up"
+MOUSE_BUTTON_DOWN = "mouse_button_down"
+MOUSE_BUTTON_UP = "mouse_button_up"
+MODE_SWITCH = "mode_switch"
+UPDATE_LOOP_ERROR = "update_loop_error"
+INFERENCE_RATE = "inference_rate"
+STAGE_ERROR = "stage_error"
+STAGE_STOP_TIMEOUT = "stage_stop_timeout"
+MODEL_LOAD_FAILED = "model_load_failed"
+TRACE_SAVED = "trace_saved"
+
+
+class EventLog:
+    """Structured event log that is cheap to write from hot paths.
+
+    ``emit`` only claims a slot from an atomic counter and stores a
+    (seq, timestamp, subsystem, level, code, args) tuple in a preallocated
+    ring: no lock, no formatting, no I/O. A background flusher drains the
+    ring into a size-rotated JSONL file. If producers lap the flusher, the
+    overwritten records are counted in ``dropped``.
+    """
+
+    def __init__(self, capacity=4096, path="logs/events.jsonl", max_bytes=1 << 20,
+                 backups=3, flush_interval=0.5, echo=False):
+        self.capacity = capacity
+        self.records = [None] * capacity
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.flush_interval = flush_interval
+        self.echo = echo
+        self.default_level = INFO
+        self.levels = {}
+        self.dropped = 0
+
+        self._counter = itertools.count()
+        self._read = 0
+        self._file = None
+        self._flush_lock = threading.Lock()
+        self._stop_flag = threading.Event()
+        self._thread = None
+
+        self.configure(os.environ.get("WASDHEAD_LOG_LEVELS", ""))
+
+    def configure(self, spec):
+        """Apply a verbosity spec such as ``"camera=debug,gesture=warning,*=info"``."""
+        for item in spec.split(","):
+            if "=" not in item:
+                continue
+            subsystem, level = (part.strip() for part in item.split("=", 1))
+            level = LEVEL_NAMES.get(level.lower())
+            if level is None:
+                continue
+            if subsystem == "*":
+                self.default_level = level
+            else:
+                self.levels[subsystem] = level
+
+    def set_level(self, subsystem, level):
+        self.levels[subsystem] = level
+
+    def is_enabled(self, subsystem, level):
+        return level >= self.levels.get(subsystem, self.default_level)
+
+    def emit(self, subsystem, code, *args, level=INFO):
+        if level < self.levels.get(subsystem, self.default_level):
+            return
+        seq = next(self._counter)
+        self.records[seq % self.capacity] = (seq, time.time(), subsystem, level, code, args)
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_flag.clear()
+        self._thread = threading.Thread(target=self._flush_loop, name="event-log-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_flag.set()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        self.flush()
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def _flush_loop(self):
+        while not self._stop_flag.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Event log flush error: {e}")
+
+    def drain(self):
+        """Collect every record written since the last drain, oldest first."""
+        out = []
+        while True:
+            record = self.records[self._read % self.capacity]
+            if record is None or record[0] < self._read:
+                break
+            if record[0] > self._read:
+                self.dropped += record[0] - self._read
+                self._read = record[0]
+                continue
+            out.append(record)
+            self._read += 1
+        return out
+
+    def flush(self):
+        with self._flush_lock:
+            records = self.drain()
+            if not records:
+                return
+            lines = []
+            for seq, timestamp, subsystem, level, code, args in records:
+                lines.append(json.dumps({
+                    "seq": seq, "t": timestamp, "subsystem": subsystem,
+                    "level": level, "event": code, "args": [_jsonable(a) for a in args],
+                }))
+                if self.echo:
+                    print(f"[{subsystem}] {code} {' '.join(str(a) for a in args)}")
+            self._write("\n".join(lines) + "\n")
+
+    def _write(self, text):
+        if self._file is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(text)
+        self._file.flush()
+        if self._file.tell() >= self.max_bytes:
+            self._rotate()
+
+    def _rotate(self):
+        self._file.close()
+        self._file = None
+        for i in range(self.backups - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+
+def _jsonable(value):
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return str(value)
+
+
+event_log = EventLog()
+emit = event_log.emit
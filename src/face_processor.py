@@ -1,37 +1,111 @@
-import mediapipe as mp
 import time
 import numpy as np
-from mediapipe.tasks import python
-from mediapipe.tasks.python import vision
 import threading
-import win32gui
-import win32con
-
-
-def set_window_always_on_top(win_name):
-    hwnd = win32gui.FindWindow(None, win_name)
-    if hwnd != 0:
-        win32gui.SetWindowPos(
-            hwnd,
-            win32con.HWND_TOPMOST,
-            0, 0, 0, 0,
-            win32con.SWP_NOMOVE | win32con.SWP_NOSIZE
-        )
+from collections import deque
+from src.lazy_import import lazy_import
+from src.event_log import emit, ERROR, FACE, MODE, MODE_SWITCH, MODEL_LOAD_FAILED, PROCESS_FRAME_ERROR
+from src.config import ProfileConfig
+from src.replay import TraceRecorder
+from src.snapshot import SnapshotSlot
+from src.frame_gate import FrameGate
+from src.model_registry import get_variant, DEFAULT_VARIANT
+from src.metrics import registry
+from src.platform_win import set_window_always_on_top
+
+mp = lazy_import("mediapipe")
+cv2 = lazy_import("cv2")
+
+INFERENCES = registry.counter("inference_total", "Frames run through the face model")
+INFERENCE_LATENCY = registry.histogram("inference_latency_seconds", "Capture to model result")
+_SKIPPED = registry.counter("inference_skipped_total", "Frames that did not run the model, by reason")
+SKIPPED_GOVERNOR = _SKIPPED.labels(reason="governor")
+SKIPPED_GATE = _SKIPPED.labels(reason="frame_gate")
+
+
 class FaceProcessor:
     def __init__(self, landmark_call_back = None,  model_path="src/tasks/face_landmarker.task", blendshape_call_back = None):
         self.model_path = model_path
+        self.variant = get_variant(DEFAULT_VARIANT)
         self.model = None
         self.result = None  
         self.blendshape_call_back = blendshape_call_back
         self.lock = threading.Lock()
         self.is_initialized = False
-        self.processed_frame = None
+        # Newest frame the model has seen, published by reference (no copy) with a sequence number
+        self.frame_slot = SnapshotSlot()
         self.frame_width = 640
         self.frame_height = 480
         self.indices = [4, 133, 362]
         self.landmark_call_back = landmark_call_back
         self.is_live_stream_mode = False
         self.mode_change_callback = None
+        self.config = ProfileConfig()
+        self.last_timestamp_ms = -1
+        # (timestamp_ms, submit time) of frames handed to detect_async, oldest first
+        self._submitted = deque(maxlen=32)
+        self.recorder = None
+        self.governor = None
+        self.frame_gate = None
+        # Serializes result delivery between the MediaPipe thread and reused results
+        self.delivery_lock = threading.Lock()
+        # Config waiting to be applied by the thread that runs process_frame
+        self._pending_config = None
+        # Held while the model is created; a config posted meanwhile waits for the face stage
+        self.model_lock = threading.RLock()
+
+    def start_recording(self):
+        self.recorder = TraceRecorder(("capture_ts", "callback_ts", "cursor"))
+
+    def stop_recording(self, path):
+        recorder, self.recorder = self.recorder, None
+        if recorder and len(recorder) > 0:
+            recorder.save(path)
+
+    def apply_config(self, config):
+        """Hand a new ProfileConfig to the face stage.
+
+        Rebuilding the model (new variant or mode) must not race detect(), so
+        once the model is running the config is applied by the face stage
+        before its next frame. Before that nothing uses the model and the
+        config is applied at once.
+        """
+        self._pending_config = config
+        with self.model_lock:
+            if not self.is_initialized:
+                self._apply_pending_config()
+
+    def _apply_pending_config(self):
+        """Apply the newest posted config; the model is rebuilt only if the variant or mode changed."""
+        config, self._pending_config = self._pending_config, None
+        if config is None:
+            return
+        self.config = config
+        fp = config.face_processing
+        if not fp.frame_gate:
+            self.frame_gate = None
+        elif self.frame_gate is None:
+            self.frame_gate = FrameGate(threshold=fp.frame_gate_threshold)
+        else:
+            self.frame_gate.threshold = fp.frame_gate_threshold
+        variant = get_variant(fp.model)
+        want_live_stream = fp.mode == "LIVE_STREAM"
+        if variant != self.variant:
+            previous = (self.variant, self.model_path, self.is_live_stream_mode)
+            self.variant = variant
+            self.model_path = variant.task_path
+            self.is_live_stream_mode = want_live_stream
+            if self.is_initialized:
+                self.close()
+                if not self.initialize():
+                    # e.g. a GPU variant without a usable GPU: keep tracking on the previous model
+                    emit(FACE, MODEL_LOAD_FAILED, variant.name, previous[0].name, level=ERROR)
+                    self.variant, self.model_path, self.is_live_stream_mode = previous
+                    self.initialize()
+        elif want_live_stream != self.is_live_stream_mode:
+            if self.is_initialized:
+                self.toggle_mode()
+            else:
+                self.is_live_stream_mode = want_live_stream
 
     def set_mode_change_callback(self, callback):
         self.mode_change_callback = callback
@@ -43,7 +117,7 @@ class FaceProcessor:
         success = self.initialize()
         
         mode_name = "LIVE_STREAM" if self.is_live_stream_mode else "IMAGE"
-        print(f"Switched to {mode_name} mode - {'Success' if success else 'Failed'}")
+        emit(MODE, MODE_SWITCH, mode_name, success)
         
         if self.mode_change_callback:
             self.mode_change_callback(mode_name, success)
@@ -54,32 +128,41 @@ class FaceProcessor:
         return "LIVE_STREAM" if self.is_live_stream_mode else "IMAGE"
 
     def initialize(self):
+        with self.model_lock:
+            return self._initialize()
+
+    def _initialize(self):
         try:
+            from mediapipe.tasks import python
+            from mediapipe.tasks.python import vision
+
             with open(self.model_path, mode="rb") as f:
                 model_buffer = f.read()
             
-            base_options = python.BaseOptions(model_asset_buffer=model_buffer)
+            variant = self.variant
+            delegate = python.BaseOptions.Delegate.GPU if variant.delegate == "GPU" else python.BaseOptions.Delegate.CPU
+            base_options = python.BaseOptions(model_asset_buffer=model_buffer, delegate=delegate)
             if self.is_live_stream_mode:
                 options = vision.FaceLandmarkerOptions(
                     base_options=base_options,
-                    output_face_blendshapes=True,
-                    output_facial_transformation_matrixes=False,
+                    output_face_blendshapes=variant.blendshapes,
+                    output_facial_transformation_matrixes=variant.matrices,
                     running_mode=mp.tasks.vision.RunningMode.LIVE_STREAM,
-                    num_faces=1,
+                    num_faces=variant.num_faces,
                     result_callback=self.mp_callback
                 )
             else:
                 options = vision.FaceLandmarkerOptions(
                     base_options=base_options,
-                    output_face_blendshapes=True,
-                    output_facial_transformation_matrixes=False,
+                    output_face_blendshapes=variant.blendshapes,
+                    output_facial_transformation_matrixes=variant.matrices,
                     running_mode=mp.tasks.vision.RunningMode.IMAGE,
-                    num_faces=1
+                    num_faces=variant.num_faces
                 )
             
             self.model = vision.FaceLandmarker.create_from_options(options)
             self.is_initialized = True
-            print("FaceProcessor Initialized Successfully")
+            print(f"FaceProcessor Initialized Successfully ({variant.name})")
             return True
 
         except Exception as e:
@@ -87,57 +170,118 @@ class FaceProcessor:
             self.is_initialized = False
             return False
 
-    def mp_callback(self, mp_result, output_image, timestamp_ms):
+    def _store_result(self, result):
         with self.lock:
-            self.result = mp_result
-        self.new_result()
+            self.result = result
+        gate = self.frame_gate
+        if gate is not None:
+            gate.set_roi_from_landmarks(result.face_landmarks[0] if result.face_landmarks else None)
 
+    def mp_callback(self, mp_result, output_image, timestamp_ms):
+        thread = threading.current_thread()
+        if thread.name != "mediapipe-callback":
+            # MediaPipe's own thread; name it so profiles and thread CPU metrics can tell it apart
+            thread.name = "mediapipe-callback"
+        self._store_result(mp_result)
+        # timestamp_ms is the capture time we passed to detect_async
+        capture_time = timestamp_ms / 1000.0
+        now = time.perf_counter()
+        latency = now - capture_time
+        # Frames MediaPipe dropped never get a callback; skip past them
+        while self._submitted:
+            ts, submitted = self._submitted.popleft()
+            if ts == timestamp_ms:
+                if self.governor:
+                    self.governor.record_inference_cost(now - submitted)
+                break
+            if ts > timestamp_ms:
+                self._submitted.appendleft((ts, submitted))
+                break
+        INFERENCES.inc()
+        INFERENCE_LATENCY.observe(latency)
+        self.new_result(capture_time)
+
+
+    def new_result(self, capture_time=None, reused=False):
+        """Deliver the current result; ``reused`` results (frame gate) skip the mouse and the trace.
 
-    def new_result(self):
+        The mouse filter and velocity update would take a reused cursor as a
+        new sample that did not move, so only gestures get it again.
+        """
         try:
-            self.cursor = self.get_cursor()
-            if self.landmark_call_back and len(self.cursor) > 0 and self.result:
-                blendshape = [b.score for b in self.result.face_blendshapes[0]]
-                self.landmark_call_back(self.cursor, blendshape)
-            if self.blendshape_call_back:
-                self.blendshape_call_back(self.result.face_blendshapes[0])
+            if capture_time is None:
+                capture_time = time.perf_counter()
+            with self.delivery_lock:
+                self.cursor = self.get_cursor()
+                if self.governor:
+                    self.governor.observe(self.cursor, capture_time)
+                if self.recorder is not None and len(self.cursor) > 0 and not reused:
+                    self.recorder.append(capture_time, time.perf_counter(), self.cursor)
+                blendshapes = self.result.face_blendshapes[0] if self.result.face_blendshapes else None
+                if self.landmark_call_back and len(self.cursor) > 0 and self.result and not reused:
+                    blendshape = [b.score for b in blendshapes] if blendshapes else None
+                    self.landmark_call_back(self.cursor, blendshape, capture_time)
+                if self.blendshape_call_back:
+                    self.blendshape_call_back(blendshapes, capture_time)
         except Exception as e:
             pass
 
-    def process_frame(self, frame):
+    def process_frame(self, frame, capture_time=None):
+        """Run the model on one RGB frame; capture_time is the perf_counter() time of cap.read()."""
         try:
+            if self._pending_config is not None:
+                self._apply_pending_config()
             if not self.is_initialized or self.model is None:
                 return frame
-            mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=frame)
+            if capture_time is None:
+                capture_time = time.perf_counter()
+            if self.governor and not self.governor.should_infer(capture_time):
+                SKIPPED_GOVERNOR.inc()
+                # Keep the preview live; the previous result stays current
+                self.frame_slot.publish(frame, capture_time)
+                return frame
+            if self.frame_gate and self.result is not None and self.frame_gate.should_skip(frame):
+                # Near-duplicate of the last inferred frame: hand out the previous result again
+                SKIPPED_GATE.inc()
+                self.frame_slot.publish(frame, capture_time)
+                self.new_result(capture_time, reused=True)
+                return frame
+            input_size = self.variant.input_size
+            if input_size and (frame.shape[1], frame.shape[0]) != input_size:
+                model_input = cv2.resize(frame, input_size, interpolation=cv2.INTER_AREA)
+            else:
+                model_input = frame
+            mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=model_input)
 
             if self.is_live_stream_mode:
-                timestamp_ms = int(time.time() * 1000)
+                # detect_async needs strictly increasing timestamps
+                timestamp_ms = max(int(capture_time * 1000), self.last_timestamp_ms + 1)
+                self.last_timestamp_ms = timestamp_ms
+                # The model runs on MediaPipe's threads; mp_callback times it from here
+                self._submitted.append((timestamp_ms, time.perf_counter()))
                 self.model.detect_async(mp_image, timestamp_ms)
-                
-                process_frame = frame.copy()
-                self.processed_frame = process_frame
-                return process_frame
+                self.frame_slot.publish(frame, capture_time)
+                return frame
             else:
+                start = time.perf_counter()
                 detection_result = self.model.detect(mp_image)
+                if self.governor:
+                    self.governor.record_inference_cost(time.perf_counter() - start)
+                INFERENCES.inc()
+                INFERENCE_LATENCY.observe(time.perf_counter() - capture_time)
 
-                with self.lock:
-                    self.result = detection_result
-
-                self.new_result()
-                
-                process_frame = frame.copy()
-                self.processed_frame = process_frame
+                self._store_result(detection_result)
 
-                return process_frame
+                self.new_result(capture_time)
+                self.frame_slot.publish(frame, capture_time)
+                return frame
         except Exception as e:
-            print(f"Lỗi xử lý frame: {e}")
+            emit(FACE, PROCESS_FRAME_ERROR, repr(e), level=ERROR)
             return frame
 
     def get_processed_frame(self):
-        with self.lock:
-            if self.processed_frame is not None:
-                return self.processed_frame
-        return None
+        """Latest processed frame, by reference: read-only, the camera ring reuses it a few frames later."""
+        return self.frame_slot.latest.data
 
     def get_cursor(self):
         with self.lock:
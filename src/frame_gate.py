@@ -0,0 +1,88 @@
+import time
+
+from src.lazy_import import lazy_import
+
+cv2 = lazy_import("cv2")
+
+# Forehead, chin, cheeks: enough to bound the face without touching all 478 landmarks
+ROI_LANDMARKS = (10, 152, 234, 454)
+
+
+class FrameGate:
+    """Skips inference on frames that barely differ from the last inferred one.
+
+    The face region of each frame (bounding box of the last landmarks plus a
+    margin) is shrunk to a ``size`` x ``size`` grayscale thumbnail and compared
+    with the thumbnail of the last frame that went through the model. If the
+    mean absolute difference is below ``threshold`` (0-255 gray levels) the
+    caller reuses the previous result. At most ``max_reuse`` frames in a row
+    are skipped so the landmarks never go stale for long.
+    """
+
+    def __init__(self, threshold=2.0, size=32, margin=0.15, max_reuse=6):
+        self.threshold = float(threshold)
+        self.size = int(size)
+        self.margin = float(margin)
+        self.max_reuse = int(max_reuse)
+        self.roi = None
+        self.reference = None
+        self.reuse_count = 0
+        self.frames_checked = 0
+        self.frames_skipped = 0
+        self.last_diff = 0.0
+        self.gate_cost = 0.0
+
+    def reset(self):
+        self.roi = None
+        self.reference = None
+        self.reuse_count = 0
+
+    def set_roi_from_landmarks(self, landmarks):
+        """Use the normalized bounding box of a face's landmarks, or clear the ROI if there is no face."""
+        if not landmarks:
+            self.roi = None
+            return
+        xs = [landmarks[i].x for i in ROI_LANDMARKS]
+        ys = [landmarks[i].y for i in ROI_LANDMARKS]
+        mx = (max(xs) - min(xs)) * self.margin
+        my = (max(ys) - min(ys)) * self.margin
+        self.roi = (min(xs) - mx, min(ys) - my, max(xs) + mx, max(ys) + my)
+
+    def _thumbnail(self, frame):
+        h, w = frame.shape[:2]
+        x0, y0, x1, y1 = self.roi
+        x0, x1 = max(0, int(x0 * w)), min(w, int(x1 * w))
+        y0, y1 = max(0, int(y0 * h)), min(h, int(y1 * h))
+        if x1 - x0 < 2 or y1 - y0 < 2:
+            return None
+        # Green channel is a close, cheaper stand-in for luminance
+        crop = frame[y0:y1, x0:x1, 1]
+        return cv2.resize(crop, (self.size, self.size), interpolation=cv2.INTER_AREA)
+
+    def should_skip(self, frame):
+        """Return True if ``frame`` can reuse the previous result; otherwise it becomes the reference."""
+        start = time.perf_counter()
+        self.frames_checked += 1
+        thumb = self._thumbnail(frame) if self.roi is not None else None
+        skip = False
+        if thumb is not None and self.reference is not None and self.reuse_count < self.max_reuse:
+            self.last_diff = float(cv2.absdiff(thumb, self.reference).mean())
+            skip = self.last_diff < self.threshold
+
+        if skip:
+            self.reuse_count += 1
+            self.frames_skipped += 1
+        else:
+            self.reference = thumb
+            self.reuse_count = 0
+        self.gate_cost += 0.05 * (time.perf_counter() - start - self.gate_cost)
+        return skip
+
+    def metrics(self):
+        return {
+            "frames_checked": self.frames_checked,
+            "frames_skipped": self.frames_skipped,
+            "skip_ratio": self.frames_skipped / self.frames_checked if self.frames_checked else 0.0,
+            "last_diff": self.last_diff,
+            "gate_cost_ms": self.gate_cost * 1000,
+        }
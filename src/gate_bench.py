@@ -0,0 +1,110 @@
+"""Benchmark the frame-difference gate on a recorded clip.
+
+Runs the face model in IMAGE mode over every frame of a video file, once
+without the gate and once per threshold, and reports model calls, CPU time
+per frame, capture-to-callback latency, and how far the cursor drifts from
+the ungated run. Every frame is compared; a frame with no result holds the
+previous cursor, as the mouse does::
+
+    python -m src.gate_bench clip.mp4 --thresholds 1 2 4
+"""
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from src.face_processor import FaceProcessor
+from src.frame_gate import FrameGate
+
+
+def load_clip(path, limit=None):
+    cap = cv2.VideoCapture(path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    frames = []
+    while limit is None or len(frames) < limit:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+    cap.release()
+    return frames, fps
+
+
+def run(frames, fps, model_path, threshold=None):
+    cursors = [None] * len(frames)
+    latencies = []
+    state = {"i": 0, "start": 0.0}
+
+    def on_result(blendshapes, capture_time):
+        # Fires for inferred and gate-reused results alike; the landmark callback skips reused ones
+        if len(fp.cursor) > 0:
+            cursors[state["i"]] = np.array(fp.cursor)
+        latencies.append(time.perf_counter() - state["start"])
+
+    fp = FaceProcessor(model_path=model_path, blendshape_call_back=on_result)
+    fp.is_live_stream_mode = False
+    if not fp.initialize():
+        raise SystemExit("Could not load the face model")
+    if threshold is not None:
+        fp.frame_gate = FrameGate(threshold=threshold)
+
+    cpu = 0.0
+    for i, frame in enumerate(frames):
+        state["i"] = i
+        state["start"] = time.perf_counter()
+        cpu_start = time.process_time()
+        fp.process_frame(frame, i / fps)
+        cpu += time.process_time() - cpu_start
+    fp.close()
+
+    for i in range(1, len(cursors)):
+        if cursors[i] is None:
+            cursors[i] = cursors[i - 1]
+
+    gate = fp.frame_gate
+    return {
+        "threshold": threshold,
+        "model_calls": len(frames) - (gate.frames_skipped if gate else 0),
+        "cpu_ms_per_frame": cpu / len(frames) * 1000,
+        "latency_ms_p50": float(np.percentile(latencies, 50) * 1000) if latencies else 0.0,
+        "latency_ms_p95": float(np.percentile(latencies, 95) * 1000) if latencies else 0.0,
+        "cursors": cursors,
+    }
+
+
+def cursor_deviation(reference, cursors):
+    diffs = [np.hypot(*(c - r)) for r, c in zip(reference, cursors) if r is not None and c is not None]
+    if not diffs:
+        return 0.0, 0.0
+    return float(np.mean(diffs)), float(np.percentile(diffs, 95))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("clip", help="video file recorded from the webcam")
+    parser.add_argument("--model", default="src/tasks/face_landmarker.task")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[1.0, 2.0, 4.0])
+    parser.add_argument("--limit", type=int, default=None, help="only use the first N frames")
+    args = parser.parse_args()
+
+    frames, fps = load_clip(args.clip, args.limit)
+    if not frames:
+        raise SystemExit(f"No frames read from {args.clip}")
+    print(f"{len(frames)} frames at {fps:.1f} fps")
+
+    baseline = run(frames, fps, args.model)
+    results = [baseline] + [run(frames, fps, args.model, t) for t in args.thresholds]
+    print(f"{'threshold':>9} {'calls':>6} {'cpu/frame':>10} {'cpu saved':>9} "
+          f"{'lat p50':>8} {'lat p95':>8} {'dev mean':>9} {'dev p95':>8}")
+    for r in results:
+        dev_mean, dev_p95 = cursor_deviation(baseline["cursors"], r["cursors"])
+        saved = 100.0 * (1 - r["cpu_ms_per_frame"] / baseline["cpu_ms_per_frame"])
+        label = "off" if r["threshold"] is None else f"{r['threshold']:g}"
+        print(f"{label:>9} {r['model_calls']:6d} {r['cpu_ms_per_frame']:8.2f}ms {saved:8.1f}% "
+              f"{r['latency_ms_p50']:6.2f}ms {r['latency_ms_p95']:6.2f}ms "
+              f"{dev_mean:7.2f}px {dev_p95:6.2f}px")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+import numpy as np
+
+from src.blendshape_history import BLENDSHAPE_INDEX
+
+MAX_ATOMS = 63
+# Seconds before the same gesture may fire again, like the single press bindings
+DEFAULT_COOLDOWN = 1.0
+
+
+class GestureMatcher:
+    """Chord and sequence gestures compiled into a single finite-state matcher.
+
+    Composite bindings live next to the single-blendshape ones in the profile's
+    ``blendshape_bindings``::
+
+        {"chord": ["jawOpen", "browInnerUp"], "action": "key_enter", "threshold": 0.5}
+        {"sequence": ["mouthLeft", "mouthRight"], "within_ms": 600, "action": "key_tab"}
+
+    Elements may also be ``{"blendshape": name, "threshold": t}``. Every distinct
+    (blendshape, threshold) pair becomes one bit of the per-frame active vector.
+    Chords fire when a new bit makes the held chord bits exactly a declared
+    chord, so releasing one part of a larger chord does not fire a smaller one.
+    Sequences run on rising edges through an Aho-Corasick automaton whose
+    transition table is precomputed, so the per-frame cost only depends on the
+    number of bits that changed, not on the number of gestures. A binding's
+    optional ``cooldown`` (seconds, default 1) limits how often it fires.
+    """
+
+    def __init__(self, atom_channels, atom_thresholds, chords, chord_bits,
+                 transitions, outputs, timeouts):
+        self.atom_channels = np.asarray(atom_channels, dtype=np.intp)
+        self.atom_thresholds = np.asarray(atom_thresholds, dtype=np.float32)
+        self.atom_weights = np.left_shift(1, np.arange(len(atom_channels), dtype=np.int64))
+        self.chords = chords
+        self.chord_bits = chord_bits
+        self.transitions = transitions
+        self.outputs = outputs
+        self.timeouts = timeouts
+        self.reset()
+
+    def reset(self):
+        self.prev_mask = 0
+        self.state = 0
+        self.last_step_time = 0.0
+        self.last_fired = {}
+
+    @staticmethod
+    def is_composite(binding):
+        return "chord" in binding or "sequence" in binding
+
+    @classmethod
+    def compile(cls, bindings, default_threshold=0.5):
+        """Build a matcher from the composite bindings in a list, or return None if there are none."""
+        atoms = {}
+
+        def atom_of(element, binding):
+            if isinstance(element, dict):
+                name = element.get("blendshape")
+                threshold = element.get("threshold", binding.get("threshold", default_threshold))
+            else:
+                name = element
+                threshold = binding.get("threshold", default_threshold)
+            if name not in BLENDSHAPE_INDEX:
+                raise ValueError(f"Unknown blendshape '{name}' in gesture binding")
+            key = (name, float(threshold))
+            if key not in atoms:
+                if len(atoms) >= MAX_ATOMS:
+                    raise ValueError(f"Too many distinct gesture elements (max {MAX_ATOMS})")
+                atoms[key] = len(atoms)
+            return atoms[key]
+
+        chords = {}
+        sequences = []
+        for binding in bindings:
+            if "chord" in binding:
+                bits = [atom_of(e, binding) for e in binding["chord"]]
+                if len(bits) < 2:
+                    raise ValueError("A chord needs at least two blendshapes")
+                mask = 0
+                for bit in bits:
+                    mask |= 1 << bit
+                if mask in chords:
+                    raise ValueError(f"Duplicate chord {binding['chord']}")
+                chords[mask] = binding
+            elif "sequence" in binding:
+                symbols = [atom_of(e, binding) for e in binding["sequence"]]
+                if len(symbols) < 2:
+                    raise ValueError("A sequence needs at least two steps")
+                sequences.append((symbols, binding.get("within_ms", 800) / 1000.0, binding))
+
+        if not chords and not sequences:
+            return None
+
+        chord_bits = 0
+        for mask in chords:
+            chord_bits |= mask
+
+        transitions, outputs, timeouts = cls._build_automaton(sequences)
+        ordered = sorted(atoms, key=atoms.get)
+        return cls(
+            [BLENDSHAPE_INDEX[name] for name, _ in ordered],
+            [threshold for _, threshold in ordered],
+            chords, chord_bits, transitions, outputs, timeouts,
+        )
+
+    @staticmethod
+    def _build_automaton(sequences):
+        goto = [{}]
+        outputs = [[]]
+        timeouts = [0.0]
+        for symbols, within, binding in sequences:
+            state = 0
+            for symbol in symbols:
+                if symbol not in goto[state]:
+                    goto.append({})
+                    outputs.append([])
+                    timeouts.append(0.0)
+                    goto[state][symbol] = len(goto) - 1
+                state = goto[state][symbol]
+                timeouts[state] = max(timeouts[state], within)
+            outputs[state].append(binding)
+
+        alphabet = {symbol for symbols, _, _ in sequences for symbol in symbols}
+        fail = [0] * len(goto)
+        transitions = [dict() for _ in goto]
+        order = list(goto[0].values())
+        for symbol in alphabet:
+            transitions[0][symbol] = goto[0].get(symbol, 0)
+
+        i = 0
+        while i < len(order):
+            state = order[i]
+            i += 1
+            outputs[state] = outputs[state] + outputs[fail[state]]
+            for symbol in alphabet:
+                child = goto[state].get(symbol)
+                if child is not None:
+                    fail[child] = transitions[fail[state]][symbol]
+                    transitions[state][symbol] = child
+                    order.append(child)
+                else:
+                    transitions[state][symbol] = transitions[fail[state]][symbol]
+        return transitions, outputs, timeouts
+
+    def step(self, scores, now):
+        """Advance on one frame of blendshape scores; return the bindings that fired."""
+        active = scores[self.atom_channels] >= self.atom_thresholds
+        mask = int(self.atom_weights[active].sum())
+        prev_mask, self.prev_mask = self.prev_mask, mask
+        if mask == prev_mask:
+            return []
+
+        fired = []
+        chord_mask = mask & self.chord_bits
+        if chord_mask & ~prev_mask and chord_mask in self.chords:
+            fired.append(self.chords[chord_mask])
+
+        rising = mask & ~prev_mask
+        while rising:
+            bit = rising & -rising
+            rising ^= bit
+            symbol = bit.bit_length() - 1
+            if self.state and now - self.last_step_time > self.timeouts[self.state]:
+                self.state = 0
+            next_state = self.transitions[self.state].get(symbol)
+            if next_state is None:
+                continue
+            self.state = next_state
+            self.last_step_time = now
+            fired.extend(self.outputs[next_state])
+        return [binding for binding in fired if self._ready(binding, now)]
+
+    def _ready(self, binding, now):
+        key = id(binding)
+        if now - self.last_fired.get(key, float("-inf")) < binding.get("cooldown", DEFAULT_COOLDOWN):
+            return False
+        self.last_fired[key] = now
+        return True
+
+
+def gesture_label(binding):
+    if "chord" in binding:
+        return "+".join(_element_name(e) for e in binding["chord"])
+    return ">".join(_element_name(e) for e in binding.get("sequence", []))
+
+
+def _element_name(element):
+    return element.get("blendshape", "?") if isinstance(element, dict) else element
@@ -0,0 +1,79 @@
+from collections import deque
+
+
+class OnsetDetector:
+    """Fires a press binding before its score reaches the threshold.
+
+    The score's value, slope and curvature (from ``BlendshapeHistory.poly_features``)
+    are extrapolated ``horizon`` seconds ahead; if the prediction reaches the
+    threshold the detector fires early. An early fire that is not followed by a
+    real threshold crossing within ``confirm_time`` counts as a false trigger,
+    and once ``fp_budget`` false triggers happened inside ``budget_period`` the
+    detector stops predicting until the oldest one expires.
+    """
+
+    def __init__(self, horizon=0.06, min_slope=1.5, min_fraction=0.4,
+                 fp_budget=2, budget_period=60.0, confirm_time=0.25):
+        if horizon <= 0:
+            raise ValueError("horizon should be >0")
+        self.horizon = float(horizon)
+        self.min_slope = float(min_slope)
+        self.min_fraction = float(min_fraction)
+        self.fp_budget = int(fp_budget)
+        self.budget_period = float(budget_period)
+        self.confirm_time = float(confirm_time)
+
+        self.pending_since = None
+        self.false_triggers = deque()
+        self.early_fires = 0
+        self.confirmed_fires = 0
+        self.false_trigger_count = 0
+
+    @classmethod
+    def from_binding(cls, binding):
+        """Build a detector from a binding's optional ``onset`` dict, or return None."""
+        onset = binding.get("onset")
+        if onset is True:
+            onset = {}
+        if not isinstance(onset, dict) or binding.get("mode", "hold") != "press" or not onset.get("enabled", True):
+            return None
+        return cls(
+            horizon=onset.get("horizon_ms", 60) / 1000.0,
+            min_slope=onset.get("min_slope", 1.5),
+            min_fraction=onset.get("min_fraction", 0.4),
+            fp_budget=onset.get("fp_budget", 2),
+            budget_period=onset.get("budget_period_s", 60.0),
+            confirm_time=onset.get("confirm_ms", 250) / 1000.0,
+        )
+
+    def is_suppressed(self, now):
+        while self.false_triggers and now - self.false_triggers[0] > self.budget_period:
+            self.false_triggers.popleft()
+        return len(self.false_triggers) >= self.fp_budget
+
+    def update(self, value, slope, curvature, threshold, now, ready=True):
+        """Feed one frame; return True if the binding should fire early on this frame."""
+        if self.pending_since is not None:
+            if value >= threshold:
+                self.pending_since = None
+                self.confirmed_fires += 1
+            elif now - self.pending_since > self.confirm_time:
+                self.pending_since = None
+                self.false_triggers.append(now)
+                self.false_trigger_count += 1
+            else:
+                return False
+
+        if value >= threshold or not ready or self.is_suppressed(now):
+            return False
+        if value < self.min_fraction * threshold or slope < self.min_slope:
+            return False
+
+        h = self.horizon
+        predicted = value + slope * h + 0.5 * curvature * h * h
+        if predicted < threshold:
+            return False
+
+        self.pending_since = now
+        self.early_fires += 1
+        return True
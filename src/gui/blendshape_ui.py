@@ -4,6 +4,9 @@ from PIL import Image, ImageTk
 import os
 import sys
 from src.gui.submenu import SubmenuDropdown
+from src.gesture_matcher import GestureMatcher, gesture_label
+from src.blendshape_history import BLENDSHAPE_INDEX
+from src.gui.tick_scheduler import DisplayValue
 
 class BlendshapeSettingsUI(ctk.CTkFrame):
     def __init__(self, parent, blendshape_processor, profile_manager, current_settings):
@@ -21,11 +24,20 @@ class BlendshapeSettingsUI(ctk.CTkFrame):
         self.threshold_labels = {}
         self.blendshape_bars = {}
         self.blendshape_value_labels = {}
+        self.bar_displays = {}
+        self.last_snapshot_seq = -1
+        self.pipeline = None
+        # Binding edits are collected and applied as one config swap after this delay
+        self.settings_delay_ms = 100
+        self._pending_bindings = None
+        self._pending_job = None
 
+        # update_bars is driven by MainWindow's tick scheduler
         self._create_blendshape_ui()
-
-        self.update_bars()
     
+    def set_pipeline(self, pipeline):
+        self.pipeline = pipeline
+
     def _create_blendshape_ui(self):
         # Button to add binding
         add_btn = ctk.CTkButton(self, text="Add Binding", command=self._add_binding)
@@ -34,17 +46,25 @@ class BlendshapeSettingsUI(ctk.CTkFrame):
         # Bindings section
         self._load_bindings()
     
-    def update_bars(self):
-        for blendshape_name, progress_bar in self.blendshape_bars.items():
-            current_value = self.blendshape_processor.get_blendshape_value(blendshape_name)
-            
-            if progress_bar:
-                progress_bar.set(current_value)
-            
-            if blendshape_name in self.blendshape_value_labels:
-                self.blendshape_value_labels[blendshape_name].configure(text=f"{current_value:.2f}")
-        
-        self.after(33, self.update_bars)
+    def update_bars(self, gui_snapshot):
+        snapshot = gui_snapshot.blendshapes
+        if snapshot.seq == self.last_snapshot_seq:
+            return
+        self.last_snapshot_seq = snapshot.seq
+        for blendshape_name in self.blendshape_bars:
+            display = self.bar_displays.get(blendshape_name)
+            if display is None:
+                display = DisplayValue(lambda value, name=blendshape_name: self._show_bar_value(name, value))
+                self.bar_displays[blendshape_name] = display
+            index = BLENDSHAPE_INDEX.get(blendshape_name)
+            display.set(float(snapshot.data[index]) if index is not None else 0.0)
+
+    def _show_bar_value(self, blendshape_name, value):
+        progress_bar = self.blendshape_bars.get(blendshape_name)
+        if progress_bar:
+            progress_bar.set(value)
+        if blendshape_name in self.blendshape_value_labels:
+            self.blendshape_value_labels[blendshape_name].configure(text=f"{value:.2f}")
 
     def _update_threshold(self, value):
         value = float(value)
@@ -61,7 +81,9 @@ class BlendshapeSettingsUI(ctk.CTkFrame):
         bindings_label = ctk.CTkLabel(self.bindings_frame, text="Bindings:")
         bindings_label.pack(anchor="w", padx=10, pady=5)
         
-        bindings = self.blendshape_processor.bindings
+        current = self._current_bindings()
+        bindings = [b for b in current if not GestureMatcher.is_composite(b)]
+        gestures = [b for b in current if GestureMatcher.is_composite(b)]
         
         self.blendshape_vars = {}
         self.action_vars = {}
@@ -70,6 +92,14 @@ class BlendshapeSettingsUI(ctk.CTkFrame):
         
         self.blendshape_bars = {}
         self.blendshape_value_labels = {}
+        self.bar_displays = {}
+        self.last_snapshot_seq = -1
+
+        if gestures:
+            gestures_text = ", ".join(f"{gesture_label(g)} -> {g.get('action')}" for g in gestures)
+            gestures_label = ctk.CTkLabel(self.bindings_frame, text=f"Gestures: {gestures_text}",
+                                          text_color="gray", wraplength=360, justify="left")
+            gestures_label.pack(anchor="w", padx=10, pady=(0, 5))
 
         if not bindings:
             no_bindings = ctk.CTkLabel(self.bindings_frame, text="No bindings defined", text_color="gray")
@@ -181,6 +211,7 @@ class BlendshapeSettingsUI(ctk.CTkFrame):
                 delete_btn.pack(side="right", padx=5, pady=2)
 
     def _update_blendshape(self, index, old_blendshape, new_blendshape):
+        self._flush_bindings()
         for binding in self.blendshape_processor.bindings:
             if binding.get("blendshape") == old_blendshape:
                 action = binding.get("action")
@@ -194,11 +225,7 @@ class BlendshapeSettingsUI(ctk.CTkFrame):
                 break
 
     def _update_action(self, index, blendshape, new_action):
-        for binding in self.blendshape_processor.bindings:
-            if binding.get("blendshape") == blendshape:
-                binding["action"] = new_action
-                self.blendshape_processor.save_to_profile()
-                break
+        self._queue_binding_change(blendshape, action=new_action)
 
     def _update_threshold_label(self, value, label, blendshape):
         value = float(value)
@@ -206,37 +233,61 @@ class BlendshapeSettingsUI(ctk.CTkFrame):
         self._update_blendshape_threshold(blendshape, value)
 
     def _delete_binding(self, blendshape):
+        self._flush_bindings()
         self.blendshape_processor.remove_binding(blendshape)
         self._load_bindings()
 
     def _update_blendshape_threshold(self, blendshape, value):
-        value = float(value)
-        
-        for binding in self.blendshape_processor.bindings:
-            if binding.get("blendshape") == blendshape:
-                binding["threshold"] = value
-                break
-        
-        self.blendshape_processor.save_to_profile()
+        self._queue_binding_change(blendshape, threshold=float(value))
 
     def _toggle_mode(self, blendshape):
-        for binding in self.blendshape_processor.bindings:
+        for binding in self._current_bindings():
             if binding.get("blendshape") == blendshape:
                 current_mode = binding.get("mode", "hold")
                 new_mode = "press" if current_mode == "hold" else "hold"
-                binding["mode"] = new_mode
-                self.blendshape_processor.save_to_profile()
+                self._queue_binding_change(blendshape, mode=new_mode)
                 print(f"Mode toggled: {blendshape} -> {new_mode}")
                 self._load_bindings() 
                 break
 
+    def _current_bindings(self):
+        """Bindings as shown: queued edits that are not applied yet included."""
+        if self._pending_bindings is not None:
+            return self._pending_bindings
+        return self.blendshape_processor.bindings
+
+    def _queue_binding_change(self, blendshape, **changes):
+        """Queue an edit to one binding; queued edits are validated, saved and applied together."""
+        if self._pending_bindings is None:
+            self._pending_bindings = [dict(b) for b in self.blendshape_processor.bindings]
+        for binding in self._pending_bindings:
+            if binding.get("blendshape") == blendshape:
+                binding.update(changes)
+                break
+        if self._pending_job is None:
+            self._pending_job = self.after(self.settings_delay_ms, self._flush_bindings)
+
+    def _flush_bindings(self):
+        if self._pending_job is not None:
+            self.after_cancel(self._pending_job)
+            self._pending_job = None
+        bindings, self._pending_bindings = self._pending_bindings, None
+        if bindings is None or not self.pipeline:
+            return
+        try:
+            self.pipeline.update_settings({"blendshape_bindings": {"bindings": bindings}})
+        except ValueError as e:
+            print(f"Invalid binding, not saved: {e}")
+            self._load_bindings()
+
     def _add_binding(self):
         self._show_binding_dialog()
     
     def _edit_binding(self, blendshape_name):
         binding = None
+        # Composite/sequence bindings have no "blendshape" key and are not edited here
         for b in self.blendshape_processor.bindings:
-            if b["blendshape"] == blendshape_name:
+            if b.get("blendshape") == blendshape_name:
                 binding = b
                 break
                 
@@ -355,7 +406,8 @@ class BlendshapeSettingsUI(ctk.CTkFrame):
             
             if not blendshape or not action:
                 return
-                
+
+            self._flush_bindings()
             if binding:
                 self.blendshape_processor.remove_binding(binding["blendshape"])
                 
@@ -373,6 +425,7 @@ class BlendshapeSettingsUI(ctk.CTkFrame):
         
         if binding:
             def delete_binding():
+                self._flush_bindings()
                 self.blendshape_processor.remove_binding(binding["blendshape"])
                 self._load_bindings()
                 dialog.destroy()
@@ -1,13 +1,15 @@
+import threading
 import tkinter as tk
 import customtkinter as ctk
-import PIL.Image, PIL.ImageTk
-import cv2
 from src.pipeline import Pipeline
+from src.blendshape_history import BLENDSHAPE_INDEX
 from src.gui.profile_manager_ui import ProfileManagerUI
 from src.gui.mouse_settings_ui import MouseSettingsUI
 from src.gui.blendshape_ui import BlendshapeSettingsUI
 
 from src.gui.overlay import Overlay
+from src.gui.preview_renderer import PreviewRenderer
+from src.gui.tick_scheduler import TickScheduler, GuiSnapshot, DisplayValue
 
 class MainWindow(ctk.CTk):
     def __init__(self):
@@ -29,18 +31,33 @@ class MainWindow(ctk.CTk):
         self.ovl = Overlay(self.mouse_controller)
 
         self.blendshape_options = {
-            "browInnerUp": {"name": "browInnerUp", "index": 3},
-            "jawOpen": {"name": "jawOpen", "index": 25},
-            "mouthSmileLeft": {"name": "mouthSmileLeft", "index": 44},
-            "mouthRollUpper": {"name": "mouthRollUpper", "index": 40},
-            "mouthFunnel": {"name": "mouthFunnel", "index": 36},
-            "mouthLeft": {"name": "mouthLeft", "index": 48},
-            "mouthRight": {"name": "mouthRight", "index": 54},
+            name: {"name": name, "index": BLENDSHAPE_INDEX[name]}
+            for name in ("browInnerUp", "jawOpen", "mouthSmileLeft", "mouthRollUpper",
+                         "mouthFunnel", "mouthLeft", "mouthRight")
         }
+        # Threshold slider ticks are applied as one config swap after this delay
+        self.settings_delay_ms = 100
+        self._threshold_job = None
         self._create_main_layout()
         
-        self.update_interval = 10
-        self.update_frame()
+        self.preview_fps = 30
+        self.preview_renderer = PreviewRenderer(self, self.canvas, self.pipeline.get_preview(), self.preview_fps)
+
+        # One tick per display frame for every live widget, all reading the same snapshot
+        # Slower while the window is minimized/covered; 20 Hz still catches the
+        # overlay's 100 ms typing warning
+        self.scheduler = TickScheduler(self, self._gui_snapshot, fps=60, idle_fps=20,
+                                       is_idle=lambda: self.preview_renderer.paused)
+        self.scheduler.register("preview", lambda s: self.preview_renderer.update(s.time, s.preview))
+        self.scheduler.register("overlay", lambda s: self.ovl.update_once())
+        self.scheduler.register("state_blendshape", self.update_blendshape_display)
+        self.scheduler.register("blendshape_bars", self.blendshape_settings.update_bars)
+        self.scheduler.register("profiler_button", self.update_profiler_button)
+        self.scheduler.start()
+
+        # Profile files edited outside the app: the stages already run the new
+        # config, show it in the widgets too (on the Tk thread)
+        self.pipeline.profile_watcher.subscribe(self._on_external_reload)
     
     def _create_main_layout(self):
         # Main container
@@ -80,6 +97,26 @@ class MainWindow(ctk.CTk):
             height=30
         )
         self.mouse_button.grid(row=0, column=0, padx=5, pady=5)
+
+        # Sampling profiler (also Ctrl+Alt+Shift+P / control socket)
+        self.profiler = self.pipeline.get_profiler()
+        self.profiler_button = ctk.CTkButton(
+            control_frame,
+            text="Profiler: OFF",
+            command=self.toggle_profiler,
+            width=150,
+            height=30
+        )
+        self.profiler_button.grid(row=1, column=0, padx=5, pady=5)
+        self._profiler_label = "Profiler: OFF"
+        self.profile_30s_button = ctk.CTkButton(
+            control_frame,
+            text="Profile 30s",
+            command=lambda: self.toggle_profiler(30),
+            width=150,
+            height=30
+        )
+        self.profile_30s_button.grid(row=1, column=1, padx=5, pady=5)
         # Blendshape control button
         self.blendshape_processor.enable()
         current_blendshape = self.current_settings.get("state_machine_blendshape", {
@@ -132,39 +169,39 @@ class MainWindow(ctk.CTk):
         )
         self.blendshape_threshold_label.grid(row=1, column=1, padx=(2, 5), pady=1, sticky="w")
         
-        # Áp dụng blendshape hiện tại
-        self.apply_blendshape_to_controller(current_blendshape)
-        
-        # Bắt đầu update progress bar
-        self.update_blendshape_display()
+        # Progress bar is updated by the tick scheduler (update_blendshape_display)
+        self.blendshape_display = DisplayValue(self._show_blendshape_value)
     
-    def update_blendshape_display(self):
-        try:
-            if hasattr(self, 'blendshape_progress_bar') and hasattr(self.face_processor, 'result'):
-                result = self.face_processor.result
-                if result and result.face_blendshapes and len(result.face_blendshapes) > 0:
-                    blendshapes = result.face_blendshapes[0]
-                    current_index = self.mouse_controller.state_machine_blendshape_index
-                    
-                    if current_index < len(blendshapes):
-                        current_value = blendshapes[current_index].score
-                        self.blendshape_progress_bar.set(current_value)
-                        self.blendshape_value_label.configure(text=f"{current_value:.2f}")
-        except Exception as e:
-            pass
-        
-        # Gọi lại sau 33ms (khoảng 30fps)
-        self.after(33, self.update_blendshape_display)
+    def update_blendshape_display(self, snapshot):
+        scores = snapshot.blendshapes.data
+        if scores is not None and snapshot.mode_index < len(scores):
+            self.blendshape_display.set(float(scores[snapshot.mode_index]))
+
+    def _show_blendshape_value(self, value):
+        self.blendshape_progress_bar.set(value)
+        self.blendshape_value_label.configure(text=f"{value:.2f}")
 
     def on_threshold_change(self, value):
         """Callback khi user thay đổi threshold slider"""
         value = float(value)
         self.blendshape_threshold_label.configure(text=f"{value:.2f}")
-        self.mouse_controller.trigger_threshold = value
-        # Cập nhật vào current_settings
-        if "state_machine_blendshape" in self.current_settings:
-            self.current_settings["state_machine_blendshape"]["threshold"] = value
-            self.profile_manager.update_profile_settings(self.current_settings)
+        if self._threshold_job is None:
+            self._threshold_job = self.after(self.settings_delay_ms, self._apply_threshold)
+
+    def _apply_threshold(self):
+        self._threshold_job = None
+        self._apply_state_machine({"threshold": float(self.blendshape_threshold_var.get())})
+
+    def _apply_state_machine(self, changes):
+        """Validate, save and apply a state_machine_blendshape change; on error restore the widgets."""
+        try:
+            config = self.pipeline.update_settings({"state_machine_blendshape": changes})
+        except ValueError as e:
+            print(f"Invalid blendshape setting, not saved: {e}")
+            self.refresh_from_config(self.mouse_controller.config)
+            return False
+        self.current_settings = self.profile_manager.get_profile_settings()
+        return config
 
     def on_blendshape_change(self, display_name):
         """Callback khi user chọn blendshape khác từ dropdown"""
@@ -180,12 +217,9 @@ class MainWindow(ctk.CTk):
             "threshold": current_threshold
         }
         
-        # Lưu vào profile
-        self.current_settings["state_machine_blendshape"] = blendshape_config
-        self.profile_manager.update_profile_settings(self.current_settings)
-        
-        # Áp dụng cho controller
-        self.apply_blendshape_to_controller(blendshape_config)
+        # Kiểm tra, lưu vào profile và áp dụng cho controller
+        if not self._apply_state_machine(blendshape_config):
+            return
         
         # Reset progress bar về 0
         self.blendshape_progress_bar.set(0.0)
@@ -193,16 +227,6 @@ class MainWindow(ctk.CTk):
         
         print(f"Blendshape changed to: {display_name} (index: {selected['index']})")
 
-    def apply_blendshape_to_controller(self, blendshape_config):
-        """Áp dụng blendshape index cho mouse controller"""
-        if hasattr(self.mouse_controller, 'state_machine_blendshape_index') and hasattr(self.mouse_controller, 'trigger_threshold'):
-            self.mouse_controller.state_machine_blendshape_index = blendshape_config["index"]
-            self.mouse_controller.trigger_threshold = blendshape_config.get("threshold", 0.5)
-        else:
-            # Nếu chưa có thuộc tính, thêm vào
-            self.mouse_controller.state_machine_blendshape_index = blendshape_config["index"]
-            self.mouse_controller.trigger_threshold = blendshape_config.get("threshold", 0.5)
-
 
     def _create_right_frame(self, parent):
         right_frame = ctk.CTkFrame(parent, width=410, fg_color="transparent")
@@ -235,6 +259,7 @@ class MainWindow(ctk.CTk):
         )
         self.mouse_settings.set_face_processor(self.face_processor)
         self.mouse_settings.set_profile_manager(self.profile_manager)
+        self.mouse_settings.set_pipeline(self.pipeline)
 
         # Tab Blendshape
         tab2 = settings_frame.add("Gesture Shortcuts")
@@ -244,6 +269,7 @@ class MainWindow(ctk.CTk):
             self.profile_manager,
             self.current_settings
         )
+        self.blendshape_settings.set_pipeline(self.pipeline)
 
     
     def toggle_mouse_control(self):
@@ -258,38 +284,54 @@ class MainWindow(ctk.CTk):
 
 
     
+    def toggle_profiler(self, duration=None):
+        # stop() joins the sampler and writes the file, keep that off the Tk thread
+        if self.profiler.is_running:
+            threading.Thread(target=self.profiler.stop, daemon=True).start()
+        else:
+            self.profiler.start(duration)
+
+    def update_profiler_button(self, snapshot):
+        # The profiler is also started/stopped by the hotkey, the control socket and timed runs
+        running = self.profiler.is_running
+        remaining = self.profiler.deadline is not None and running
+        label = (f"Profiler: {max(0, int(self.profiler.deadline - snapshot.time))}s" if remaining
+                 else "Profiler: ON" if running else "Profiler: OFF")
+        if label != self._profiler_label:
+            self._profiler_label = label
+            self.profiler_button.configure(text=label)
+
     def on_profile_change(self, profile_name):
         try:
-            self.current_settings = self.profile_manager.load_profile(profile_name)
-            
-            # Update mouse settings UI
-            self.mouse_settings.update_from_profile(self.current_settings)
-            blendshape_config = self.current_settings.get("state_machine_blendshape", {
-                "name": "browInnerUp",
-                "index": 3,
-                "display": "Brow Raise",
-                "threshold": 0.5
-            })
-            self.blendshape_var.set(blendshape_config.get("display", "Brow Raise"))
-            self.blendshape_threshold_var.set(blendshape_config.get("threshold", 0.5))
-            self.blendshape_threshold_label.configure(text=f"{blendshape_config.get('threshold', 0.5):.2f}")
-            self.apply_blendshape_to_controller(blendshape_config)
-            
+            if not self.pipeline.switch_profile(profile_name):
+                return
+            self.current_settings = self.profile_manager.get_profile_settings()
+            self.refresh_from_config(self.mouse_controller.config)
+            self.blendshape_settings.update_from_profile()
                 
         except Exception as e:
             print(f"Error loading profile: {e}")
+
+    def _on_external_reload(self, config):
+        self.after(0, self._refresh_after_reload, config)
+
+    def _refresh_after_reload(self, config):
+        self.current_settings = self.profile_manager.get_profile_settings()
+        self.refresh_from_config(config)
+        self.blendshape_settings.update_from_profile()
+
+    def refresh_from_config(self, config):
+        """Show the values of the ProfileConfig the stages are running with."""
+        self.mouse_settings.update_from_config(config)
+        sm = config.state_machine_blendshape
+        self.blendshape_var.set(sm.display)
+        self.blendshape_threshold_var.set(sm.threshold)
+        self.blendshape_threshold_label.configure(text=f"{sm.threshold:.2f}")
     
-    def update_frame(self):
-        frame = self.face_processor.get_processed_frame()
-        frame = cv2.flip(frame, 1) if frame is not None else None
-        if frame is not None:
-            self.photo = PIL.ImageTk.PhotoImage(image=PIL.Image.fromarray(frame))
-            
-            self.canvas.config(width=frame.shape[1], height=frame.shape[0])
-            self.canvas.create_image(0, 0, image=self.photo, anchor=tk.NW)
-        self.after(self.update_interval, self.update_frame)
-        if hasattr(self, "ovl") and self.ovl is not None:
-            self.ovl.update_once()
+    def _gui_snapshot(self, now):
+        return GuiSnapshot(now, self.blendshape_processor.get_snapshot(),
+                           self.preview_renderer.preview.latest(),
+                           self.mouse_controller.state_machine_blendshape_index)
     
     def __del__(self):
         if hasattr(self, 'camera_thread') and self.camera_thread:
@@ -11,6 +11,11 @@ class MouseSettingsUI(ctk.CTkFrame):
         self.mouse_controller = mouse_controller
         self.face_processor = None
         self.profile_manager = None
+        self.pipeline = None
+        # Slider ticks are collected and applied as one config swap after this delay
+        self.settings_delay_ms = 100
+        self._pending = {}
+        self._pending_job = None
         
         self._create_mouse_settings_ui()
     
@@ -22,6 +27,9 @@ class MouseSettingsUI(ctk.CTkFrame):
     
     def set_profile_manager(self, profile_manager):
         self.profile_manager = profile_manager
+
+    def set_pipeline(self, pipeline):
+        self.pipeline = pipeline
     
     def _create_mouse_settings_ui(self):
         velocity_label = ctk.CTkLabel(self, text="Mouse Speed:")
@@ -73,7 +81,7 @@ class MouseSettingsUI(ctk.CTkFrame):
 
         # --- Toggle (Tracking) Switch ---
         # Mặc định lấy từ settings, nếu không có thì True
-        toggle_val = True
+        toggle_val = self.current_settings.get("mouse_controller", {}).get("toggle", True)
         self.toggle_var = ctk.BooleanVar(value=toggle_val)
         
         self.toggle_switch = ctk.CTkSwitch(
@@ -83,7 +91,7 @@ class MouseSettingsUI(ctk.CTkFrame):
             command=self.update_toggle_state
         )
         self.toggle_switch.pack(anchor="w", padx=10, pady=(5, 5))
-        accel_on = True
+        accel_on = self.current_settings.get("mouse_controller", {}).get("accel_on", True)
         self.accel_on = ctk.BooleanVar(value=accel_on)
         self.accel_switch = ctk.CTkSwitch(
             self,
@@ -92,6 +100,24 @@ class MouseSettingsUI(ctk.CTkFrame):
             command=self.update_accel_state
         )
         self.accel_switch.pack(anchor="w", padx=10, pady=(5, 5))
+        fast_init = self.current_settings.get("mouse_controller", {}).get("fast_init", False)
+        self.fast_init_var = ctk.BooleanVar(value=fast_init)
+        self.fast_init_switch = ctk.CTkSwitch(
+            self,
+            text="Fast Init",
+            variable=self.fast_init_var,
+            command=self.update_fast_init_state
+        )
+        self.fast_init_switch.pack(anchor="w", padx=10, pady=(5, 5))
+        predict = self.current_settings.get("mouse_controller", {}).get("predict", False)
+        self.predict_var = ctk.BooleanVar(value=predict)
+        self.predict_switch = ctk.CTkSwitch(
+            self,
+            text="Latency Compensation",
+            variable=self.predict_var,
+            command=self.update_predict_state
+        )
+        self.predict_switch.pack(anchor="w", padx=10, pady=(5, 5))
 
         self._update_mode_display()
     
@@ -100,56 +126,39 @@ class MouseSettingsUI(ctk.CTkFrame):
             print("Face processor not available")
             return
         
-        self.mode_toggle_btn.configure(state="disabled", text="...")
-        
-        def switch_mode():
-            success = self.face_processor.toggle_mode()
-            
-            if success:
-                new_mode = self.face_processor.get_current_mode()
-                self._save_mode_to_profile(new_mode)
-            
-            self.after(0, lambda: self._on_mode_switch_complete(success))
-        
-        import threading
-        switch_thread = threading.Thread(target=switch_mode)
-        switch_thread.start()
+        if not self.pipeline:
+            return
+        new_mode = "IMAGE" if self.face_processor.is_live_stream_mode else "LIVE_STREAM"
+        # The face stage rebuilds the model before its next frame and calls _on_mode_changed
+        try:
+            self.pipeline.update_settings({"face_processing": {"mode": new_mode}})
+        except ValueError as e:
+            print(f"Could not switch mode: {e}")
     # --- CÁC HÀM MỚI CHO TOGGLE VÀ FAST INIT ---
 
     def update_toggle_state(self):
         """Callback khi switch Toggle thay đổi"""
         value = self.toggle_var.get()
-        # Cập nhật controller
-        self.mouse_controller.toggle = value
-        # Lưu vào profile
+        # Lưu vào profile và áp dụng cho controller
         self._save_mouse_setting("toggle", value)
         print(f"Tracking toggle set to: {value}")
     def update_accel_state(self):
         """Callback khi switch Acceleration thay đổi"""
         value = self.accel_on.get()
-        # Cập nhật controller
-        self.mouse_controller.accel_on = value
-        # Lưu vào profile
+        # Lưu vào profile và áp dụng cho controller
         self._save_mouse_setting("accel_on", value)
         print(f"Acceleration set to: {value}")
     def update_fast_init_state(self):
         """Callback khi switch Fast Init thay đổi"""
         value = self.fast_init_var.get()
-        # Cập nhật controller
-        self.mouse_controller.fast_init = value
-        # Lưu vào profile
+        # Lưu vào profile và áp dụng cho controller
         self._save_mouse_setting("fast_init", value)
         print(f"Fast Init set to: {value}")
-    def _on_mode_switch_complete(self, success):
-        self.mode_toggle_btn.configure(state="normal", text="Switch")
-        
-        if success:
-            self._update_mode_display()
-            new_mode = self.face_processor.get_current_mode() if self.face_processor else "Unknown"
-            print(f"Successfully switched to {new_mode} mode")
-        else:
-            print("Failed to switch mode")
-    
+    def update_predict_state(self):
+        """Callback khi switch Latency Compensation thay đổi"""
+        value = self.predict_var.get()
+        self._save_mouse_setting("predict", value)
+        print(f"Latency compensation set to: {value}")
     def _on_mode_changed(self, mode_name, success):
         self.after(0, lambda: self._update_mode_display())
     
@@ -164,110 +173,57 @@ class MouseSettingsUI(ctk.CTkFrame):
             self.mode_description_label.configure(text="Mode: Image (Rapid)")
         
     
-    def _save_mode_to_profile(self, mode):
-        try:
-            if self.profile_manager:
-                current_profile = self.profile_manager.get_current_profile_name()
-                settings = self.profile_manager.get_profile_settings()
- 
-                if "face_processing" not in settings:
-                    settings["face_processing"] = {}
-                settings["face_processing"]["mode"] = mode
-
-                self.profile_manager.save_profile(current_profile, settings)
-                print(f"Saved processing mode '{mode}' to profile '{current_profile}'")
-                
-        except Exception as e:
-            print(f"Error saving mode to profile: {e}")
-    
     def update_velocity_scale(self, value):
         self.velocity_value.configure(text=f"{float(value):.1f}")
-        self.mouse_controller.velocity_scale = float(value)
-
         self._save_mouse_setting("velocity_scale", float(value))
 
     def update_mincutoff(self, value):
         self.mincutoff_value.configure(text=f"{float(value):.3f}")
-        self.mouse_controller.mincutoff = float(value)
-        self.mouse_controller.reset()
-
         self._save_mouse_setting("mincutoff", float(value))
     
     def update_beta(self, value):
         self.beta_value.configure(text=f"{float(value):.4f}")
-        self.mouse_controller.beta = float(value)
-        self.mouse_controller.reset()
-        
         self._save_mouse_setting("beta", float(value))
     
     
     def _save_mouse_setting(self, setting_name, value):
+        self._queue_setting("mouse_controller", setting_name, value)
+
+    def _queue_setting(self, section, setting_name, value):
+        """Queue one setting; queued changes are validated, saved and applied together."""
+        self._pending.setdefault(section, {})[setting_name] = value
+        if self._pending_job is None:
+            self._pending_job = self.after(self.settings_delay_ms, self._flush_settings)
+
+    def _flush_settings(self):
+        self._pending_job = None
+        changes, self._pending = self._pending, {}
+        if not changes or not self.pipeline:
+            return
         try:
-            if self.profile_manager:
-                current_profile = self.profile_manager.get_current_profile_name()
-                settings = self.profile_manager.get_profile_settings()
-                
-                if "mouse_controller" not in settings:
-                    settings["mouse_controller"] = {}
-                settings["mouse_controller"][setting_name] = value
-                
-                self.profile_manager.save_profile(current_profile, settings)
-                
-        except Exception as e:
-            print(f"Error saving mouse setting to profile: {e}")
+            self.pipeline.update_settings(changes)
+        except ValueError as e:
+            print(f"Invalid setting, not saved: {e}")
+            self.update_from_config(self.mouse_controller.config)
     
     def update_yaw_correct(self, value):
         self.yaw_value.configure(text=f"{float(value):.1f}")
-        # Cập nhật giá trị vào controller
-        self.face_processor.yaw_correct = float(value)
-        # Lưu vào profile
-        self._save_head_setting("yaw_correct", float(value))
+        self._queue_setting("face_processing", "yaw_correct", float(value))
 
     def update_pitch_correct(self, value):
         self.pitch_value.configure(text=f"{float(value):.1f}")
-        # Cập nhật giá trị vào controller
-        self.face_processor.pitch_correct = float(value)
-        # Lưu vào profile
-        self._save_head_setting("pitch_correct", float(value))
+        self._queue_setting("face_processing", "pitch_correct", float(value))
 
-    def _save_head_setting(self, setting_name, value):
-        try:
-            if self.profile_manager:
-                current_profile = self.profile_manager.get_current_profile_name()
-                settings = self.profile_manager.get_profile_settings()
-                
-                if "face_processing" not in settings:
-                    settings["face_processing"] = {}
-                settings["face_processing"][setting_name] = value
-                
-                self.profile_manager.save_profile(current_profile, settings)
-                
-        except Exception as e:
-            print(f"Error saving mouse setting to profile: {e}")
-
-    def update_from_profile(self, settings):
-        mc_settings = settings.get("mouse_controller", {})
-        
-        self.mincutoff_var.set(mc_settings.get("mincutoff"))
-        self.beta_var.set(mc_settings.get("beta"))
-        
-        self.mincutoff_value.configure(text=f"{float(self.mincutoff_var.get()):.3f}")
-        self.beta_value.configure(text=f"{float(self.beta_var.get()):.4f}")
-        
-        # Update processing mode nếu có
-        face_settings = settings.get("face_processing", {})
-        saved_mode = face_settings.get("mode", "LIVE_STREAM")
-        
-        if self.face_processor:
-            current_mode = self.face_processor.get_current_mode()
-            if current_mode != saved_mode:
-                # Switch to saved mode
-                print(f"Switching to saved mode: {saved_mode}")
-                if saved_mode == "LIVE_STREAM":
-                    if not self.face_processor.is_live_stream_mode:
-                        self.face_processor.toggle_mode()
-                else:
-                    if self.face_processor.is_live_stream_mode:
-                        self.face_processor.toggle_mode()
-            
-            self._update_mode_display()
\ No newline at end of file
+    def update_from_config(self, config):
+        """Show the values of a ProfileConfig (after a profile switch or an external reload)."""
+        mc = config.mouse_controller
+        self.velocity_var.set(mc.velocity_scale)
+        self.mincutoff_var.set(mc.mincutoff)
+        self.beta_var.set(mc.beta)
+        self.velocity_value.configure(text=f"{mc.velocity_scale:.1f}")
+        self.mincutoff_value.configure(text=f"{mc.mincutoff:.3f}")
+        self.beta_value.configure(text=f"{mc.beta:.4f}")
+        self.toggle_var.set(mc.toggle)
+        self.accel_on.set(mc.accel_on)
+        self.fast_init_var.set(mc.fast_init)
+        self.predict_var.set(mc.predict)
@@ -0,0 +1,107 @@
+import time
+import tkinter as tk
+
+import PIL.Image, PIL.ImageTk
+
+from src import platform_win
+
+
+class PreviewRenderer:
+    """Draws the pipeline's preview frames on one reused canvas image item.
+
+    A frame is drawn only when the preview's sequence number moved, by pasting
+    into the existing PhotoImage; a new PhotoImage is made only when the frame
+    size changes. While the window is minimized or covered by another window
+    the renderer pauses and tells the preview stage to stop producing frames.
+    """
+
+    def __init__(self, root, canvas, preview, fps=30, visibility_interval=0.5):
+        self.root = root
+        self.canvas = canvas
+        self.preview = preview
+        self.visibility_interval = visibility_interval
+        self.photo = None
+        self.item = None
+        self.size = None
+        self.seq = 0
+        self._next_draw = 0.0
+        self.paused = False
+        self.frames_drawn = 0
+        self._next_visibility_check = 0.0
+        self._hwnd = None
+        self.set_fps(fps)
+        root.bind("<Unmap>", self._on_unmap, add="+")
+        root.bind("<Map>", self._on_map, add="+")
+        self.preview.set_visible(True)
+
+    def set_fps(self, fps):
+        """Cap both the preview stage and the redraw rate (enforced in update())."""
+        self.fps = fps
+        self.preview.set_rate(fps)
+
+    def update(self, now=None, snapshot=None):
+        """Check visibility now and then, then draw the newest frame if there is one and the cap allows."""
+        now = time.perf_counter() if now is None else now
+        if now >= self._next_visibility_check:
+            self._next_visibility_check = now + self.visibility_interval
+            self.check_visibility()
+        # Ticks are not exactly aligned with the cap; allow a draw slightly early
+        if self.paused or (self.fps and now < self._next_draw - 0.002):
+            return False
+        if not self.draw(snapshot):
+            return False
+        if self.fps:
+            self._next_draw = now + 1.0 / self.fps
+        return True
+
+    def draw(self, snapshot=None):
+        if snapshot is None:
+            snapshot = self.preview.latest()
+        if snapshot.seq == self.seq or snapshot.data is None:
+            return False
+        self.seq = snapshot.seq
+        image = PIL.Image.fromarray(snapshot.data)
+        if self.photo is None or image.size != self.size:
+            self.photo = PIL.ImageTk.PhotoImage(image=image)
+            self.size = image.size
+            self.canvas.config(width=image.size[0], height=image.size[1])
+            if self.item is None:
+                self.item = self.canvas.create_image(0, 0, image=self.photo, anchor=tk.NW)
+            else:
+                self.canvas.itemconfigure(self.item, image=self.photo)
+        else:
+            self.photo.paste(image)
+        self.frames_drawn += 1
+        return True
+
+    def check_visibility(self):
+        try:
+            visible = (self.root.state() != "iconic" and bool(self.root.winfo_viewable())
+                       and not platform_win.is_window_covered(self._window_handle()))
+        except tk.TclError:
+            visible = False
+        self.set_paused(not visible)
+
+    def set_paused(self, paused):
+        if paused != self.paused:
+            self.paused = paused
+            self.preview.set_visible(not paused)
+
+    def _window_handle(self):
+        if self._hwnd is None:
+            try:
+                self._hwnd = int(self.root.wm_frame(), 16)
+            except (tk.TclError, ValueError):
+                self._hwnd = 0
+        return self._hwnd
+
+    def _on_unmap(self, event):
+        if event.widget is self.root:
+            self.set_paused(True)
+
+    def _on_map(self, event):
+        if event.widget is self.root:
+            self._next_visibility_check = 0.0
+
+    def close(self):
+        self.preview.set_visible(False)
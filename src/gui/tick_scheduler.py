@@ -0,0 +1,115 @@
+import time
+from collections import deque
+from typing import Any, NamedTuple
+
+from src.metrics import registry
+
+TICK_BUCKETS = (0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05)
+TICK_COST = registry.histogram("gui_tick_seconds", "Time spent in one GUI tick", TICK_BUCKETS)
+TICKS = registry.counter("gui_ticks_total", "GUI ticks run")
+
+
+class GuiSnapshot(NamedTuple):
+    """Everything the widgets read in one tick, taken once at the start of the tick."""
+    time: float
+    blendshapes: Any     # BlendshapeProcessor Snapshot (seq, timestamp, scores)
+    preview: Any         # PreviewPublisher Snapshot (seq, timestamp, image)
+    mode_index: int      # blendshape index that drives the mouse/keyboard state machine
+
+
+class DisplayValue:
+    """Pushes a number to a widget only when it moved more than ``epsilon`` since the last push."""
+
+    def __init__(self, apply, epsilon=0.005):
+        self.apply = apply
+        self.epsilon = epsilon
+        self.shown = None
+
+    def set(self, value):
+        if self.shown is not None and abs(value - self.shown) <= self.epsilon:
+            return False
+        self.shown = value
+        self.apply(value)
+        return True
+
+
+class TickScheduler:
+    """One after() loop for the whole GUI instead of a polling loop per widget.
+
+    Each tick takes one snapshot with ``snapshot_fn`` and passes it to every
+    registered callback in registration order. Tick cost is kept per widget
+    and exported as the ``gui_tick_seconds`` histogram. While ``is_idle()``
+    returns True (window minimized or covered) ticks run at ``idle_fps``.
+    """
+
+    def __init__(self, root, snapshot_fn, fps=60, idle_fps=20, is_idle=None):
+        self.root = root
+        self.snapshot_fn = snapshot_fn
+        self.interval = 1.0 / fps
+        self.idle_interval = 1.0 / idle_fps
+        self.is_idle = is_idle
+        self.callbacks = {}
+        self.costs = deque(maxlen=300)
+        self.widget_costs = {}
+        self.errors = {}
+        self._next_tick = None
+        self._job = None
+
+    def register(self, name, callback):
+        """``callback(snapshot)`` runs on every tick; it should return quickly when nothing changed."""
+        self.callbacks[name] = callback
+        self.widget_costs[name] = 0.0
+
+    def unregister(self, name):
+        self.callbacks.pop(name, None)
+        self.widget_costs.pop(name, None)
+
+    def start(self):
+        if self._job is None:
+            self._next_tick = time.perf_counter()
+            self._job = self.root.after(0, self._tick)
+
+    def stop(self):
+        if self._job is not None:
+            self.root.after_cancel(self._job)
+            self._job = None
+
+    def _tick(self):
+        start = time.perf_counter()
+        snapshot = self.snapshot_fn(start)
+        last = start
+        for name, callback in list(self.callbacks.items()):
+            try:
+                callback(snapshot)
+            except Exception as e:
+                if name not in self.errors:
+                    print(f"GUI tick error in {name}: {e}")
+                self.errors[name] = self.errors.get(name, 0) + 1
+            now = time.perf_counter()
+            # Exponential average, in seconds
+            self.widget_costs[name] = self.widget_costs.get(name, 0.0) * 0.95 + (now - last) * 0.05
+            last = now
+        cost = last - start
+        self.costs.append(cost)
+        TICK_COST.observe(cost)
+        TICKS.inc()
+
+        # Fixed cadence; after a slow tick start again from now instead of catching up
+        interval = self.idle_interval if self.is_idle is not None and self.is_idle() else self.interval
+        self._next_tick += interval
+        if self._next_tick < last:
+            self._next_tick = last + interval
+        self._job = self.root.after(max(1, int((self._next_tick - last) * 1000)), self._tick)
+
+    def stats(self):
+        costs = sorted(self.costs)
+        return {
+            "ticks": TICKS.value,
+            "fps": 1.0 / self.interval,
+            "idle": bool(self.is_idle()) if self.is_idle is not None else False,
+            "mean_ms": sum(costs) / len(costs) * 1000 if costs else 0.0,
+            "p95_ms": costs[int(len(costs) * 0.95)] * 1000 if costs else 0.0,
+            "max_ms": costs[-1] * 1000 if costs else 0.0,
+            "widgets_ms": {name: cost * 1000 for name, cost in self.widget_costs.items()},
+            "errors": dict(self.errors),
+        }
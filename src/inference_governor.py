@@ -0,0 +1,146 @@
+import time
+
+from src.event_log import emit, FACE, INFERENCE_RATE
+
+ACTIVE = "active"
+STILL = "still"
+KEYBOARD = "keyboard"
+TRACKING_OFF = "tracking_off"
+NO_FACE = "no_face"
+STATES = (ACTIVE, STILL, KEYBOARD, TRACKING_OFF, NO_FACE)
+
+# Inference rate per state in Hz; None means every camera frame
+DEFAULT_RATES = {ACTIVE: None, STILL: 15.0, KEYBOARD: 15.0, TRACKING_OFF: 10.0, NO_FACE: 5.0}
+# Lowest rate while gesture bindings are live and a face is in view
+GESTURE_FLOOR_HZ = 15.0
+
+
+class InferenceGovernor:
+    """Decides per camera frame whether the face model should run.
+
+    The rate drops when nobody needs full-rate landmarks: no face in view,
+    tracking off, keyboard mode, or the head held still for ``still_time``
+    seconds. Head motion beyond ``still_radius`` pixels or ``notify_activity``
+    (keys in mouse mode, gesture presses/holds) snaps it back to full rate for
+    at least ``wake_hold`` seconds. While gesture processing is enabled with
+    at least one binding the rate never drops below ``gesture_floor`` Hz
+    (except with no face), and the blendshape processor wakes it on the
+    rising slope of a bound channel. All times are perf_counter() seconds.
+    """
+
+    def __init__(self, mouse_controller=None, rates=None, still_time=2.0,
+                 still_radius=3.0, no_face_time=1.0, wake_hold=1.5, blendshape_processor=None,
+                 gesture_floor=GESTURE_FLOOR_HZ):
+        self.mouse_controller = mouse_controller
+        self.blendshape_processor = blendshape_processor
+        self.rates = dict(DEFAULT_RATES)
+        if rates:
+            self.rates.update(rates)
+        self.periods = {state: (1.0 / rate if rate else 0.0) for state, rate in self.rates.items()}
+        self.still_time = still_time
+        self.still_radius = still_radius
+        self.no_face_time = no_face_time
+        self.wake_hold = wake_hold
+        self.gesture_floor = gesture_floor
+        self.gesture_period = 1.0 / gesture_floor if gesture_floor else float("inf")
+        # Frames arrive with jitter; accept a frame slightly early rather than skipping two
+        self.tolerance = 0.01
+        self.enabled = True
+        self.reset()
+
+    def reset(self):
+        now = time.perf_counter()
+        self.state = ACTIVE
+        self.state_since = now
+        self.state_time = {state: 0.0 for state in STATES}
+        self.last_inference = float("-inf")
+        self.wake_until = now + self.wake_hold
+        self.anchor = None
+        self.still_since = now
+        self.face_lost_since = None
+        self.frames_inferred = 0
+        self.frames_skipped = 0
+        self.inference_cost = 0.0
+
+    def notify_activity(self, now=None):
+        self.wake_until = (time.perf_counter() if now is None else now) + self.wake_hold
+
+    def record_inference_cost(self, seconds):
+        """Running average of the face stage time one inference takes.
+
+        In LIVE_STREAM this is the time from detect_async to the result
+        callback, so it also counts any wait behind the previous frame.
+        """
+        self.inference_cost += 0.05 * (seconds - self.inference_cost)
+
+    def observe(self, cursor, now):
+        """Feed the result of an inference: landmark position or an empty value if no face."""
+        if cursor is None or len(cursor) == 0:
+            if self.face_lost_since is None:
+                self.face_lost_since = now
+            return
+        self.face_lost_since = None
+        if self.anchor is None or abs(cursor[0] - self.anchor[0]) > self.still_radius \
+                or abs(cursor[1] - self.anchor[1]) > self.still_radius:
+            self.anchor = (float(cursor[0]), float(cursor[1]))
+            self.still_since = now
+            if self.state == STILL:
+                self.notify_activity(now)
+
+    def _select_state(self, now):
+        if self.face_lost_since is not None and now - self.face_lost_since >= self.no_face_time:
+            return NO_FACE
+        if now < self.wake_until:
+            return ACTIVE
+        mc = self.mouse_controller
+        if mc is not None:
+            if not mc.tracking_active:
+                return TRACKING_OFF
+            if not mc.state_machine:
+                return KEYBOARD
+        if now - self.still_since >= self.still_time:
+            return STILL
+        return ACTIVE
+
+    def _gestures_live(self):
+        bp = self.blendshape_processor
+        return bp is not None and bp.is_enabled and bool(bp.bindings)
+
+    def _period(self, state):
+        period = self.periods[state]
+        if state != NO_FACE and self._gestures_live():
+            return min(period, self.gesture_period)
+        return period
+
+    def should_infer(self, now):
+        if not self.enabled:
+            return True
+        state = self._select_state(now)
+        if state != self.state:
+            self.state_time[self.state] += now - self.state_since
+            self.state, self.state_since = state, now
+            emit(FACE, INFERENCE_RATE, state, self.rates[state])
+        if now - self.last_inference >= self._period(state) - self.tolerance:
+            self.last_inference = now
+            self.frames_inferred += 1
+            return True
+        self.frames_skipped += 1
+        return False
+
+    def metrics(self, now=None):
+        if now is None:
+            now = time.perf_counter()
+        state_time = dict(self.state_time)
+        state_time[self.state] += now - self.state_since
+        total = self.frames_inferred + self.frames_skipped
+        return {
+            "state": self.state,
+            "rate_hz": self.rates[self.state],
+            "gesture_floor_hz": self.gesture_floor if self._gestures_live() else None,
+            "state_seconds": state_time,
+            "frames_inferred": self.frames_inferred,
+            "frames_skipped": self.frames_skipped,
+            "skip_ratio": self.frames_skipped / total if total else 0.0,
+            "inference_cost_ms": self.inference_cost * 1000,
+            "cpu_saved_s": self.frames_skipped * self.inference_cost,
+        }
@@ -0,0 +1,59 @@
+import importlib
+import importlib.util
+import sys
+import threading
+import types
+
+
+class _LazyModule(types.ModuleType):
+    """Stands in for a module until its first attribute access.
+
+    The real import runs on the thread that first touches the module, under a
+    per-module lock, so two stages touching it at once both wait for one
+    complete import (importlib's LazyLoader is not safe for that on 3.11).
+    Attribute reads and writes are forwarded to the loaded module.
+    """
+
+    def __init__(self, name):
+        super().__init__(name)
+        object.__setattr__(self, "_module", None)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    def _load(self):
+        module = self._module
+        if module is None:
+            with self._lock:
+                module = self._module
+                if module is None:
+                    module = importlib.import_module(self.__name__)
+                    object.__setattr__(self, "_module", module)
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __dir__(self):
+        return dir(self._load())
+
+
+def lazy_import(name):
+    """Return module ``name``, deferring its actual import until first attribute access.
+
+    Used for heavy dependencies (mediapipe, cv2, pyautogui, keyboard) so that
+    importing ``src.pipeline`` does not pay for them before a window is up.
+    A missing module still raises ImportError here, at the import site.
+
+    This only moves the cost out of module import. pyautogui imports
+    pyscreeze, which imports cv2, so MouseController() in Pipeline.start()
+    loads cv2 whether or not it is lazy here (see ``python -m
+    src.startup_budget --start``).
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    if importlib.util.find_spec(name) is None:
+        raise ImportError(f"No module named '{name}'", name=name)
+    return _LazyModule(name)
@@ -0,0 +1,313 @@
+"""Memory instrumentation: per-subsystem tracemalloc diffs, allocations per frame, soak test.
+
+Allocations are attributed to a subsystem by the most recent frame of their
+traceback that belongs to one (camera, face, mouse, gestures, gui, pipeline)::
+
+    # Net growth per subsystem and transient peak per processed frame
+    python -m src.memory_audit frames clip.mp4 --frames 300
+
+    # Run the full pipeline on the clip (looped) for 10 minutes; fail if RSS
+    # or the preview canvas item count keeps growing
+    python -m src.memory_audit soak clip.mp4 --minutes 10 --gui
+
+A running service can take snapshots over the control socket:
+``memory start``, ``memory snapshot``, ``memory diff``, ``memory stop``.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# Checked in order against each traceback frame's file path
+SUBSYSTEMS = (
+    ("camera", ("camera_thread.py", "camera_calibration.py", "replay.py")),
+    ("face", ("face_processor.py", "frame_gate.py", "mediapipe")),
+    ("mouse", ("mouse_controller.py", "cursor_predictor.py", "modified_oneEuroFilter.py", "accel.py")),
+    ("gestures", ("blendshape_processor.py", "blendshape_history.py", "gesture_", "snapshot.py")),
+    ("gui", ("gui" + os.sep, "gui/", "tkinter", "customtkinter", "PIL")),
+    ("pipeline", ("pipeline.py", "stage_runtime.py", "event_log.py", "metrics.py")),
+)
+
+
+def subsystem_of(traceback):
+    for frame in reversed(traceback):
+        for name, patterns in SUBSYSTEMS:
+            if any(pattern in frame.filename for pattern in patterns):
+                return name
+    return "other"
+
+
+def diff_by_subsystem(before, after):
+    """Return ``{subsystem: [size_diff, count_diff]}`` between two tracemalloc snapshots."""
+    out = {}
+    for stat in after.compare_to(before, "traceback"):
+        entry = out.setdefault(subsystem_of(stat.traceback), [0, 0])
+        entry[0] += stat.size_diff
+        entry[1] += stat.count_diff
+    return out
+
+
+def rss_bytes():
+    """Resident set size of this process, or None if it cannot be read here."""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def print_diff(diff, frames=None):
+    per = f" {'per frame':>12}" if frames else ""
+    print(f"{'subsystem':<10} {'bytes':>12} {'blocks':>8}{per}")
+    for name, (size, count) in sorted(diff.items(), key=lambda item: -abs(item[1][0])):
+        line = f"{name:<10} {size:12,d} {count:8d}"
+        if frames:
+            line += f" {size / frames:10.1f} B"
+        print(line)
+
+
+class MemoryAudit:
+    """tracemalloc snapshots of the running app, diffed per subsystem on request."""
+
+    def __init__(self, nframe=25):
+        self.nframe = nframe
+        self.baseline = None
+        self.last = None
+        self.lock = threading.Lock()
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.nframe)
+        with self.lock:
+            self.baseline = self.last = tracemalloc.take_snapshot()
+
+    def stop(self):
+        tracemalloc.stop()
+        self.baseline = self.last = None
+
+    def snapshot(self):
+        """Diff against the previous snapshot (and the baseline) and remember this one."""
+        if not tracemalloc.is_tracing():
+            self.start()
+        snapshot = tracemalloc.take_snapshot()
+        with self.lock:
+            since_last = diff_by_subsystem(self.last, snapshot)
+            since_start = diff_by_subsystem(self.baseline, snapshot)
+            self.last = snapshot
+        return {"since_last": since_last, "since_start": since_start}
+
+    def handle_command(self, arg):
+        """Control socket handler: ``start``, ``snapshot``/``diff``, ``stop``."""
+        arg = arg.lower() or "snapshot"
+        if arg == "start":
+            self.start()
+        elif arg == "stop":
+            self.stop()
+        elif arg in ("snapshot", "diff"):
+            return {"ok": True, "rss": rss_bytes(), **self.snapshot()}
+        else:
+            return {"ok": False, "error": "use memory start|snapshot|diff|stop"}
+        return {"ok": True, "tracing": tracemalloc.is_tracing(), "rss": rss_bytes()}
+
+
+def audit_frames(frames, config, count=300, warmup=30):
+    """Synchronous IMAGE pass: net growth per subsystem and transient peak per frame."""
+    from src.e2e_bench import _build, _install_sink
+
+    _install_sink()
+    mc, bp, fp = _build(config, "IMAGE")
+    fp.landmark_call_back = mc.update_loop
+    fp.blendshape_call_back = bp.update_blendshape
+    # Loop the clip so short recordings still give `count` frames
+    sequence = [frames[i % len(frames)] for i in range(warmup + count)]
+    for frame in sequence[:warmup]:
+        fp.process_frame(frame, time.perf_counter())
+
+    tracemalloc.start(25)
+    before = tracemalloc.take_snapshot()
+    blocks_start = sys.getallocatedblocks()
+    peaks = []
+    for frame in sequence[warmup:]:
+        tracemalloc.reset_peak()
+        current, _ = tracemalloc.get_traced_memory()
+        fp.process_frame(frame, time.perf_counter())
+        peaks.append(tracemalloc.get_traced_memory()[1] - current)
+    blocks_end = sys.getallocatedblocks()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    fp.close()
+
+    peaks.sort()
+    return {
+        "frames": count,
+        "by_subsystem": diff_by_subsystem(before, after),
+        "net_blocks_per_frame": (blocks_end - blocks_start) / count,
+        "peak_bytes_per_frame": {"p50": peaks[len(peaks) // 2], "max": peaks[-1]},
+    }
+
+
+def growth_per_minute(samples, warmup_fraction=0.2):
+    """Least-squares slope (units per minute) of ``[(t, value)]`` after the warm-up part."""
+    samples = [(t, v) for t, v in samples if v is not None]
+    samples = samples[int(len(samples) * warmup_fraction):]
+    if len(samples) < 3:
+        return 0.0
+    n = len(samples)
+    mean_t = sum(t for t, _ in samples) / n
+    mean_v = sum(v for _, v in samples) / n
+    var = sum((t - mean_t) ** 2 for t, _ in samples)
+    if var == 0:
+        return 0.0
+    return sum((t - mean_t) * (v - mean_v) for t, v in samples) / var * 60.0
+
+
+class SoakTest:
+    """Runs the Pipeline on replayed frames and samples RSS (and canvas items with the GUI)."""
+
+    def __init__(self, frames, fps, minutes, interval=5.0, gui=False, trace=False):
+        self.frames = frames
+        self.fps = fps
+        self.duration = minutes * 60.0
+        self.interval = interval
+        self.gui = gui
+        # tracemalloc's own bookkeeping grows RSS, so per-subsystem tracing is opt-in
+        self.trace = trace
+        self.rss = []
+        self.canvas_items = []
+        self.audit = MemoryAudit()
+        self.start_time = None
+        self.window = None
+
+    def sample(self):
+        now = time.perf_counter() - self.start_time
+        self.rss.append((now, rss_bytes()))
+        if self.window is not None:
+            self.canvas_items.append((now, len(self.window.canvas.find_all())))
+
+    def run(self):
+        from src.e2e_bench import _install_sink
+        from src.pipeline import Pipeline
+        from src.replay import ReplayCamera
+
+        # Cursor moves and key presses go to a bounded recording sink, not the desktop
+        _install_sink(max_events=1000)
+        Pipeline.camera_factory = lambda: ReplayCamera(self.frames, self.fps, loop=True)
+        pipeline = Pipeline()
+        pipeline.start(wait=not self.gui)
+        pipeline.set_tracking(True)
+        if self.trace:
+            self.audit.start()
+        self.start_time = time.perf_counter()
+        print(f"Soak test running for {self.duration / 60:.1f} min")
+        if self.gui:
+            self._run_gui()
+        else:
+            while time.perf_counter() - self.start_time < self.duration:
+                self.sample()
+                time.sleep(self.interval)
+            self.sample()
+        diff = None
+        if self.trace:
+            diff = self.audit.snapshot()["since_start"]
+            self.audit.stop()
+        pipeline.stop()
+        return diff
+
+    def _run_gui(self):
+        from src.gui.main_window import MainWindow
+
+        self.window = MainWindow()
+
+        def tick():
+            self.sample()
+            if time.perf_counter() - self.start_time >= self.duration:
+                self.window.destroy()
+            else:
+                self.window.after(int(self.interval * 1000), tick)
+
+        self.window.after(int(self.interval * 1000), tick)
+        self.window.mainloop()
+
+    def verdict(self, max_rss_mb_per_min=1.0, max_items_per_min=0.5):
+        """Return ``(ok, lines)``: fails if RSS or canvas items keep growing past the warm-up."""
+        ok = True
+        lines = []
+        rss_slope = growth_per_minute(self.rss) / (1 << 20)
+        rss_values = [v for _, v in self.rss if v is not None]
+        if rss_values:
+            lines.append(f"RSS {rss_values[0] / (1 << 20):.1f} -> {rss_values[-1] / (1 << 20):.1f} MB, "
+                         f"trend {rss_slope:+.2f} MB/min (limit {max_rss_mb_per_min} MB/min)")
+            if rss_slope > max_rss_mb_per_min:
+                ok = False
+        else:
+            lines.append("RSS not available on this platform (install psutil)")
+        if self.canvas_items:
+            items_slope = growth_per_minute(self.canvas_items)
+            lines.append(f"Canvas items {self.canvas_items[0][1]} -> {self.canvas_items[-1][1]}, "
+                         f"trend {items_slope:+.1f}/min (limit {max_items_per_min}/min)")
+            if items_slope > max_items_per_min:
+                ok = False
+        return ok, lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    frames_parser = commands.add_parser("frames", help="allocations per processed frame, by subsystem")
+    frames_parser.add_argument("clip", help="video file recorded from the webcam")
+    frames_parser.add_argument("--frames", type=int, default=300)
+    frames_parser.add_argument("--profile", help="profile to use (default: current)")
+
+    soak_parser = commands.add_parser("soak", help="run the pipeline on replay input and watch for growth")
+    soak_parser.add_argument("clip", help="video file recorded from the webcam (looped)")
+    soak_parser.add_argument("--minutes", type=float, default=10.0)
+    soak_parser.add_argument("--interval", type=float, default=5.0, help="seconds between samples")
+    soak_parser.add_argument("--gui", action="store_true", help="also run the Tk window and watch its canvas")
+    soak_parser.add_argument("--trace", action="store_true", help="also diff tracemalloc snapshots per subsystem")
+    soak_parser.add_argument("--max-rss-mb-per-min", type=float, default=1.0)
+    soak_parser.add_argument("--max-items-per-min", type=float, default=0.5)
+    args = parser.parse_args()
+
+    from src.gate_bench import load_clip
+
+    frames, fps = load_clip(args.clip, 300 if args.command == "soak" else None)
+    if not frames:
+        raise SystemExit(f"No frames read from {args.clip}")
+
+    if args.command == "frames":
+        from src.profile_manager import ProfileManager
+
+        profile_manager = ProfileManager()
+        config = profile_manager.get_config(args.profile)
+        profile_manager.close()
+        result = audit_frames(frames, config, args.frames)
+        print(f"{result['frames']} frames, net {result['net_blocks_per_frame']:.2f} blocks/frame, "
+              f"transient peak p50 {result['peak_bytes_per_frame']['p50'] / 1024:.1f} KB/frame "
+              f"(max {result['peak_bytes_per_frame']['max'] / 1024:.1f} KB)")
+        print_diff(result["by_subsystem"], result["frames"])
+        return 0
+
+    soak = SoakTest(frames, fps, args.minutes, args.interval, args.gui, args.trace)
+    diff = soak.run()
+    if diff is not None:
+        print("Traced growth since the start of the soak:")
+        print_diff(diff)
+    ok, lines = soak.verdict(args.max_rss_mb_per_min, args.max_items_per_min)
+    for line in lines:
+        print(line)
+    print("PASS" if ok else "FAIL: memory keeps growing")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
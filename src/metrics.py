@@ -0,0 +1,277 @@
+import bisect
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+COUNTER = "counter"
+GAUGE = "gauge"
+HISTOGRAM = "histogram"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.02, 0.03, 0.05, 0.075, 0.1, 0.15, 0.25, 0.5, 1.0)
+
+
+class Counter:
+    """Monotonic count. ``inc`` is a plain attribute add, cheap enough for per-frame use."""
+    kind = COUNTER
+
+    def __init__(self, name, help=""):
+        self.name = name
+        self.help = help
+        self.value = 0
+        self.children = {}
+
+    def inc(self, n=1):
+        self.value += n
+
+    def labels(self, **labels):
+        """Return the child counter for one label set, creating it on first use."""
+        key = tuple(sorted(labels.items()))
+        child = self.children.get(key)
+        if child is None:
+            child = self.children.setdefault(key, Counter(self.name))
+        return child
+
+    def samples(self):
+        if self.children:
+            return [(dict(key), child.value) for key, child in self.children.items()]
+        return [({}, self.value)]
+
+
+class Gauge:
+    """Current value, either set directly or computed by ``fn`` when scraped.
+
+    ``fn`` may return a number or a list of ``(labels, value)`` pairs.
+    """
+    kind = GAUGE
+
+    def __init__(self, name, help="", fn=None):
+        self.name = name
+        self.help = help
+        self.value = 0.0
+        self.fn = fn
+
+    def set(self, value):
+        self.value = value
+
+    def samples(self):
+        if self.fn is None:
+            return [({}, self.value)]
+        value = self.fn()
+        if isinstance(value, list):
+            return value
+        return [({}, value)]
+
+
+class Histogram:
+    kind = HISTOGRAM
+
+    def __init__(self, name, help="", buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """``[(le, count)]`` with counts of observations <= le, as in the Prometheus output."""
+        out = []
+        running = 0
+        for bound, n in zip(self.buckets, self.counts):
+            running += n
+            out.append((str(bound), running))
+        out.append(("+Inf", self.count))
+        return out
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile (None if empty, inf past the last bucket)."""
+        if self.count == 0:
+            return None
+        target = q * self.count
+        running = 0
+        for bound, n in zip(self.buckets + (float("inf"),), self.counts):
+            running += n
+            if running >= target:
+                return bound
+        return float("inf")
+
+
+class MetricsRegistry:
+    """Holds every metric; formatting happens only when someone scrapes."""
+
+    def __init__(self):
+        self.metrics = {}
+        self._last_scrape = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        existing = self.metrics.get(metric.name)
+        if existing is not None:
+            if existing.kind != metric.kind:
+                raise ValueError(f"Metric '{metric.name}' already registered as a {existing.kind}")
+            return existing
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help=""):
+        return self._register(Counter(name, help))
+
+    def gauge(self, name, help="", fn=None):
+        gauge = self._register(Gauge(name, help, fn))
+        if fn is not None:
+            gauge.fn = fn
+        return gauge
+
+    def histogram(self, name, help="", buckets=LATENCY_BUCKETS):
+        return self._register(Histogram(name, help, buckets))
+
+    def to_json(self):
+        now = time.perf_counter()
+        out = {}
+        with self._lock:
+            for name, metric in list(self.metrics.items()):
+                entry = {"type": metric.kind, "help": metric.help}
+                if metric.kind == HISTOGRAM:
+                    # Quantiles past the last bucket have no upper bound: null (Infinity is not JSON)
+                    p50, p95 = metric.quantile(0.5), metric.quantile(0.95)
+                    entry.update(count=metric.count, sum=metric.sum,
+                                 p50=p50 if p50 != float("inf") else None,
+                                 p95=p95 if p95 != float("inf") else None,
+                                 buckets=dict(metric.cumulative()))
+                else:
+                    try:
+                        samples = metric.samples()
+                    except Exception as e:
+                        entry["error"] = repr(e)
+                        samples = []
+                    entry["samples"] = [{"labels": labels, "value": value} for labels, value in samples]
+                    if metric.kind == COUNTER:
+                        # Per-second rate since the previous JSON scrape
+                        total = sum(value for _, value in samples)
+                        last = self._last_scrape.get(name)
+                        if last and now > last[0]:
+                            entry["rate"] = (total - last[1]) / (now - last[0])
+                        self._last_scrape[name] = (now, total)
+                out[name] = entry
+        return out
+
+    def to_prometheus(self):
+        lines = []
+        for name, metric in list(self.metrics.items()):
+            lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            if metric.kind == HISTOGRAM:
+                for bound, running in metric.cumulative():
+                    lines.append(f'{name}_bucket{{le="{bound}"}} {running}')
+                lines.append(f"{name}_sum {metric.sum}")
+                lines.append(f"{name}_count {metric.count}")
+                continue
+            try:
+                samples = metric.samples()
+            except Exception:
+                continue
+            for labels, value in samples:
+                lines.append(f"{name}{_format_labels(labels)} {float(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    parts = []
+    for key, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{key}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def thread_cpu_seconds():
+    """CPU seconds per live thread, labelled with the thread name (needs psutil or POSIX clocks)."""
+    names = {t.native_id: t.name for t in threading.enumerate()}
+    samples = []
+    if psutil is not None:
+        for t in psutil.Process().threads():
+            if t.id in names:
+                samples.append(({"thread": names[t.id]}, t.user_time + t.system_time))
+        return samples
+    if hasattr(time, "pthread_getcpuclockid"):
+        for t in threading.enumerate():
+            try:
+                clock = time.pthread_getcpuclockid(t.ident)
+                samples.append(({"thread": t.name}, time.clock_gettime(clock)))
+            except (OSError, TypeError):
+                continue
+    return samples
+
+
+class _Handler(BaseHTTPRequestHandler):
+    registry = None
+
+    def do_GET(self):
+        if self.path in ("/metrics", "/"):
+            body = self.registry.to_prometheus().encode("utf-8")
+            content_type = "text/plain; version=0.0.4; charset=utf-8"
+        elif self.path == "/metrics.json":
+            body = json.dumps(self.registry.to_json(), indent=2).encode("utf-8")
+            content_type = "application/json"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MetricsServer:
+    """Serves a registry on localhost: ``/metrics`` (Prometheus text) and ``/metrics.json``."""
+
+    def __init__(self, registry, host="127.0.0.1", port=None):
+        self.registry = registry
+        self.host = host
+        self.port = int(os.environ.get("WASDHEAD_METRICS_PORT", 9464)) if port is None else port
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        if self._server:
+            return True
+        handler = type("MetricsHandler", (_Handler,), {"registry": self.registry})
+        try:
+            self._server = ThreadingHTTPServer((self.host, self.port), handler)
+        except OSError as e:
+            print(f"Metrics server could not bind {self.host}:{self.port}: {e}")
+            return False
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics-server", daemon=True)
+        self._thread.start()
+        print(f"Metrics at http://{self.host}:{self.port}/metrics")
+        return True
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+            self._thread = None
+
+
+registry = MetricsRegistry()
+registry.gauge("thread_cpu_seconds", "CPU time used by each thread", thread_cpu_seconds)
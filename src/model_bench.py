@@ -0,0 +1,106 @@
+"""Latency/accuracy benchmark of the model variants in src.model_registry.
+
+Every variant runs in IMAGE mode over the same recorded clips. For each one
+the harness reports the per-frame latency distribution, process CPU time per
+frame, and the mean landmark deviation (camera pixels) from the reference
+variant::
+
+    python -m src.model_bench clip1.mp4 clip2.mp4 --variants default half_res gpu
+    python -m src.model_bench clip.mp4 --reference default --json results.json
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from src.face_processor import FaceProcessor
+from src.gate_bench import load_clip
+from src.model_registry import MODEL_VARIANTS, DEFAULT_VARIANT, get_variant
+
+
+def run_variant(variant, clips):
+    fp = FaceProcessor()
+    fp.variant = variant
+    fp.model_path = variant.task_path
+    fp.is_live_stream_mode = False
+    if not fp.initialize():
+        return None
+
+    latencies = []
+    cpu = 0.0
+    landmarks = []
+    for frames, fps in clips:
+        height, width = frames[0].shape[:2]
+        for i, frame in enumerate(frames):
+            wall_start = time.perf_counter()
+            cpu_start = time.process_time()
+            fp.process_frame(frame, i / fps)
+            cpu += time.process_time() - cpu_start
+            latencies.append(time.perf_counter() - wall_start)
+            result = fp.result
+            if result is not None and result.face_landmarks:
+                landmarks.append(np.array([[p.x * width, p.y * height] for p in result.face_landmarks[0]]))
+            else:
+                landmarks.append(None)
+    fp.close()
+
+    latencies = np.array(latencies) * 1000
+    return {
+        "variant": variant.name,
+        "frames": len(latencies),
+        "latency_ms": {p: float(np.percentile(latencies, p)) for p in (50, 90, 99)},
+        "latency_ms_mean": float(latencies.mean()),
+        "cpu_ms_per_frame": cpu / len(latencies) * 1000,
+        "face_found": sum(lm is not None for lm in landmarks) / len(landmarks),
+        "landmarks": landmarks,
+    }
+
+
+def landmark_deviation(reference, landmarks):
+    diffs = [np.hypot(*(lm - ref).T).mean() for ref, lm in zip(reference, landmarks)
+             if ref is not None and lm is not None and lm.shape == ref.shape]
+    return float(np.mean(diffs)) if diffs else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("clips", nargs="+", help="video files recorded from the webcam")
+    parser.add_argument("--variants", nargs="+", default=sorted(MODEL_VARIANTS))
+    parser.add_argument("--reference", default=DEFAULT_VARIANT)
+    parser.add_argument("--limit", type=int, default=None, help="frames per clip")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    clips = [load_clip(path, args.limit) for path in args.clips]
+    clips = [(frames, fps) for frames, fps in clips if frames]
+    if not clips:
+        raise SystemExit("No frames read from the clips")
+
+    names = [args.reference] + [name for name in args.variants if name != args.reference]
+    results = {}
+    for name in names:
+        result = run_variant(get_variant(name), clips)
+        if result is None:
+            print(f"{name}: could not initialize, skipped")
+            continue
+        results[name] = result
+
+    reference = results.get(args.reference)
+    print(f"{'variant':<16} {'p50':>7} {'p90':>7} {'p99':>7} {'cpu/frame':>10} {'face':>6} {'deviation':>10}")
+    for name, r in results.items():
+        r["deviation_px"] = landmark_deviation(reference["landmarks"], r["landmarks"]) if reference else None
+        dev = "-" if r["deviation_px"] is None else f"{r['deviation_px']:.2f}px"
+        lat = r["latency_ms"]
+        print(f"{name:<16} {lat[50]:5.1f}ms {lat[90]:5.1f}ms {lat[99]:5.1f}ms "
+              f"{r['cpu_ms_per_frame']:8.2f}ms {r['face_found'] * 100:5.1f}% {dev:>10}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({name: {k: v for k, v in r.items() if k != "landmarks"} for name, r in results.items()},
+                      f, indent=4)
+        print(f"Results saved to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+DELEGATES = ("CPU", "GPU")
+
+
+@dataclass(frozen=True, slots=True)
+class ModelVariant:
+    """One way of running the face landmarker.
+
+    ``input_size`` is the (width, height) frames are resized to before
+    inference; None keeps the camera resolution. Landmarks are normalized, so
+    the rest of the pipeline does not care which size was used.
+    """
+    name: str
+    task_path: str = "src/tasks/face_landmarker.task"
+    input_size: Optional[Tuple[int, int]] = None
+    delegate: str = "CPU"
+    blendshapes: bool = True
+    matrices: bool = False
+    num_faces: int = 1
+
+    def __post_init__(self):
+        if self.delegate not in DELEGATES:
+            raise ValueError(f"delegate should be one of {DELEGATES}")
+        if self.input_size is not None and (len(self.input_size) != 2 or min(self.input_size) <= 0):
+            raise ValueError("input_size should be (width, height) with positive values")
+        if self.num_faces < 1:
+            raise ValueError("num_faces should be >=1")
+
+
+DEFAULT_VARIANT = "default"
+
+MODEL_VARIANTS = {
+    variant.name: variant for variant in (
+        ModelVariant("default"),
+        ModelVariant("gpu", delegate="GPU"),
+        ModelVariant("half_res", input_size=(320, 240)),
+        ModelVariant("with_matrices", matrices=True),
+    )
+}
+
+
+def register_variant(variant):
+    MODEL_VARIANTS[variant.name] = variant
+
+
+def get_variant(name):
+    try:
+        return MODEL_VARIANTS[name]
+    except KeyError:
+        raise ValueError(f"Unknown model variant '{name}', expected one of {sorted(MODEL_VARIANTS)}")
@@ -1,13 +1,24 @@
 import numpy as np
 import numpy.typing as npt
-import pyautogui
 from src.accel import SigmoidAccel
 import time
 from src.modified_oneEuroFilter import OneEuroFilter
+from src.cursor_predictor import CursorPredictor
+from src.metrics import registry
+from src.lazy_import import lazy_import
 import threading
 import queue
-import keyboard
 import math
+import itertools
+from collections import deque
+from src.config import ProfileConfig, MouseConfig
+from src.event_log import emit, ERROR, MOUSE, MODE, MODE_SWITCH, MOUSE_BUTTON_DOWN, MOUSE_BUTTON_UP, UPDATE_LOOP_ERROR
+
+pyautogui = lazy_import("pyautogui")
+keyboard = lazy_import("keyboard")
+
+MOUSE_MOVES = registry.counter("mouse_moves_total", "Relative cursor moves injected")
+
 
 class MouseController:
     def __init__(self):
@@ -15,22 +26,39 @@ class MouseController:
         pyautogui.PAUSE = 0
         pyautogui.MINIMUM_DURATION = 0
         pyautogui.MINIMUM_SLEEP = 0.0049
-        self.mincutoff = 0.5
-        self.beta = 0.07
+        self.config = ProfileConfig(mouse_controller=MouseConfig(velocity_scale=35, mincutoff=0.5, beta=0.07))
         self.vx = 0
         self.vy = 0
+        self.filter_freq = 30
         config = {
-            'freq': 30,      
+            'freq': self.filter_freq,      
             'mincutoff': self.mincutoff, 
             'beta': self.beta,       
             'dcutoff': 1.0    
             }
 
         self.f1 = OneEuroFilter(**config)
+        # Filter parameter mailbox: writers replace (seq, mincutoff, beta), the
+        # filter thread applies the newest one at most every filter_update_interval.
+        self._filter_seq = itertools.count(1)
+        self._filter_mailbox = (0, self.mincutoff, self.beta)
+        self._applied_filter_seq = 0
+        self._last_filter_update = 0.0
+        self.filter_update_interval = 0.05
         self.prev_smooth_position = None
-        self.velocity_scale = 35
+        # Landmarks seen while tracking is off, used to seed the filter on activation (fast_init)
+        self.warm_samples = deque(maxlen=5)
+        self.warm_start_max_age = 0.5
+        self._warm_start_pending = False
+        # Latency compensation (predict): capture-to-move latency, smoothed
+        self.predictor = CursorPredictor()
+        self.latency = 0.0
+        self.latency_smoothing = 0.1
+        self.injection_delay = 0.005
         self.accel = SigmoidAccel()
         self.get_cursor = None
+        # Called on key activity in mouse mode and on mode switches (InferenceGovernor)
+        self.activity_callback = None
         self.checkk = False
         self.state_machine = True
         self.sending_simulated_key = False
@@ -43,11 +71,7 @@ class MouseController:
         self.tmp = time.time()
         self.x_now = 0
         self.y_now = 0
-        self.state_machine_blendshape_index = 3
         self.delay = 0
-        self.trigger_threshold = 0.5
-        self.toggle = True
-        self.accel_on = True
         self.is_recent_typing = False
         self.last_typing_time = 0
         self.warning_duration = 0.1 
@@ -68,6 +92,66 @@ class MouseController:
         for i in range(1, 13):
             self.control_keys.add(f'f{i}')
         self.setup_global_listener()
+    def apply_config(self, config):
+        """Swap in a new ProfileConfig; filter parameter changes go through the mailbox."""
+        old = self.config.mouse_controller
+        self.config = config
+        new = config.mouse_controller
+        if (new.mincutoff, new.beta) != (old.mincutoff, old.beta):
+            self.post_filter_params(new.mincutoff, new.beta)
+
+    def post_filter_params(self, mincutoff, beta):
+        """Hand new filter parameters to the filter thread without a lock; latest post wins."""
+        self._filter_mailbox = (next(self._filter_seq), float(mincutoff), float(beta))
+
+    def _apply_filter_params(self, now):
+        mailbox = self._filter_mailbox
+        if mailbox[0] == self._applied_filter_seq or now - self._last_filter_update < self.filter_update_interval:
+            return
+        _, mincutoff, beta = mailbox
+        self.f1.setMinCutoff(mincutoff)
+        self.f1.setBeta(beta)
+        self._applied_filter_seq = mailbox[0]
+        self._last_filter_update = now
+
+    # Settings live in self.config and change only through apply_config (one snapshot swap);
+    # these read-only names are kept for the GUI and the overlay.
+    @property
+    def velocity_scale(self):
+        return self.config.mouse_controller.velocity_scale
+
+    @property
+    def mincutoff(self):
+        return self.config.mouse_controller.mincutoff
+
+    @property
+    def beta(self):
+        return self.config.mouse_controller.beta
+
+    @property
+    def toggle(self):
+        return self.config.mouse_controller.toggle
+
+    @property
+    def accel_on(self):
+        return self.config.mouse_controller.accel_on
+
+    @property
+    def fast_init(self):
+        return self.config.mouse_controller.fast_init
+
+    @property
+    def predict_enabled(self):
+        return self.config.mouse_controller.predict
+
+    @property
+    def state_machine_blendshape_index(self):
+        return self.config.state_machine_blendshape.index
+
+    @property
+    def trigger_threshold(self):
+        return self.config.state_machine_blendshape.threshold
+
     def setup_global_listener(self):
         keyboard.hook(self._on_any_key_event)
     @property
@@ -82,6 +166,8 @@ class MouseController:
     def _on_any_key_event(self, e):
         if not self.tracking_active or not self.state_machine:
             return
+        if self.activity_callback:
+            self.activity_callback()
         if e.event_type != 'down':
             return
         if keyboard.is_pressed('ctrl') or keyboard.is_pressed('alt') or keyboard.is_pressed('win'):
@@ -94,69 +180,117 @@ class MouseController:
             self.last_typing_time = time.time()
         except Exception:
             pass
-    def reset(self):
+    def _new_filter(self):
+        # OneEuroFilter.reset() keeps the frequency estimated from past timestamps, so build a new one
         config = {
-            'freq': 120,      
+            'freq': self.filter_freq,      
             'mincutoff': self.mincutoff,  
             'beta': self.beta,       
             'dcutoff': 1.0    
             }
-        self.f1 = OneEuroFilter(**config)
+        return OneEuroFilter(**config)
+
+    def reset(self):
+        self.f1 = self._new_filter()
+        self.predictor.reset()
         self.prev_smooth_position = None
 
     def set_get_cursor(self, get_cursor_func):
         self.get_cursor = get_cursor_func
         print("Get cursor function set successfully")
     
-    def apply_smoothing(self, point):
-        current_time = time.time()
-        return self.f1(math.sqrt(point[0]**2+point[1]**2), current_time)
+    def apply_smoothing(self, point, timestamp=None):
+        """Filter one sample; timestamp is the frame's capture time (perf_counter clock)."""
+        if timestamp is None:
+            timestamp = time.perf_counter()
+        self._apply_filter_params(timestamp)
+        return self.f1(math.sqrt(point[0]**2+point[1]**2), timestamp)
     
-    def move(self, landmark):
-        
-        _, alpha = self.apply_smoothing(landmark)
+    def _warm_start(self, now):
+        """Seed the filter and velocity state from the landmarks buffered while tracking was off."""
+        samples = [(t, pos) for t, pos in list(self.warm_samples) if now - t <= self.warm_start_max_age]
+        self.warm_samples.clear()
+        self.f1 = self._new_filter()
+        self.predictor.reset()
+        self.vx, self.vy = 0, 0
+        prev = None
+        for t, pos in samples:
+            self.predictor.update(pos, t)
+            _, alpha = self.f1(math.sqrt(pos[0]**2+pos[1]**2), t)
+            if prev is not None:
+                self.vx, self.vy = (pos - prev) * alpha + (1 - alpha) * np.array([self.vx, self.vy])
+            prev = pos
+        self.prev_smooth_position = prev
+
+    def move(self, landmark, timestamp=None):
+        mc = self.config.mouse_controller
+        if timestamp is None:
+            timestamp = time.perf_counter()
+        if self._warm_start_pending:
+            self._warm_start_pending = False
+            self._warm_start(timestamp)
+        _, alpha = self.apply_smoothing(landmark, timestamp)
+        if mc.predict:
+            landmark = self.predict(landmark, timestamp, mc.predict_max_ms / 1000.0)
         
         if self.prev_smooth_position is not None:
             self.vx, self.vy = ((landmark - self.prev_smooth_position) * alpha + 
                                 (1 - alpha) * (np.array([self.vx, self.vy])))
             
             self.prev_smooth_position = landmark
-            if self.accel_on:
-                vx = -self.vx * self.accel(self.vx * self.velocity_scale) * self.velocity_scale
-                vy = self.vy * self.accel(self.vy * self.velocity_scale) * self.velocity_scale
+            velocity_scale = mc.velocity_scale
+            if mc.accel_on:
+                vx = -self.vx * self.accel(self.vx * velocity_scale) * velocity_scale
+                vy = self.vy * self.accel(self.vy * velocity_scale) * velocity_scale
             else:
-                vx = -self.vx * self.velocity_scale
-                vy = self.vy * self.velocity_scale
+                vx = -self.vx * velocity_scale
+                vy = self.vy * velocity_scale
             pyautogui.moveRel(vx/2, vy/2, duration=0)
             time.sleep(0.01)
             pyautogui.moveRel(vx/2, vy/2, duration=0)
+            MOUSE_MOVES.inc()
         else:
             self.prev_smooth_position = landmark
             
         return landmark
 
-    def update_loop(self, cursor_pos=None, blendshape=None):
+    def predict(self, landmark, timestamp, max_horizon):
+        """Extrapolate the landmark by the measured capture-to-injection latency."""
+        latency = time.perf_counter() - timestamp + self.injection_delay
+        self.latency += self.latency_smoothing * (latency - self.latency)
+        self.predictor.max_horizon = max_horizon
+        return self.predictor.step(landmark, timestamp, self.latency)
+
+    def update_loop(self, cursor_pos=None, blendshape=None, timestamp=None):
         try:
+            if timestamp is None:
+                timestamp = time.perf_counter()
             if blendshape is not None:
-                trigger_blendshape = blendshape[self.state_machine_blendshape_index]
+                config = self.config
+                trigger_threshold = config.state_machine_blendshape.threshold
+                trigger_blendshape = blendshape[config.state_machine_blendshape.index]
 
-                if self.toggle and self.tracking_active:
-                    if trigger_blendshape > self.trigger_threshold and self.checkk == False:
+                if config.mouse_controller.toggle and self.tracking_active:
+                    if trigger_blendshape > trigger_threshold and self.checkk == False:
                         self.checkk = True
                         self.state_machine = not self.state_machine
-                        print(f"Keyboard Mode: {'ON' if self.state_machine else 'OFF'}")
-                    elif trigger_blendshape <= self.trigger_threshold:
+                        emit(MODE, MODE_SWITCH, "mouse" if self.state_machine else "keyboard")
+                        if self.activity_callback:
+                            self.activity_callback(timestamp)
+                    elif trigger_blendshape <= trigger_threshold:
                         self.checkk = False  
                 elif self.tracking_active:
-                    if (not self.state_machine) and trigger_blendshape > self.trigger_threshold:
+                    if (not self.state_machine) and trigger_blendshape > trigger_threshold:
                         self.state_machine = True
-                    elif self.state_machine and trigger_blendshape <= self.trigger_threshold * 0.5:
+                    elif self.state_machine and trigger_blendshape <= trigger_threshold * 0.5:
                         self.state_machine = False
             if self.tracking_active and cursor_pos is not None and time.time() - self.delay > 0.15:
-                self.move(cursor_pos)
+                self.move(cursor_pos, timestamp)
+            elif not self.tracking_active and cursor_pos is not None:
+                self.warm_samples.append((timestamp, cursor_pos))
 
         except Exception as e:
-            print(f"Error in mouse update loop: {e}")
+            emit(MOUSE, UPDATE_LOOP_ERROR, repr(e), level=ERROR)
     def setup_keyboard_listeners(self):
         def handle_key_logic(e, action_type, param):            
             if self.sending_simulated_key:
@@ -181,12 +315,12 @@ class MouseController:
                         pyautogui.mouseDown(button=mouse_button)
                         self.mouse_buttons_held[mouse_button] = True
                         self.delay = time.time()
-                        print(f"Mouse {mouse_button} down")
+                        emit(MOUSE, MOUSE_BUTTON_DOWN, mouse_button)
                 elif e.event_type == 'up':
                     if self.mouse_buttons_held[mouse_button]:
                         pyautogui.mouseUp(button=mouse_button)
                         self.mouse_buttons_held[mouse_button] = False
-                        print(f"Mouse {mouse_button} up")
+                        emit(MOUSE, MOUSE_BUTTON_UP, mouse_button)
         def handle_move_logic(e):
             if self.sending_simulated_key: return
             is_shortcut = keyboard.is_pressed('ctrl') or keyboard.is_pressed('alt') or keyboard.is_pressed('win')
@@ -231,9 +365,17 @@ class MouseController:
             print(f"Error setting up keyboard listeners: {e}")
     def start_tracking(self):
         with self.lock:
-            self.tracking_active = True
             self.prev_smooth_position = None
+            self.predictor.reset()
+            self._warm_start_pending = self.fast_init
+            self.tracking_active = True
             print("Mouse tracking started")
+    def set_state_machine(self, mouse_mode):
+        if self.state_machine != mouse_mode:
+            self.state_machine = mouse_mode
+            emit(MODE, MODE_SWITCH, "mouse" if mouse_mode else "keyboard")
+            if self.activity_callback:
+                self.activity_callback()
     def stop_tracking(self):
         self.tracking_active = False
         print("Mouse tracking stopped")
@@ -243,7 +385,7 @@ class MouseController:
         try:
             current = self.velocity_scale
             new_speed = min(50, current + step) 
-            self.velocity_scale = new_speed
+            self.apply_config(self.config.with_mouse(velocity_scale=new_speed))
             return True
         except Exception as e:
             print(f"Error increasing mouse speed: {e}")
@@ -252,7 +394,7 @@ class MouseController:
         try:
             current = self.velocity_scale
             new_speed = max(1, current - step) 
-            self.velocity_scale = new_speed
+            self.apply_config(self.config.with_mouse(velocity_scale=new_speed))
             return True
         except Exception as e:
             print(f"Error decreasing mouse speed: {e}")
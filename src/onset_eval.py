@@ -0,0 +1,103 @@
+"""Offline evaluation of predictive onset detection on recorded blendshape traces.
+
+Record a trace with ``python -m src.service --send "record start"`` and
+``--send "record stop trace"`` (or ``BlendshapeProcessor.start_recording()`` /
+``stop_recording(path)``), then run::
+
+    python -m src.onset_eval trace.blendshapes.npz --profile profiles/default.json
+"""
+import argparse
+import json
+
+import numpy as np
+
+from src.blendshape_history import BlendshapeHistory, BLENDSHAPE_INDEX
+from src.gesture_onset import OnsetDetector
+from src.replay import load_trace
+
+
+def evaluate_binding(timestamps, scores, binding, default_threshold=0.5,
+                     press_cooldown=1.0, window=4, detector=None):
+    """Replay one press binding and compare early fires with real threshold crossings."""
+    name = binding["blendshape"]
+    channel = BLENDSHAPE_INDEX[name]
+    threshold = binding.get("threshold", default_threshold)
+    detector = detector or OnsetDetector.from_binding(binding) or OnsetDetector()
+
+    history = BlendshapeHistory(capacity=max(window, 3) + 1)
+    last_fire = -np.inf
+    fires = []
+    crossings = []
+    prev_value = 0.0
+
+    for t, row in zip(timestamps, scores):
+        history.push(row, t)
+        value = float(row[channel])
+        _, slopes, curvatures = history.poly_features(window)
+        ready = t - last_fire >= press_cooldown
+
+        if prev_value < threshold <= value:
+            crossings.append(t)
+        early = detector.update(value, slopes[channel], curvatures[channel], threshold, t, ready)
+        if ready and (early or value >= threshold):
+            fires.append((t, early))
+            last_fire = t
+        prev_value = value
+
+    saved = []
+    for t_cross in crossings:
+        for t_fire, early in fires:
+            if early and t_cross - detector.confirm_time <= t_fire <= t_cross:
+                saved.append(t_cross - t_fire)
+                break
+
+    return {
+        "blendshape": name,
+        "threshold": threshold,
+        "crossings": len(crossings),
+        "early_fires": detector.early_fires,
+        "confirmed": detector.confirmed_fires,
+        "false_triggers": detector.false_trigger_count,
+        "mean_saved_ms": float(np.mean(saved) * 1000) if saved else 0.0,
+        "median_saved_ms": float(np.median(saved) * 1000) if saved else 0.0,
+    }
+
+
+def evaluate_profile(trace, settings, horizon_ms=None):
+    bs_settings = settings.get("blendshape_bindings", {})
+    default_threshold = bs_settings.get("threshold", 0.5)
+    results = []
+    for binding in bs_settings.get("bindings", []):
+        if binding.get("mode", "hold") != "press" or binding.get("blendshape") not in BLENDSHAPE_INDEX:
+            continue
+        detector = OnsetDetector.from_binding(binding) or OnsetDetector()
+        if horizon_ms is not None:
+            detector.horizon = horizon_ms / 1000.0
+        results.append(evaluate_binding(
+            trace["timestamps"], trace["blendshapes"], binding, default_threshold, detector=detector))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("trace", help=".npz trace with 'timestamps' and 'blendshapes'")
+    parser.add_argument("--profile", default="profiles/default.json")
+    parser.add_argument("--horizon-ms", type=float, default=None,
+                        help="override the prediction horizon of every binding")
+    args = parser.parse_args()
+
+    with open(args.profile, "r") as f:
+        settings = json.load(f)
+    results = evaluate_profile(load_trace(args.trace), settings, args.horizon_ms)
+    if not results:
+        print("No press-mode bindings in profile")
+        return
+
+    print(f"{'blendshape':<18}{'thr':>6}{'cross':>7}{'early':>7}{'false':>7}{'mean ms':>9}{'med ms':>9}")
+    for r in results:
+        print(f"{r['blendshape']:<18}{r['threshold']:>6.2f}{r['crossings']:>7}{r['early_fires']:>7}"
+              f"{r['false_triggers']:>7}{r['mean_saved_ms']:>9.1f}{r['median_saved_ms']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
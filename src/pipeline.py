@@ -1,12 +1,22 @@
 from src.camera_thread import CameraThread
 from src.face_processor import FaceProcessor
 from src.mouse_controller import MouseController
-from src.profile_manager import ProfileManager
+from src.profile_manager import ProfileManager, merge_settings
+from src.config import ProfileConfig
 from src.blendshape_processor import BlendshapeProcessor
+from src.event_log import event_log
+from src.profile_watcher import ProfileWatcher
+from src.inference_governor import InferenceGovernor
+from src.stage_runtime import Stage, StageGraph, DROP_OLDEST
+from src.metrics import registry, MetricsServer
+from src.sampling_profiler import SamplingProfiler
+from src.preview import PreviewPublisher
 import threading
-import numpy as np
+import time
 class Pipeline():
     _instance = None
+    # Builds the frame source; the soak test swaps in a ReplayCamera
+    camera_factory = CameraThread
     
     def __new__(cls):
         if cls._instance is None:
@@ -14,35 +24,206 @@ class Pipeline():
             cls._instance.is_started = False
             cls._instance.camera_thread = None
             cls._instance.profile_manager = None
+            cls._instance.profile_watcher = None
             cls._instance.face_processor = None
             cls._instance.mouse_controller = None 
             cls._instance.voice_processor = None
             cls._instance.blendshape_processor = None
+            cls._instance.governor = None
+            cls._instance.graph = None
+            cls._instance.metrics_server = None
+            cls._instance.preview = None
+            cls._instance.profiler = SamplingProfiler()
+            cls._instance.ready = threading.Event()
+            cls._instance.startup_times = {}
             cls._instance.latest_processed_frame = None
             cls._instance.lock = threading.Lock()
         return cls._instance
         
-    def start(self):
+    def start(self, wait=True):
+        """Build the stages, then load the model and open the camera concurrently.
+
+        With ``wait=False`` the slow part runs on a "pipeline-warmup" thread so
+        the caller can build the GUI meanwhile; ``ready`` is set once frames flow.
+        """
         if not self.is_started:
+            start_time = time.perf_counter()
+            self.ready.clear()
+            event_log.start()
             self.profile_manager = ProfileManager()
 
             self.mouse_controller = MouseController()
             self.blendshape_processor = BlendshapeProcessor(self.profile_manager)
+            self.camera_thread = self.camera_factory()
+
+            # camera -> face -> {mouse, gestures}; each stage runs on its own thread.
+            # The camera->face mailbox keeps only the newest frame so a slow model
+            # never works on stale frames. Face results arrive through FaceProcessor's
+            # callbacks (the MediaPipe thread in LIVE_STREAM), so those edges have
+            # no producing stage.
+            graph = StageGraph()
+            graph.add(Stage("camera", source=self.camera_thread.read,
+                            on_start=self.camera_thread.ensure_open, on_stop=self.camera_thread.release))
+            graph.add(Stage("face", handler=lambda item: self.face_processor.process_frame(*item)))
+            graph.add(Stage("mouse", handler=lambda item: self.mouse_controller.update_loop(*item)))
+            graph.add(Stage("gestures", handler=lambda item: self.blendshape_processor.update_blendshape(*item)))
+            graph.connect("camera", "face", capacity=1, policy=DROP_OLDEST)
+            mouse_edge = graph.connect(None, "mouse", capacity=4, policy=DROP_OLDEST)
+            gesture_edge = graph.connect(None, "gestures", capacity=16, policy=DROP_OLDEST)
+            self.graph = graph
+
+            # The model variant comes from the profile's face_processing.model (see apply_profile)
+            self.face_processor = FaceProcessor(lambda *result: mouse_edge.put(result),
+                                                blendshape_call_back=lambda *result: gesture_edge.put(result))
+            self.apply_profile()
+
+            # Flipped/downscaled GUI preview, produced only while a window is visible
+            self.preview = PreviewPublisher(self.face_processor.frame_slot,
+                                            is_intact=getattr(self.camera_thread, "is_intact", None))
+            graph.add(Stage("preview", source=self.preview.poll))
 
-            self.face_processor = FaceProcessor(self.mouse_controller.update_loop, "src/tasks/face_landmarker.task", self.blendshape_processor.update_blendshape)
-            self.face_processor.initialize()
+            self.governor = InferenceGovernor(self.mouse_controller, blendshape_processor=self.blendshape_processor)
+            self.face_processor.governor = self.governor
+            self.mouse_controller.activity_callback = self.governor.notify_activity
+            self.blendshape_processor.activity_callback = self.governor.notify_activity
 
-            self.camera_thread = CameraThread()
-            self.camera_thread.set_frame_callback(self.face_processor.process_frame)
-            self.camera_thread.start() 
+            self.profile_watcher = ProfileWatcher(self.profile_manager)
+            self.profile_watcher.subscribe(self.mouse_controller.apply_config)
+            self.profile_watcher.subscribe(self.blendshape_processor.apply_config)
+            self.profile_watcher.subscribe(self.face_processor.apply_config)
 
             # self.voice_processor.initialize()
 
             self.is_started = True
-            print(f"Pipeline started.")
+            self.startup_times["construct"] = time.perf_counter() - start_time
+            warmup = threading.Thread(target=self._warm_up, args=(start_time,), name="pipeline-warmup", daemon=True)
+            warmup.start()
+            if wait:
+                self.ready.wait()
         else:
             print(f"Pipeline is already running.")
 
+    def _warm_up(self, start_time):
+        def timed(name, fn):
+            begin = time.perf_counter()
+            fn()
+            self.startup_times[name] = time.perf_counter() - begin
+
+        # Model construction and camera open are both slow and independent
+        workers = [
+            threading.Thread(target=timed, args=("model", self.face_processor.initialize), name="warmup-model"),
+            threading.Thread(target=timed, args=("camera", self.camera_thread.open), name="warmup-camera"),
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        if not self.graph.start():
+            print("Pipeline stages failed to start")
+        self._register_metrics()
+        self.metrics_server = MetricsServer(registry)
+        self.metrics_server.start()
+        self.profile_watcher.start()
+        self.profiler.bind_hotkey()
+
+        self.startup_times["total"] = time.perf_counter() - start_time
+        self.ready.set()
+        print(f"Pipeline started in {self.startup_times['total']:.2f}s.")
+
+    def apply_profile(self, config=None):
+        """Hand one immutable ProfileConfig snapshot to every stage."""
+        try:
+            if config is None:
+                config = self.profile_manager.get_config()
+        except ValueError as e:
+            print(f"Invalid profile: {e}")
+            return False
+        
+        self.mouse_controller.apply_config(config)
+        self.blendshape_processor.apply_config(config)
+        self.face_processor.apply_config(config)
+        return True
+
+    def update_settings(self, changes):
+        """Validate a partial settings change, save it to the current profile and apply it as one snapshot.
+
+        Raises ValueError, without saving anything, if the result is not a valid profile.
+        """
+        name = self.profile_manager.get_current_profile_name()
+        settings = merge_settings(self.profile_manager.get_profile_settings(name), changes)
+        config = ProfileConfig.from_dict(name, settings)
+        self.profile_manager.save_profile(name, settings)
+        self.apply_profile(config)
+        return config
+
+    def switch_profile(self, profile_name):
+        """Make an existing profile current and apply it to every stage."""
+        if not self.profile_manager.profile_exists(profile_name):
+            print(f"Profile '{profile_name}' not found")
+            return False
+        self.profile_manager.load_profile(profile_name)
+        try:
+            config = self.profile_manager.get_config(profile_name)
+        except ValueError as e:
+            print(f"Invalid profile: {e}")
+            return False
+        return self.apply_profile(config)
+
+    def set_tracking(self, active):
+        if active:
+            self.mouse_controller.start_tracking()
+        else:
+            self.mouse_controller.stop_tracking()
+
+    def set_mode(self, mode):
+        """Switch the state machine: "mouse", "keyboard" or "toggle"."""
+        mc = self.mouse_controller
+        if mode == "toggle":
+            mouse = not mc.state_machine
+        elif mode in ("mouse", "keyboard"):
+            mouse = mode == "mouse"
+        else:
+            raise ValueError(f"Unknown mode '{mode}'")
+        mc.set_state_machine(mouse)
+        return "mouse" if mouse else "keyboard"
+
+    def handle_record_command(self, arg):
+        """Control socket handler: ``start``, ``stop PATH`` or ``status``.
+
+        ``stop`` writes PATH.cursor.npz (timestamp_eval, predictor_eval) and
+        PATH.blendshapes.npz (onset_eval).
+        """
+        parts = arg.split(maxsplit=1)
+        action = parts[0].lower() if parts else "status"
+        fp, bp = self.face_processor, self.blendshape_processor
+        if action == "start":
+            fp.start_recording()
+            bp.start_recording()
+        elif action == "stop":
+            if len(parts) < 2:
+                return {"ok": False, "error": "use record stop PATH"}
+            base = parts[1].strip()
+            if base.endswith(".npz"):
+                base = base[:-4]
+            frames = {"cursor_frames": len(fp.recorder or ()), "blendshape_frames": len(bp.recorder or ())}
+            fp.stop_recording(f"{base}.cursor.npz")
+            bp.stop_recording(f"{base}.blendshapes.npz")
+            return {"ok": True, "recording": False, **frames}
+        elif action != "status":
+            return {"ok": False, "error": "use record start|stop PATH|status"}
+        return {"ok": True, "recording": fp.recorder is not None}
+
+    def status(self):
+        mc = self.mouse_controller
+        return {
+            "profile": self.profile_manager.get_current_profile_name(),
+            "tracking": mc.tracking_active,
+            "mode": "mouse" if mc.state_machine else "keyboard",
+            "processing_mode": self.face_processor.get_current_mode(),
+            "governor": self.governor.state if self.governor else None,
+        }
+
     def get_profile_manager(self):
         return self.profile_manager
     
@@ -56,14 +237,57 @@ class Pipeline():
         return self.mouse_controller
     def get_blendshape_processor(self):
         return self.blendshape_processor
+
+    def get_governor(self):
+        return self.governor
+
+    def get_preview(self):
+        return self.preview
+
+    def get_profiler(self):
+        return self.profiler
+
+    def _register_metrics(self):
+        """Gauges computed from stage/governor state only when the endpoint is scraped."""
+        graph = self.graph
+        registry.gauge("queue_depth", "Items waiting in each stage inbox",
+                       lambda: [({"stage": name}, len(edge)) for name, edge in graph.edges.items()])
+        registry.gauge("frames_dropped", "Items dropped by each stage inbox",
+                       lambda: [({"stage": name}, edge.dropped) for name, edge in graph.edges.items()])
+        registry.gauge("stage_busy_seconds", "Time each stage spent in its handler",
+                       lambda: [({"stage": name}, s.busy_time) for name, s in graph.stages.items()])
+        registry.gauge("stage_alive", "1 if the stage thread is running",
+                       lambda: [({"stage": name}, int(s.is_alive())) for name, s in graph.stages.items()])
+        governor = self.governor
+        registry.gauge("governor_rate_hz", "Inference rate chosen by the governor (0 = camera rate)",
+                       lambda: [({"state": governor.state}, governor.rates[governor.state] or 0)])
+        registry.gauge("governor_cpu_saved_seconds", "Estimated CPU time saved by skipped inferences",
+                       lambda: governor.metrics()["cpu_saved_s"])
+
+    def health(self):
+        """Per-stage liveness, counters and inbox depth/drops."""
+        return self.graph.health() if self.graph else {}
     
     def stop(self):
         if self.is_started:
-            if self.camera_thread:
-                self.camera_thread.stop_flag.set()
+            self.ready.wait(10.0)
+            if self.profiler.is_running:
+                self.profiler.stop()
+            if self.profile_watcher:
+                self.profile_watcher.stop()
+
+            if self.metrics_server:
+                self.metrics_server.stop()
+
+            if self.graph:
+                self.graph.stop()
 
             if self.face_processor:
                 self.face_processor.close()
+
+            if self.profile_manager:
+                self.profile_manager.flush()
+            event_log.stop()
             self.is_started = False
             print(f"Pipeline stopped.")
         else:
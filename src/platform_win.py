@@ -0,0 +1,56 @@
+"""Windows-only helpers, imported on first use.
+
+pywin32 is only needed (and only installed) on Windows; elsewhere these
+helpers are no-ops so the rest of the pipeline imports and runs unchanged.
+"""
+_win32 = None
+
+
+def _load():
+    global _win32
+    if _win32 is None:
+        try:
+            import win32con
+            import win32gui
+            _win32 = (win32gui, win32con)
+        except ImportError:
+            _win32 = ()
+    return _win32
+
+
+def available():
+    return bool(_load())
+
+
+def set_window_always_on_top(win_name):
+    win32 = _load()
+    if not win32:
+        return False
+    win32gui, win32con = win32
+    hwnd = win32gui.FindWindow(None, win_name)
+    if hwnd != 0:
+        win32gui.SetWindowPos(
+            hwnd,
+            win32con.HWND_TOPMOST,
+            0, 0, 0, 0,
+            win32con.SWP_NOMOVE | win32con.SWP_NOSIZE
+        )
+        return True
+    return False
+
+
+def is_window_covered(hwnd):
+    """True if another (foreground) window fully covers ``hwnd``; always False without pywin32."""
+    win32 = _load()
+    if not win32 or not hwnd:
+        return False
+    win32gui, _ = win32
+    try:
+        foreground = win32gui.GetForegroundWindow()
+        if not foreground or foreground == hwnd or win32gui.IsIconic(foreground):
+            return False
+        left, top, right, bottom = win32gui.GetWindowRect(hwnd)
+        f_left, f_top, f_right, f_bottom = win32gui.GetWindowRect(foreground)
+    except Exception:
+        return False
+    return f_left <= left and f_top <= top and f_right >= right and f_bottom >= bottom
@@ -0,0 +1,111 @@
+"""Replay evaluation of the latency-compensating cursor predictor.
+
+For each prediction horizon the trace is run through ``CursorPredictor`` and
+the output at callback time is compared with the head position at that
+moment (interpolated from the capture-stamped samples). Reports the residual
+lag while moving and the overshoot past the target after the head stops::
+
+    python -m src.predictor_eval trace.npz --horizons 0 20 40 60 80 100
+    python -m src.predictor_eval --synthetic
+"""
+import argparse
+
+import numpy as np
+
+from src.cursor_predictor import CursorPredictor
+from src.replay import load_trace
+
+MOVING_SPEED = 50.0
+STILL_SPEED = 10.0
+
+
+def synthetic_trace(moves=40, fps=30.0, delay_ms=60.0, noise_px=0.3, seed=0):
+    """Point-to-point head moves (minimum-jerk) separated by holds, in camera pixels."""
+    rng = np.random.default_rng(seed)
+    points = [np.array([320.0, 240.0])]
+    segments = []
+    for _ in range(moves):
+        target = points[-1] + rng.uniform(-40, 40, 2)
+        segments.append((points[-1], target, rng.uniform(0.25, 0.6), rng.uniform(0.3, 0.8)))
+        points.append(target)
+
+    total = sum(move + hold for _, _, move, hold in segments)
+    capture_ts = np.arange(int(total * fps)) / fps
+    cursor = np.zeros((len(capture_ts), 2))
+    start_t = 0.0
+    for start, target, move, hold in segments:
+        mask = (capture_ts >= start_t) & (capture_ts < start_t + move + hold)
+        s = np.clip((capture_ts[mask] - start_t) / move, 0.0, 1.0)
+        s = 10 * s**3 - 15 * s**4 + 6 * s**5
+        cursor[mask] = start + s[:, None] * (target - start)
+        start_t += move + hold
+    cursor[capture_ts >= start_t] = points[-1]
+    cursor += rng.normal(0, noise_px, cursor.shape)
+    callback_ts = capture_ts + delay_ms / 1000.0 + rng.normal(0, 0.005, len(capture_ts)).clip(-0.02, 0.02)
+    return {"capture_ts": capture_ts, "callback_ts": np.maximum.accumulate(callback_ts), "cursor": cursor}
+
+
+def evaluate_horizon(trace, horizon, predictor=None):
+    capture_ts = np.asarray(trace["capture_ts"], dtype=np.float64)
+    callback_ts = np.asarray(trace["callback_ts"], dtype=np.float64)
+    cursor = np.asarray(trace["cursor"], dtype=np.float64)
+    predictor = predictor or CursorPredictor(max_horizon=max(horizon, 1e-3))
+    predictor.reset()
+
+    out = np.array([predictor.step(pos, t, horizon) for t, pos in zip(capture_ts, cursor)])
+    # Where the head actually is when the output is used
+    truth = np.stack([np.interp(callback_ts, capture_ts, cursor[:, k]) for k in range(2)], axis=1)
+    velocity = np.gradient(truth, callback_ts, axis=0)
+    speed = np.hypot(velocity[:, 0], velocity[:, 1])
+
+    err = out - truth
+    moving = speed > MOVING_SPEED
+    direction = np.zeros_like(velocity)
+    direction[moving] = velocity[moving] / speed[moving, None]
+    along = np.sum(err * direction, axis=1)
+
+    # Overshoot: how far past the target the output goes along the last motion direction
+    last_dir = np.zeros(2)
+    overshoot = []
+    for i in range(len(out)):
+        if moving[i]:
+            last_dir = direction[i]
+        elif speed[i] < STILL_SPEED and last_dir.any():
+            overshoot.append(max(0.0, float(err[i] @ last_dir)))
+
+    lag = -along[moving] / speed[moving] if moving.any() else np.zeros(1)
+    return {
+        "horizon_ms": horizon * 1000,
+        "lag_ms": float(np.median(lag) * 1000),
+        "overshoot_px_p95": float(np.percentile(overshoot, 95)) if overshoot else 0.0,
+        "overshoot_px_max": float(np.max(overshoot)) if overshoot else 0.0,
+        "rms_error_px": float(np.sqrt(np.mean(np.sum(err ** 2, axis=1)))),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("trace", nargs="?", help=".npz trace recorded by FaceProcessor")
+    parser.add_argument("--synthetic", action="store_true", help="use a generated trace")
+    parser.add_argument("--horizons", type=float, nargs="+", default=[0, 20, 40, 60, 80, 100],
+                        help="prediction horizons in ms")
+    args = parser.parse_args()
+
+    if args.trace:
+        trace = load_trace(args.trace)
+    elif args.synthetic:
+        trace = synthetic_trace()
+    else:
+        parser.error("give a trace path or --synthetic")
+
+    latency = np.asarray(trace["callback_ts"]) - np.asarray(trace["capture_ts"])
+    print(f"frames: {len(trace['cursor'])}, measured latency: {np.median(latency) * 1000:.1f} ms (median)")
+    print(f"{'horizon':>8} {'lag':>8} {'overshoot p95':>14} {'overshoot max':>14} {'rms err':>9}")
+    for horizon_ms in args.horizons:
+        r = evaluate_horizon(trace, horizon_ms / 1000.0)
+        print(f"{r['horizon_ms']:6.0f}ms {r['lag_ms']:6.1f}ms {r['overshoot_px_p95']:12.2f}px "
+              f"{r['overshoot_px_max']:12.2f}px {r['rms_error_px']:7.2f}px")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import threading
+import time
+
+from src.lazy_import import lazy_import
+from src.snapshot import SnapshotSlot
+
+cv2 = lazy_import("cv2")
+
+
+class PreviewPublisher:
+    """Mirror-flipped, downscaled preview frames for the GUI, made off the Tk thread.
+
+    Runs as the pipeline's "preview" source stage: while a window is visible
+    it reads the newest processed frame (by reference, from FaceProcessor's
+    frame slot) at most ``fps`` times a second, and publishes a new image in
+    ``slot``. Published images are never written again, so the GUI can hand
+    them to Tk without copying and redraw only when ``slot.latest.seq`` moves.
+    Nothing is produced while no window is visible.
+
+    The source frame is a camera ring buffer that may be rewritten while it
+    is read; ``is_intact(frame, timestamp)`` is checked after the read and a
+    torn image is dropped (the next poll takes a newer frame).
+    """
+
+    def __init__(self, source_slot, fps=15.0, max_width=640, is_intact=None):
+        self.source_slot = source_slot
+        self.is_intact = is_intact
+        self.fps = fps
+        self.max_width = max_width
+        self.slot = SnapshotSlot()
+        self._visible = threading.Event()
+        self._source_seq = 0
+        self._next_time = 0.0
+
+    @property
+    def visible(self):
+        return self._visible.is_set()
+
+    def set_visible(self, visible):
+        if visible:
+            self._visible.set()
+        else:
+            self._visible.clear()
+
+    def set_rate(self, fps):
+        self.fps = fps
+
+    def poll(self):
+        # Short waits so the stage can notice stop() while the window is hidden
+        if not self._visible.wait(0.2):
+            return None
+        delay = self._next_time - time.perf_counter()
+        if delay > 0:
+            time.sleep(min(delay, 0.2))
+            return None
+        self._next_time = time.perf_counter() + (1.0 / self.fps if self.fps else 0.0)
+
+        snapshot = self.source_slot.latest
+        if snapshot.seq == self._source_seq or snapshot.data is None:
+            return None
+        self._source_seq = snapshot.seq
+        frame = snapshot.data
+        height, width = frame.shape[:2]
+        if width > self.max_width:
+            frame = cv2.resize(frame, (self.max_width, round(height * self.max_width / width)),
+                               interpolation=cv2.INTER_AREA)
+        image = cv2.flip(frame, 1)
+        if self.is_intact is not None and not self.is_intact(snapshot.data, snapshot.timestamp):
+            return None
+        self.slot.publish(image, snapshot.timestamp)
+        return None
+
+    def latest(self):
+        return self.slot.latest
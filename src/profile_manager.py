@@ -1,14 +1,151 @@
 import os
 import json
+import copy
+import atexit
+import threading
 from typing import Dict, Any, List, Optional
+from src.config import ProfileConfig
+
+
+def merge_settings(d, u):
+    """Recursively update settings dict ``d`` with ``u`` and return it."""
+    for k, v in u.items():
+        if isinstance(v, dict) and k in d and isinstance(d[k], dict):
+            d[k] = merge_settings(d[k], v)
+        else:
+            d[k] = v
+    return d
 
 class ProfileManager:
-    def __init__(self, profiles_dir="profiles"):
+    """Profiles are kept in memory; disk writes happen on a background writer.
+
+    Every profile found in ``profiles_dir`` is read once at construction.
+    After that, loads return a copy of the cached dict and saves only replace
+    the cached dict and mark it dirty. The writer thread coalesces dirty
+    profiles and writes them at most every ``flush_interval_ms`` through a
+    temp file and an atomic rename, so callers on the Tk thread never block
+    on disk and a profile file is never left half written.
+    """
+
+    def __init__(self, profiles_dir="profiles", flush_interval_ms=500):
         self.profiles_dir = profiles_dir
         self.current_profile = "default"
-        
-        if not os.path.exists(self.get_profile_path("default")):
+        self.flush_interval = flush_interval_ms / 1000.0
+
+        self._cache: Dict[str, Dict[str, Any]] = {}
+        self._configs: Dict[str, ProfileConfig] = {}
+        self._written_stamps = {}
+        self._dirty = set()
+        self._deleted = set()
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop_flag = threading.Event()
+
+        self._preload()
+        if "default" not in self._cache:
             self.create_default_profile()
+
+        self._writer = threading.Thread(target=self._writer_loop, name="profile-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def _preload(self):
+        if not os.path.exists(self.profiles_dir):
+            return
+        for file in os.listdir(self.profiles_dir):
+            if file.endswith(".json"):
+                profile_name = os.path.splitext(file)[0]
+                try:
+                    self._cache[profile_name] = self._read_profile_file(profile_name)
+                except ValueError as e:
+                    print(e)
+
+    def _read_profile_file(self, profile_name: str) -> Dict[str, Any]:
+        try:
+            with open(self.get_profile_path(profile_name), 'r') as f:
+                return json.load(f)
+        except json.JSONDecodeError:
+            raise ValueError(f"Invalid JSON format in profile '{profile_name}'")
+
+    def _writer_loop(self):
+        while not self._stop_flag.is_set():
+            self._wake.wait()
+            # Let further changes within the interval coalesce into one write
+            self._stop_flag.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error writing profiles: {e}")
+
+    def flush(self) -> None:
+        """Write every dirty profile and apply pending deletes now."""
+        with self._flush_lock:
+            with self._lock:
+                pending = {name: self._cache[name] for name in self._dirty if name in self._cache}
+                deleted = set(self._deleted)
+                self._dirty.clear()
+                self._deleted.clear()
+
+            if pending:
+                os.makedirs(self.profiles_dir, exist_ok=True)
+            for profile_name, profile_data in pending.items():
+                path = self.get_profile_path(profile_name)
+                tmp_path = path + ".tmp"
+                with open(tmp_path, 'w') as f:
+                    json.dump(profile_data, f, indent=4)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, path)
+                st = os.stat(path)
+                with self._lock:
+                    self._written_stamps[profile_name] = (st.st_mtime_ns, st.st_size)
+
+            for profile_name in deleted:
+                path = self.get_profile_path(profile_name)
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def reload_external(self, profile_name: str, stamp) -> Optional[tuple]:
+        """Adopt a profile file changed outside this process.
+
+        ``stamp`` is the file's (mtime_ns, size). Returns (old_config, new_config),
+        or None when the change is our own write, a local change is still
+        pending, or the content is unchanged. Raises ValueError if the file is
+        not a valid profile.
+        """
+        with self._lock:
+            if profile_name in self._dirty or self._written_stamps.get(profile_name) == stamp:
+                return None
+        
+        data = self._read_profile_file(profile_name)
+        new_config = ProfileConfig.from_dict(profile_name, data)
+        
+        with self._lock:
+            if profile_name in self._dirty or self._cache.get(profile_name) == data:
+                return None
+            old_config = self._configs.get(profile_name)
+            if old_config is None and profile_name in self._cache:
+                try:
+                    old_config = ProfileConfig.from_dict(profile_name, self._cache[profile_name])
+                except ValueError:
+                    old_config = None
+            self._cache[profile_name] = data
+            self._configs[profile_name] = new_config
+            self._written_stamps[profile_name] = stamp
+        return old_config, new_config
+
+    def close(self) -> None:
+        self._stop_flag.set()
+        self._wake.set()
+        self.flush()
+
+    def _mark_dirty(self, profile_name: str) -> None:
+        self._configs.pop(profile_name, None)
+        self._dirty.add(profile_name)
+        self._deleted.discard(profile_name)
+        self._wake.set()
     
     def get_profile_path(self, profile_name: str) -> str:
         return os.path.join(self.profiles_dir, f"{profile_name}.json")
@@ -58,17 +195,8 @@ class ProfileManager:
         self.save_profile("default", default_settings)
         
     def list_profiles(self) -> List[str]:
-        if not os.path.exists(self.profiles_dir):
-            return []
-        
-        profiles = []
-        
-        for file in os.listdir(self.profiles_dir):
-            if file.endswith(".json"):
-                profile_name = os.path.splitext(file)[0]
-                profiles.append(profile_name)
-        
-        return profiles
+        with self._lock:
+            return sorted(self._cache)
     
     def create_profile(self, profile_name: str) -> bool:
         try:
@@ -85,6 +213,11 @@ class ProfileManager:
             return False
         
     def profile_exists(self, profile_name: str) -> bool:
+        with self._lock:
+            if profile_name in self._cache:
+                return True
+            if profile_name in self._deleted:
+                return False
         return os.path.exists(self.get_profile_path(profile_name))
     
     def load_profile(self, profile_name: str) -> Dict[str, Any]:
@@ -92,18 +225,18 @@ class ProfileManager:
             print(f"Profile '{profile_name}' not found, creating with defaults")
             self.create_profile(profile_name)
         
-        try:
-            with open(self.get_profile_path(profile_name), 'r') as f:
-                profile_data = json.load(f)
-            
-            self.current_profile = profile_name
-            return profile_data
-        except json.JSONDecodeError:
-            raise ValueError(f"Invalid JSON format in profile '{profile_name}'")
+        with self._lock:
+            if profile_name not in self._cache:
+                self._cache[profile_name] = self._read_profile_file(profile_name)
+            profile_data = copy.deepcopy(self._cache[profile_name])
+        
+        self.current_profile = profile_name
+        return profile_data
     
     def save_profile(self, profile_name: str, profile_data: Dict[str, Any]) -> None:
-        with open(self.get_profile_path(profile_name), 'w') as f:
-            json.dump(profile_data, f, indent=4)
+        with self._lock:
+            self._cache[profile_name] = copy.deepcopy(profile_data)
+            self._mark_dirty(profile_name)
         
         self.current_profile = profile_name
     
@@ -112,7 +245,12 @@ class ProfileManager:
             raise ValueError("Cannot delete the default profile")
         
         if self.profile_exists(profile_name):
-            os.remove(self.get_profile_path(profile_name))
+            with self._lock:
+                self._cache.pop(profile_name, None)
+                self._configs.pop(profile_name, None)
+                self._dirty.discard(profile_name)
+                self._deleted.add(profile_name)
+                self._wake.set()
             
             if self.current_profile == profile_name:
                 self.current_profile = "default"
@@ -128,6 +266,19 @@ class ProfileManager:
         profile = profile_name or self.current_profile
         return self.load_profile(profile)
     
+    def get_config(self, profile_name: Optional[str] = None) -> ProfileConfig:
+        """Immutable config snapshot of a profile, rebuilt only after the profile changes."""
+        profile = profile_name or self.current_profile
+        if profile not in self._cache:
+            self.load_profile(profile)
+        
+        with self._lock:
+            config = self._configs.get(profile)
+            if config is None:
+                config = ProfileConfig.from_dict(profile, self._cache[profile])
+                self._configs[profile] = config
+            return config
+    
     def update_profile_settings(self, new_settings: Dict[str, Any], profile_name: Optional[str] = None) -> None:
         profile = profile_name or self.current_profile
         
@@ -136,14 +287,5 @@ class ProfileManager:
             return
         
         current_settings = self.load_profile(profile)
-        
-        def update_dict(d, u):
-            for k, v in u.items():
-                if isinstance(v, dict) and k in d and isinstance(d[k], dict):
-                    d[k] = update_dict(d[k], v)
-                else:
-                    d[k] = v
-            return d
-        
-        updated_settings = update_dict(current_settings, new_settings)
+        updated_settings = merge_settings(current_settings, new_settings)
         self.save_profile(profile, updated_settings)
\ No newline at end of file
@@ -0,0 +1,98 @@
+import os
+import threading
+
+from src.config import diff_configs
+
+
+class ProfileWatcher:
+    """Watches the profiles directory and pushes validated config changes to subscribers.
+
+    A background thread polls file mtimes/sizes every ``interval`` seconds,
+    which is cheap and works the same on every platform. Changed files are
+    parsed and validated on that thread; files written by our own
+    ProfileManager are recognised and skipped. When the active profile
+    changes, each subscriber is called with the new config on the watcher
+    thread; subscribers that cannot take it there (the face model, the GUI)
+    hand it over to their own thread.
+    """
+
+    def __init__(self, profile_manager, interval=0.5):
+        self.profile_manager = profile_manager
+        self.interval = interval
+        self.subscribers = []
+        self._stamps = {}
+        self._stop_flag = threading.Event()
+        self._thread = None
+
+    def subscribe(self, callback):
+        self.subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self.subscribers:
+            self.subscribers.remove(callback)
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stamps = self._scan()
+        self._stop_flag.clear()
+        self._thread = threading.Thread(target=self._watch_loop, name="profile-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_flag.set()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+    def _scan(self):
+        stamps = {}
+        profiles_dir = self.profile_manager.profiles_dir
+        if not os.path.isdir(profiles_dir):
+            return stamps
+        for file in os.listdir(profiles_dir):
+            if not file.endswith(".json"):
+                continue
+            try:
+                st = os.stat(os.path.join(profiles_dir, file))
+            except OSError:
+                continue
+            stamps[os.path.splitext(file)[0]] = (st.st_mtime_ns, st.st_size)
+        return stamps
+
+    def _watch_loop(self):
+        while not self._stop_flag.wait(self.interval):
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"Profile watcher error: {e}")
+
+    def poll(self):
+        stamps = self._scan()
+        for profile_name, stamp in stamps.items():
+            if self._stamps.get(profile_name) == stamp:
+                continue
+            self._stamps[profile_name] = stamp
+            try:
+                result = self.profile_manager.reload_external(profile_name, stamp)
+            except (OSError, ValueError) as e:
+                print(f"Ignoring invalid profile '{profile_name}': {e}")
+                continue
+            if result is None or profile_name != self.profile_manager.get_current_profile_name():
+                continue
+
+            old_config, new_config = result
+            changed = diff_configs(old_config, new_config)
+            if changed:
+                print(f"Profile '{profile_name}' changed on disk: {', '.join(sorted(changed))}")
+                self._notify(new_config)
+
+        for profile_name in set(self._stamps) - set(stamps):
+            del self._stamps[profile_name]
+
+    def _notify(self, config):
+        for callback in list(self.subscribers):
+            try:
+                callback(config)
+            except Exception as e:
+                print(f"Profile subscriber error: {e}")
@@ -0,0 +1,73 @@
+import time
+
+import numpy as np
+
+from src.event_log import emit, PIPELINE, TRACE_SAVED
+
+
+class TraceRecorder:
+    """Collects per-frame rows in memory and saves them as a compressed .npz trace."""
+
+    def __init__(self, fields):
+        self.fields = tuple(fields)
+        self.rows = {field: [] for field in self.fields}
+
+    def __len__(self):
+        return len(self.rows[self.fields[0]])
+
+    def append(self, *values):
+        for field, value in zip(self.fields, values):
+            self.rows[field].append(value)
+
+    def save(self, path):
+        save_trace(path, **{field: np.asarray(rows) for field, rows in self.rows.items()})
+
+
+def save_trace(path, **arrays):
+    np.savez_compressed(path, **arrays)
+    emit(PIPELINE, TRACE_SAVED, path, len(next(iter(arrays.values()), ())))
+
+
+def load_trace(path):
+    with np.load(path) as data:
+        return {key: data[key] for key in data.files}
+
+
+class ReplayCamera:
+    """CameraThread stand-in that hands out recorded RGB frames at a fixed rate."""
+
+    def __init__(self, frames, fps=30.0, loop=True):
+        self.frames = frames
+        self.fps = fps
+        self.loop = loop
+        self.index = 0
+        self.next_time = None
+        self.current_frame = None
+
+    def open(self):
+        self.next_time = time.perf_counter()
+        return bool(self.frames)
+
+    def ensure_open(self):
+        return self.next_time is not None or self.open()
+
+    def release(self):
+        self.next_time = None
+
+    def read(self):
+        if self.index >= len(self.frames):
+            if not self.loop:
+                time.sleep(0.1)
+                return None
+            self.index = 0
+        delay = self.next_time - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        self.next_time = max(self.next_time + 1.0 / self.fps, time.perf_counter())
+        frame = self.frames[self.index]
+        self.index += 1
+        self.current_frame = frame
+        return frame, time.perf_counter()
+
+    def get_frame(self):
+        return self.current_frame
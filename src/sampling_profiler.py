@@ -0,0 +1,177 @@
+"""Sampling profiler for the running app.
+
+A background thread reads ``sys._current_frames()`` at a fixed rate and
+counts each thread's stack, rooted at the thread's name. The result is
+written as collapsed stacks ("thread;outer;...;inner count" per line), the
+input format of flamegraph.pl, speedscope and inferno::
+
+    flamegraph.pl logs/profiles/profile-20260101-120000.folded > profile.svg
+
+Start/stop it with ``toggle()`` (GUI button, Ctrl+Alt+Shift+P) or from the
+control socket (``profiler start|stop|status|SECONDS``).
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+DEFAULT_HOTKEY = "ctrl+alt+shift+p"
+
+
+class SamplingProfiler:
+
+    def __init__(self, interval=0.005, output_dir="logs/profiles", max_depth=64):
+        self.interval = interval
+        self.output_dir = output_dir
+        self.max_depth = max_depth
+        self.samples = Counter()
+        self.thread_samples = Counter()
+        self.sample_count = 0
+        self.sampling_time = 0.0
+        self.started_at = None
+        self.stopped_at = None
+        self.deadline = None
+        self.last_path = None
+        self._labels = {}
+        self._lock = threading.Lock()
+        self._stop_flag = threading.Event()
+        self._thread = None
+
+    @property
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, duration=None):
+        """Start sampling; with ``duration`` (seconds) it stops and writes the file by itself."""
+        with self._lock:
+            if self.is_running:
+                return False
+            self.samples.clear()
+            self.thread_samples.clear()
+            self.sample_count = 0
+            self.sampling_time = 0.0
+            self.started_at = time.perf_counter()
+            self.stopped_at = None
+            self.deadline = self.started_at + duration if duration else None
+            self._stop_flag.clear()
+            self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+            self._thread.start()
+        print(f"Profiler started ({1 / self.interval:.0f} Hz{f', {duration:g}s' if duration else ''})")
+        return True
+
+    def stop(self):
+        """Stop sampling and write the collapsed stacks; return the file path (None if not running)."""
+        with self._lock:
+            thread = self._thread
+            if thread is None:
+                return None
+            self._stop_flag.set()
+            if thread is not threading.current_thread():
+                thread.join()
+            self._thread = None
+            self.stopped_at = time.perf_counter()
+            return self.write()
+
+    def toggle(self, duration=None):
+        if self.is_running:
+            return self.stop()
+        self.start(duration)
+        return None
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop_flag.wait(self.interval):
+            begin = time.perf_counter()
+            self.sample(skip=own)
+            now = time.perf_counter()
+            self.sampling_time += now - begin
+            if self.deadline is not None and now >= self.deadline:
+                # Timed run: write from here, stop() will not join ourselves
+                threading.Thread(target=self.stop, name="sampling-profiler-stop", daemon=True).start()
+                return
+
+    def sample(self, skip=None):
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == skip:
+                continue
+            thread = names.get(ident, f"thread-{ident}")
+            stack = []
+            while frame is not None and len(stack) < self.max_depth:
+                stack.append(self._label(frame.f_code))
+                frame = frame.f_back
+            stack.append(thread)
+            self.samples[tuple(reversed(stack))] += 1
+            self.thread_samples[thread] += 1
+        self.sample_count += 1
+
+    def _label(self, code):
+        # One string per code object, so the sampler does not format on every tick
+        label = self._labels.get(code)
+        if label is None:
+            label = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+            label = label.replace(";", ":")
+            self._labels[code] = label
+        return label
+
+    def collapsed(self):
+        return [f"{';'.join(stack)} {count}" for stack, count in sorted(self.samples.items())]
+
+    def write(self, path=None):
+        if path is None:
+            os.makedirs(self.output_dir, exist_ok=True)
+            path = os.path.join(self.output_dir, time.strftime("profile-%Y%m%d-%H%M%S.folded"))
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(self.collapsed()) + "\n")
+        self.last_path = path
+        summary = self.status()
+        print(f"Profile saved to {path} ({summary['samples']} samples, "
+              f"overhead {summary['overhead']:.1%})")
+        for thread, count in self.thread_samples.most_common():
+            print(f"  {thread}: {count}")
+        return path
+
+    def status(self):
+        elapsed = ((self.stopped_at or time.perf_counter()) - self.started_at) if self.started_at else 0.0
+        return {
+            "running": self.is_running,
+            "samples": self.sample_count,
+            "threads": dict(self.thread_samples),
+            "elapsed_s": elapsed,
+            "overhead": self.sampling_time / elapsed if elapsed else 0.0,
+            "remaining_s": max(0.0, self.deadline - time.perf_counter()) if self.deadline and self.is_running else None,
+            "last_path": self.last_path,
+        }
+
+    def _toggle_in_background(self):
+        # Hotkey callbacks run on the keyboard hook thread; joining the sampler
+        # and writing the file there would stall every key event meanwhile
+        threading.Thread(target=self.toggle, name="sampling-profiler-toggle", daemon=True).start()
+
+    def bind_hotkey(self, hotkey=DEFAULT_HOTKEY):
+        try:
+            import keyboard
+            keyboard.add_hotkey(hotkey, self._toggle_in_background)
+        except Exception as e:
+            print(f"Could not bind profiler hotkey {hotkey}: {e}")
+            return False
+        return True
+
+    def handle_command(self, arg):
+        """Control socket handler: ``start``, ``stop``, ``status`` or a number of seconds."""
+        arg = arg.lower() or "status"
+        if arg == "start":
+            return {"ok": self.start(), "status": self.status()}
+        if arg == "stop":
+            path = self.stop()
+            return {"ok": path is not None, "path": path}
+        if arg == "status":
+            return {"ok": True, "status": self.status()}
+        try:
+            seconds = float(arg)
+        except ValueError:
+            return {"ok": False, "error": "use profiler start|stop|status|SECONDS"}
+        if seconds <= 0:
+            return {"ok": False, "error": "duration should be > 0"}
+        return {"ok": self.start(seconds), "status": self.status()}
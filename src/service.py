@@ -0,0 +1,263 @@
+"""Run the pipeline without the Tk GUI and control it from the command line.
+
+Start the service::
+
+    python -m src.service --headless --profile default
+
+Control a running service over its local socket::
+
+    python -m src.service --send start
+    python -m src.service --send "profile gaming"
+    python -m src.service --send "mode toggle"
+    python -m src.service --send status
+
+Commands: ``start`` / ``stop`` (tracking), ``profile NAME``,
+``mode mouse|keyboard|toggle``, ``status``, ``health``, ``shutdown``,
+``profiler start|stop|status|SECONDS`` (e.g. ``profiler 30`` samples the
+next 30 seconds and writes a collapsed-stack file), ``memory
+start|snapshot|stop`` (tracemalloc growth per subsystem), ``record
+start|stop PATH|status`` (cursor and blendshape traces for the offline
+evaluators).
+Each command gets one JSON line back.
+
+Every connection must start with ``auth TOKEN``. The service writes a fresh
+random token to ``~/.wasdhead/control_token`` (readable only by the user)
+when it starts, and ``--send`` reads it from there, so a web page or another
+user on the machine cannot drive the service. Connections that send
+something that looks like HTTP, a wrong token or an unknown command are
+dropped.
+"""
+import argparse
+import hmac
+import json
+import os
+import re
+import secrets
+import signal
+import socket
+import socketserver
+import threading
+
+from src.memory_audit import MemoryAudit
+
+DEFAULT_CONTROL_PORT = int(os.environ.get("WASDHEAD_CONTROL_PORT", 9465))
+DEFAULT_TOKEN_PATH = os.environ.get("WASDHEAD_CONTROL_TOKEN",
+                                    os.path.join(os.path.expanduser("~"), ".wasdhead", "control_token"))
+COMMANDS = ("start", "stop", "profile", "mode", "status", "health", "shutdown")
+# Request line or header line of an HTTP request (browsers, curl, ...)
+HTTP_LINE = re.compile(r"^([A-Z]+ \S+ HTTP/\d|[A-Za-z-]+: )")
+
+
+def write_token(path=DEFAULT_TOKEN_PATH):
+    """Write a new random token to ``path`` with owner-only permissions and return it."""
+    token = secrets.token_hex(16)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if os.path.exists(path):
+        os.remove(path)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(token)
+    return token
+
+
+def read_token(path=DEFAULT_TOKEN_PATH):
+    with open(path, encoding="utf-8") as f:
+        return f.read().strip()
+
+
+def dispatch(pipeline, line, shutdown_event=None):
+    """Run one control command against a started pipeline and return a JSON-able reply."""
+    parts = line.strip().split(maxsplit=1)
+    if not parts:
+        return {"ok": False, "error": "empty command"}
+    command, arg = parts[0].lower(), (parts[1].strip() if len(parts) > 1 else "")
+    try:
+        if command == "start":
+            pipeline.set_tracking(True)
+        elif command == "stop":
+            pipeline.set_tracking(False)
+        elif command == "profile":
+            if not arg:
+                return {"ok": False, "error": "profile needs a name"}
+            if not pipeline.switch_profile(arg):
+                return {"ok": False, "error": f"could not switch to profile '{arg}'"}
+        elif command == "mode":
+            pipeline.set_mode(arg or "toggle")
+        elif command == "status":
+            pass
+        elif command == "health":
+            return {"ok": True, "health": pipeline.health()}
+        elif command == "shutdown":
+            if shutdown_event is None:
+                return {"ok": False, "error": "shutdown not available"}
+            shutdown_event.set()
+        else:
+            return {"ok": False, "error": f"unknown command '{command}'"}
+    except ValueError as e:
+        return {"ok": False, "error": str(e)}
+    return {"ok": True, "status": pipeline.status()}
+
+
+class ControlServer:
+    """Line-based control socket on localhost; one JSON reply per command line."""
+
+    def __init__(self, pipeline, host="127.0.0.1", port=DEFAULT_CONTROL_PORT, shutdown_event=None,
+                 token_path=DEFAULT_TOKEN_PATH):
+        self.pipeline = pipeline
+        self.host = host
+        self.port = port
+        self.shutdown_event = shutdown_event
+        self.token_path = token_path
+        self.token = None
+        self.commands = {}
+        self._server = None
+        self._thread = None
+
+    def register(self, name, handler):
+        """Add a command; ``handler(arg)`` returns a JSON-able dict."""
+        self.commands[name] = handler
+
+    def handle(self, line):
+        parts = line.strip().split(maxsplit=1)
+        if parts and parts[0].lower() in self.commands:
+            try:
+                return self.commands[parts[0].lower()](parts[1].strip() if len(parts) > 1 else "")
+            except Exception as e:
+                return {"ok": False, "error": repr(e)}
+        return dispatch(self.pipeline, line, self.shutdown_event)
+
+    def is_known(self, line):
+        parts = line.strip().split(maxsplit=1)
+        return bool(parts) and (parts[0].lower() in self.commands or parts[0].lower() in COMMANDS)
+
+    def check_auth(self, line):
+        parts = line.strip().split()
+        return (len(parts) == 2 and parts[0].lower() == "auth"
+                and hmac.compare_digest(parts[1].encode("utf-8"), self.token.encode("utf-8")))
+
+    def start(self):
+        control = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def reply(self, reply):
+                self.wfile.write((json.dumps(reply, default=str) + "\n").encode("utf-8"))
+
+            def handle(self):
+                # Bounded reads, so a client cannot make us buffer an endless line
+                first = self.rfile.readline(1024).decode("utf-8", "replace")
+                if HTTP_LINE.match(first) or not control.check_auth(first):
+                    return
+                self.reply({"ok": True})
+                while True:
+                    line = self.rfile.readline(4096).decode("utf-8", "replace")
+                    if not line:
+                        return
+                    if HTTP_LINE.match(line) or not control.is_known(line):
+                        self.reply({"ok": False, "error": "unknown command"})
+                        return
+                    self.reply(control.handle(line))
+
+        try:
+            self._server = socketserver.ThreadingTCPServer((self.host, self.port), Handler)
+        except OSError as e:
+            print(f"Control socket could not bind {self.host}:{self.port}: {e}")
+            return False
+        try:
+            self.token = write_token(self.token_path)
+        except OSError as e:
+            print(f"Control socket disabled, could not write token {self.token_path}: {e}")
+            self._server.server_close()
+            self._server = None
+            return False
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="control-server", daemon=True)
+        self._thread.start()
+        print(f"Control socket listening on {self.host}:{self.port}")
+        return True
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+            try:
+                os.remove(self.token_path)
+            except OSError:
+                pass
+
+
+def send_command(command, host="127.0.0.1", port=DEFAULT_CONTROL_PORT, timeout=5.0,
+                 token_path=DEFAULT_TOKEN_PATH):
+    token = read_token(token_path)
+    with socket.create_connection((host, port), timeout=timeout) as sock:
+        sock.sendall(f"auth {token}\n{command.strip()}\n".encode("utf-8"))
+        lines = sock.makefile("r", encoding="utf-8")
+        if not lines.readline():
+            return {"ok": False, "error": "authentication failed"}
+        reply = lines.readline()
+    return json.loads(reply) if reply else {"ok": False, "error": "no reply"}
+
+
+def run_headless(profile=None, control_port=DEFAULT_CONTROL_PORT, start_tracking=False):
+    from src.pipeline import Pipeline
+
+    shutdown_event = threading.Event()
+
+    def on_signal(signum, frame):
+        shutdown_event.set()
+
+    signal.signal(signal.SIGINT, on_signal)
+    signal.signal(signal.SIGTERM, on_signal)
+    if hasattr(signal, "SIGBREAK"):
+        signal.signal(signal.SIGBREAK, on_signal)
+
+    pipeline = Pipeline()
+    pipeline.start()
+    if profile and not pipeline.switch_profile(profile):
+        pipeline.stop()
+        return 1
+    if start_tracking:
+        pipeline.set_tracking(True)
+
+    control = ControlServer(pipeline, port=control_port, shutdown_event=shutdown_event)
+    control.register("profiler", pipeline.profiler.handle_command)
+    control.register("memory", MemoryAudit().handle_command)
+    control.register("record", pipeline.handle_record_command)
+    control.start()
+    print("Running headless, Ctrl+C to stop")
+    try:
+        # Wake up regularly so signals are handled promptly on Windows too
+        while not shutdown_event.wait(0.5):
+            pass
+    finally:
+        control.stop()
+        pipeline.stop()
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--headless", action="store_true", help="run the pipeline without the GUI")
+    parser.add_argument("--profile", help="profile to activate at startup")
+    parser.add_argument("--start-tracking", action="store_true", help="turn mouse tracking on at startup")
+    parser.add_argument("--control-port", type=int, default=DEFAULT_CONTROL_PORT)
+    parser.add_argument("--send", metavar="COMMAND", help="send a command to a running service and exit")
+    args = parser.parse_args()
+
+    if args.send:
+        try:
+            reply = send_command(args.send, port=args.control_port)
+        except OSError as e:
+            print(f"Could not reach the service on port {args.control_port}: {e}")
+            return 1
+        print(json.dumps(reply, indent=2))
+        return 0 if reply.get("ok") else 1
+
+    if not args.headless:
+        parser.error("use --headless to run the service, or --send COMMAND to control one")
+    return run_headless(args.profile, args.control_port, args.start_tracking)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
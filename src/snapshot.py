@@ -0,0 +1,25 @@
+from typing import Any, NamedTuple
+
+
+class Snapshot(NamedTuple):
+    seq: int
+    timestamp: float
+    data: Any
+
+
+class SnapshotSlot:
+    """Latest value published by a single writer thread, read without locks.
+
+    ``publish`` builds a new immutable ``Snapshot`` and rebinds ``latest`` in one
+    assignment, which is atomic under the GIL, so readers always see a
+    consistent (seq, timestamp, data) triple. Readers compare ``seq`` with the
+    last one they handled to skip work when nothing changed.
+    """
+
+    def __init__(self, data=None):
+        self.latest = Snapshot(0, 0.0, data)
+
+    def publish(self, data, timestamp):
+        snapshot = Snapshot(self.latest.seq + 1, timestamp, data)
+        self.latest = snapshot
+        return snapshot
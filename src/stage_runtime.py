@@ -0,0 +1,214 @@
+import threading
+import time
+from collections import deque
+
+from src.event_log import emit, ERROR, WARNING, PIPELINE, STAGE_ERROR, STAGE_STOP_TIMEOUT
+
+# Edge drop policies when the queue is full
+DROP_OLDEST = "drop_oldest"   # keep the freshest items; capacity 1 makes a latest-value mailbox
+DROP_NEWEST = "drop_newest"   # keep what is queued, reject the new item
+BLOCK = "block"               # producer waits for room (backpressure)
+POLICIES = (DROP_OLDEST, DROP_NEWEST, BLOCK)
+
+
+class Edge:
+    """Bounded queue between two stages with a drop policy for when it is full."""
+
+    def __init__(self, name, capacity=1, policy=DROP_OLDEST):
+        if capacity < 1:
+            raise ValueError("capacity should be >=1")
+        if policy not in POLICIES:
+            raise ValueError(f"policy should be one of {POLICIES}")
+        self.name = name
+        self.capacity = capacity
+        self.policy = policy
+        self.items = deque()
+        self.cond = threading.Condition()
+        self.closed = False
+        self.put_count = 0
+        self.dropped = 0
+        self.max_depth = 0
+
+    def __len__(self):
+        return len(self.items)
+
+    def put(self, item):
+        """Queue an item; return False if it (or nothing at all) was dropped instead."""
+        with self.cond:
+            if self.closed:
+                return False
+            if len(self.items) >= self.capacity:
+                if self.policy == DROP_OLDEST:
+                    self.items.popleft()
+                    self.dropped += 1
+                elif self.policy == DROP_NEWEST:
+                    self.dropped += 1
+                    return False
+                else:
+                    while len(self.items) >= self.capacity and not self.closed:
+                        self.cond.wait()
+                    if self.closed:
+                        return False
+            self.items.append(item)
+            self.put_count += 1
+            self.max_depth = max(self.max_depth, len(self.items))
+            self.cond.notify_all()
+            return True
+
+    def get(self, timeout=None):
+        """Take the oldest item; return None on timeout or once the edge is closed and empty."""
+        with self.cond:
+            if not self.items and not self.closed:
+                self.cond.wait(timeout)
+            if not self.items:
+                return None
+            item = self.items.popleft()
+            self.cond.notify_all()
+            return item
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+    def reopen(self):
+        with self.cond:
+            self.closed = False
+            self.items.clear()
+
+    def stats(self):
+        return {"depth": len(self.items), "capacity": self.capacity, "policy": self.policy,
+                "put": self.put_count, "dropped": self.dropped, "max_depth": self.max_depth}
+
+
+class Stage:
+    """A named unit of work running on its own thread.
+
+    A source stage calls ``source()`` in a loop; anything else waits on its
+    inbox edge and calls ``handler(item)``. A non-None return value is put on
+    every output edge. ``on_start``/``on_stop`` run on the caller's thread
+    before the worker starts and after it has been joined.
+    """
+
+    def __init__(self, name, handler=None, source=None, on_start=None, on_stop=None, poll_timeout=0.1):
+        if (handler is None) == (source is None):
+            raise ValueError("A stage needs exactly one of handler or source")
+        self.name = name
+        self.handler = handler
+        self.source = source
+        self.on_start = on_start
+        self.on_stop = on_stop
+        self.poll_timeout = poll_timeout
+        self.inbox = None
+        self.outputs = []
+        self._stop_flag = threading.Event()
+        self._thread = None
+        self.processed = 0
+        self.errors = 0
+        self.busy_time = 0.0
+        self.last_active = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return True
+        if self.on_start and self.on_start() is False:
+            print(f"Stage '{self.name}' failed to start")
+            return False
+        self._stop_flag.clear()
+        if self.inbox is not None:
+            self.inbox.reopen()
+        self._thread = threading.Thread(target=self._run, name=f"stage-{self.name}", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self, timeout=2.0):
+        self._stop_flag.set()
+        if self.inbox is not None:
+            self.inbox.close()
+        if self._thread:
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                emit(PIPELINE, STAGE_STOP_TIMEOUT, self.name, level=WARNING)
+            self._thread = None
+        if self.on_stop:
+            self.on_stop()
+
+    def _run(self):
+        while not self._stop_flag.is_set():
+            if self.source is None:
+                item = self.inbox.get(self.poll_timeout)
+                if item is None:
+                    continue
+            start = time.perf_counter()
+            try:
+                result = self.source() if self.source is not None else self.handler(item)
+            except Exception as e:
+                self.errors += 1
+                emit(PIPELINE, STAGE_ERROR, self.name, repr(e), level=ERROR)
+                result = None
+            now = time.perf_counter()
+            self.busy_time += now - start
+            self.last_active = now
+            self.processed += 1
+            if result is not None:
+                for edge in self.outputs:
+                    edge.put(result)
+
+    def is_alive(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def health(self):
+        return {
+            "alive": self.is_alive(),
+            "processed": self.processed,
+            "errors": self.errors,
+            "busy_s": self.busy_time,
+            "idle_s": time.perf_counter() - self.last_active if self.last_active else None,
+            "inbox": self.inbox.stats() if self.inbox is not None else None,
+        }
+
+
+class StageGraph:
+    """Declares stages and the edges between them, and starts/stops them as a unit."""
+
+    def __init__(self):
+        self.stages = {}
+        self.edges = {}
+
+    def add(self, stage):
+        if stage.name in self.stages:
+            raise ValueError(f"Duplicate stage '{stage.name}'")
+        self.stages[stage.name] = stage
+        return stage
+
+    def connect(self, src, dst, capacity=1, policy=DROP_OLDEST):
+        """Feed ``dst``'s inbox from ``src`` (a stage name, or None for an external producer).
+
+        A stage has one inbox, shared by all its producers. Returns the edge so
+        callback-driven producers can ``put`` into it directly.
+        """
+        target = self.stages[dst]
+        if target.source is not None:
+            raise ValueError(f"Source stage '{dst}' cannot have an inbox")
+        if target.inbox is None:
+            target.inbox = Edge(dst, capacity, policy)
+            self.edges[dst] = target.inbox
+        if src is not None and target.inbox not in self.stages[src].outputs:
+            self.stages[src].outputs.append(target.inbox)
+        return target.inbox
+
+    def start(self):
+        """Start consumers before producers so nothing is queued into a stopped stage."""
+        for stage in reversed(list(self.stages.values())):
+            if not stage.start():
+                self.stop()
+                return False
+        return True
+
+    def stop(self, timeout=2.0):
+        """Stop producers first, then each downstream stage once its inbox is closed."""
+        for stage in self.stages.values():
+            stage.stop(timeout)
+
+    def health(self):
+        return {name: stage.health() for name, stage in self.stages.items()}
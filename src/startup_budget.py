@@ -0,0 +1,152 @@
+"""Startup-time budget check based on ``python -X importtime``.
+
+Imports each module in a fresh interpreter, prints the slowest imports
+(cumulative time, top-level packages only by default) and fails if the
+total exceeds the budget::
+
+    python -m src.startup_budget
+    python -m src.startup_budget src.pipeline --budget-ms 250 --top 15 --all
+
+Lazy imports only move cost from ``import`` to first use, so ``--start``
+also times ``Pipeline.start(wait=False)`` (what the GUI waits for) and the
+warm-up phases, and lists the modules first imported inside start()::
+
+    python -m src.startup_budget --start
+"""
+import argparse
+import json
+import re
+import subprocess
+import sys
+
+LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+DEFAULT_BUDGETS = {
+    # Heavy dependencies are imported lazily, so these should stay well under a second
+    "src.pipeline": 400.0,
+    "src.service": 100.0,
+}
+# Pipeline.start(wait=False): building the stages, before the warm-up threads take over
+DEFAULT_START_BUDGET_MS = 500.0
+
+START_CODE = """
+import json, time
+begin = time.perf_counter()
+from src.pipeline import Pipeline
+imported = time.perf_counter()
+pipeline = Pipeline()
+pipeline.start(wait=False)
+returned = time.perf_counter()
+ready = pipeline.ready.wait({timeout})
+times = dict(pipeline.startup_times, import_pipeline=imported - begin, start_returned=returned - imported)
+pipeline.stop()
+print(json.dumps({{"ready": ready, "times": times}}))
+"""
+
+
+def _run(code, python, label=None):
+    proc = subprocess.run([python, "-X", "importtime", "-c", code], capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"{label or code} failed:\n{proc.stderr.strip().splitlines()[-1]}")
+    return proc
+
+
+def _importtime(code, python):
+    proc = _run(code, python)
+    rows = []
+    for line in proc.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return rows
+
+
+def measure(module, python=sys.executable):
+    """Return ``[(name, self_us, cumulative_us, depth)]`` for ``import module``.
+
+    Modules the bare interpreter already imports at startup are left out.
+    """
+    startup = {name for name, _, _, _ in _importtime("pass", python)}
+    return [row for row in _importtime(f"import {module}", python) if row[0] not in startup]
+
+
+def measure_start(python=sys.executable, timeout=30.0):
+    """Run Pipeline.start(wait=False) in a fresh interpreter.
+
+    Returns ``(result, rows)``: the startup phase times in seconds and the
+    importtime rows of modules that ``import src.pipeline`` did not import.
+    """
+    proc = _run(START_CODE.format(timeout=timeout), python, "Pipeline.start()")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    imported = {name for name, _, _, _ in _importtime("import src.pipeline", python)}
+    rows = []
+    for line in proc.stderr.splitlines():
+        match = LINE.match(line)
+        if match and match.group(4) not in imported:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return result, rows
+
+
+def report_start(result, rows, budget_ms, top=10):
+    times = result["times"]
+    returned_ms = times["start_returned"] * 1000
+    print(f"Pipeline.start(wait=False): {returned_ms:.1f} ms (budget {budget_ms:.0f} ms)")
+    for phase in ("import_pipeline", "construct", "model", "camera", "total"):
+        if phase in times:
+            print(f"  {phase:<16} {times[phase] * 1000:8.1f} ms")
+    if not result["ready"]:
+        print("  pipeline did not become ready")
+    print(f"  imported during start: {sum(r[1] for r in rows) / 1000:.1f} ms")
+    top_level = [r for r in rows if r[3] == 0]
+    for name, self_us, cumulative_us, depth in sorted(top_level, key=lambda r: r[2], reverse=True)[:top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {self_us / 1000:7.1f} ms self  {name}")
+    return returned_ms <= budget_ms
+
+
+def report(module, rows, budget_ms, top=10, show_all=False):
+    total = sum(self_us for _, self_us, _, _ in rows)
+    print(f"import {module}: {total / 1000:.1f} ms (budget {budget_ms:.0f} ms)")
+    selected = rows if show_all else [r for r in rows if r[3] == 0 and r[0] != module]
+    for name, self_us, cumulative_us, depth in sorted(selected, key=lambda r: r[2], reverse=True)[:top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {self_us / 1000:7.1f} ms self  {'  ' * depth}{name}")
+    return total / 1000 <= budget_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("modules", nargs="*", default=list(DEFAULT_BUDGETS))
+    parser.add_argument("--budget-ms", type=float, help="budget for every module (default: per-module table)")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--all", action="store_true", help="include nested imports, not only top-level ones")
+    parser.add_argument("--start", action="store_true", help="also time Pipeline.start() and its warm-up")
+    parser.add_argument("--start-budget-ms", type=float, default=DEFAULT_START_BUDGET_MS)
+    args = parser.parse_args()
+
+    ok = True
+    for module in args.modules:
+        budget = args.budget_ms or DEFAULT_BUDGETS.get(module, 500.0)
+        try:
+            rows = measure(module)
+        except RuntimeError as e:
+            print(e)
+            ok = False
+            continue
+        if not report(module, rows, budget, args.top, args.all):
+            print(f"  over budget")
+            ok = False
+    if args.start:
+        try:
+            result, rows = measure_start()
+        except (RuntimeError, ValueError, IndexError) as e:
+            print(f"Pipeline.start() could not be measured: {e}")
+            return 1
+        if not report_start(result, rows, args.start_budget_ms, args.top):
+            print(f"  over budget")
+            ok = False
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
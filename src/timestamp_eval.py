@@ -0,0 +1,134 @@
+"""Replay a cursor trace through the mouse filter with callback vs capture timestamps.
+
+Record a trace with the service's ``record start`` / ``record stop trace``
+commands, or ``FaceProcessor.start_recording()`` / ``stop_recording(path)``
+(fields ``capture_ts``, ``callback_ts``, ``cursor``), then run::
+
+    python -m src.timestamp_eval trace.cursor.npz
+
+Without a trace, ``--synthetic`` generates a smooth head motion sampled at the
+camera rate with a variable inference delay, which is what the callback clock
+sees in practice.
+"""
+import argparse
+import math
+
+import numpy as np
+
+from src.cursor_predictor import CursorPredictor
+from src.modified_oneEuroFilter import OneEuroFilter
+from src.replay import load_trace
+
+
+def replay_velocity(timestamps, cursor, mincutoff=0.5, beta=0.07, freq=30):
+    """Run the same filter/velocity update as MouseController.move and return the velocity per frame (px)."""
+    f1 = OneEuroFilter(freq=freq, mincutoff=mincutoff, beta=beta, dcutoff=1.0)
+    v = np.zeros(2)
+    prev = None
+    out = np.zeros((len(cursor), 2))
+    for i, (t, pos) in enumerate(zip(timestamps, cursor)):
+        _, alpha = f1(math.sqrt(pos[0]**2 + pos[1]**2), float(t))
+        if prev is not None:
+            v = (pos - prev) * alpha + (1 - alpha) * v
+        prev = pos
+        out[i] = v
+    return out
+
+
+def replay_velocity_per_second(timestamps, cursor, mincutoff=0.5, beta=0.07, freq=30):
+    """Same update, but with the displacement divided by the timestamp delta (px/s).
+
+    move() does not do this; it shows how clock jitter reaches consumers
+    that work in real time units, such as the cursor predictor.
+    """
+    f1 = OneEuroFilter(freq=freq, mincutoff=mincutoff, beta=beta, dcutoff=1.0)
+    v = np.zeros(2)
+    prev = None
+    prev_t = None
+    out = np.zeros((len(cursor), 2))
+    for i, (t, pos) in enumerate(zip(timestamps, cursor)):
+        t = float(t)
+        _, alpha = f1(math.sqrt(pos[0]**2 + pos[1]**2), t)
+        if prev is not None and t > prev_t:
+            v = (pos - prev) / (t - prev_t) * alpha + (1 - alpha) * v
+        prev, prev_t = pos, t
+        out[i] = v
+    return out
+
+
+def replay_prediction(timestamps, callback_ts, cursor, injection_delay=0.005, smoothing=0.1):
+    """Run MouseController.predict on each sample and return the predicted positions.
+
+    The horizon is measured as in predict(): from the sample's timestamp to
+    the time the result is handled (the callback time) plus the injection delay.
+    """
+    predictor = CursorPredictor()
+    latency = 0.0
+    out = np.zeros((len(cursor), 2))
+    for i, (t, now, pos) in enumerate(zip(timestamps, callback_ts, cursor)):
+        latency += smoothing * (now - t + injection_delay - latency)
+        out[i] = predictor.step(pos, float(t), latency)
+    return out
+
+
+def velocity_jitter(velocity):
+    """RMS of the frame-to-frame velocity change."""
+    if len(velocity) < 3:
+        return 0.0
+    return float(np.sqrt(np.mean(np.sum(np.diff(velocity[1:], axis=0) ** 2, axis=1))))
+
+
+def synthetic_trace(seconds=20.0, fps=30.0, delay_ms=30.0, delay_jitter_ms=12.0, seed=0):
+    rng = np.random.default_rng(seed)
+    n = int(seconds * fps)
+    capture_ts = np.arange(n) / fps
+    # get_cursor() positions are in camera pixels
+    cursor = np.stack([320 + 40 * np.sin(2 * np.pi * 0.4 * capture_ts),
+                       240 + 25 * np.sin(2 * np.pi * 0.25 * capture_ts + 1.0)], axis=1)
+    cursor += rng.normal(0, 0.3, cursor.shape)
+    delays = np.clip(rng.normal(delay_ms, delay_jitter_ms, n), 5.0, None) / 1000.0
+    callback_ts = np.maximum.accumulate(capture_ts + delays)
+    return {"capture_ts": capture_ts, "callback_ts": callback_ts, "cursor": cursor}
+
+
+def evaluate(trace, mincutoff=0.5, beta=0.07):
+    cursor = np.asarray(trace["cursor"], dtype=np.float64)
+    results = {}
+    for clock in ("callback_ts", "capture_ts"):
+        timestamps = np.asarray(trace[clock], dtype=np.float64)
+        results[clock] = {
+            "move": velocity_jitter(replay_velocity(timestamps, cursor, mincutoff, beta)),
+            "per_second": velocity_jitter(replay_velocity_per_second(timestamps, cursor, mincutoff, beta)),
+            # Jitter of the predicted position's per-frame step (predict on)
+            "predict": velocity_jitter(replay_prediction(timestamps, trace["callback_ts"], cursor)),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("trace", nargs="?", help=".npz trace recorded by FaceProcessor")
+    parser.add_argument("--synthetic", action="store_true", help="use a generated trace")
+    parser.add_argument("--mincutoff", type=float, default=0.5)
+    parser.add_argument("--beta", type=float, default=0.07)
+    args = parser.parse_args()
+
+    if args.trace:
+        trace = load_trace(args.trace)
+    elif args.synthetic:
+        trace = synthetic_trace()
+    else:
+        parser.error("give a trace path or --synthetic")
+
+    results = evaluate(trace, args.mincutoff, args.beta)
+    print(f"frames: {len(trace['cursor'])}")
+    for metric, unit, label in (("move", "px/frame", "move() velocity jitter"),
+                                ("per_second", "px/s", "dt-normalised velocity jitter"),
+                                ("predict", "px/frame", "predicted position jitter")):
+        callback, capture = results["callback_ts"][metric], results["capture_ts"][metric]
+        change = f"{100.0 * (1 - capture / callback):+.1f}%" if callback > 0 else "-"
+        print(f"{label:<30} callback {callback:8.3f} {unit}  capture {capture:8.3f} {unit}  reduction {change}")
+
+
+if __name__ == "__main__":
+    main()